@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'comunidadai_api.settings')
+# Bajo ASGI las conexiones persistentes por hilo no se reutilizan bien:
+# settings.py usa el pool de core.db_pool salvo DB_POOL=False.
+os.environ['COMUNIDADAI_ASGI'] = '1'
 
 application = get_asgi_application()
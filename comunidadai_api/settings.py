@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -13,6 +14,11 @@ ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS").split(",")
 #New Line
 PUBLIC_ROOT = os.getenv("PUBLIC_ROOT")
 
+# Schema OpenAPI + Swagger (api/schema/). drf_spectacular se importa recién en el
+# primer request al schema; API_DOCS=False no monta las rutas ni lo importa
+# (core/docs.py reemplaza extend_schema y compañía por no-ops).
+API_DOCS = os.getenv("API_DOCS", "True") == "True"
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -22,11 +28,12 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "corsheaders",
     "rest_framework",
-    'rest_framework_simplejwt',
-    "drf_spectacular",
     "core",
-    "django_extensions",
 ]
+if API_DOCS:
+    INSTALLED_APPS.append("drf_spectacular")
+if DEBUG:
+    INSTALLED_APPS.append("django_extensions")  # solo herramientas de desarrollo (shell_plus, graph_models...)
 
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_HEADERS = ["*"]
@@ -34,7 +41,11 @@ CORS_ALLOW_METHODS = ["*"]
 CORS_ALLOW_CREDENTIALS = True
 
 MIDDLEWARE = [
+    "core.metrics.MetricsMiddleware",
+    "core.db_router.ReplicaRoutingMiddleware",
+    "core.throttling.LoadSheddingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "core.compression.GZipMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -42,6 +53,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.profiling.RequestProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "comunidadai_api.urls"
@@ -62,19 +74,80 @@ TEMPLATES = [{
 
 WSGI_APPLICATION = "comunidadai_api.wsgi.application"
 
+# DB_POOL=True: pool de conexiones en proceso (por defecto bajo asgi.py).
+# Si no, conexiones persistentes por hilo con CONN_MAX_AGE + health checks.
+ASGI = os.getenv("COMUNIDADAI_ASGI") == "1"
+DB_POOL = os.getenv("DB_POOL", "True" if ASGI else "False") == "True"
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.db_pool" if DB_POOL else "django.db.backends.postgresql",
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST", "127.0.0.1"),
         "PORT": os.getenv("DB_PORT", "5432"),
+        # Con pool, Django "cierra" en cada request y la conexión vuelve al pool
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "POOL": {
+            "MAX_SIZE": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        },
+    }
+}
+
+# Réplicas de lectura: DB_REPLICA_HOSTS=host1,host2:5433 (mismo NAME/USER/PASSWORD)
+for i, replica in enumerate(h for h in os.getenv("DB_REPLICA_HOSTS", "").split(",") if h):
+    host, _, port = replica.partition(":")
+    DATABASES[f"replica_{i + 1}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
     }
+
+DB_REPLICAS = {
+    "ALIASES": [alias for alias in DATABASES if alias != "default"],
+    # Segundos: lag máximo aceptado y duración del pin a la primaria tras escribir
+    "LAG_TOLERANCE": float(os.getenv("DB_REPLICA_LAG_TOLERANCE", "2")),
+    "LAG_CHECK_INTERVAL": float(os.getenv("DB_REPLICA_LAG_CHECK_INTERVAL", "5")),
+    # Alias de CACHES para el pin; con réplicas tiene que ser compartido entre workers (check core.E001)
+    "PIN_CACHE": os.getenv("DB_REPLICA_PIN_CACHE", "default"),
 }
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+
+# Cache por proceso salvo que haya REDIS_URL (necesario con réplicas o RATE_LIMIT_BACKEND=cache y varios workers)
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+if os.getenv("REDIS_URL"):
+    CACHES["default"] = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
 
 AUTH_PASSWORD_VALIDATORS = []  # simple para desarrollo
 
+# El primero es el hasher vigente; el resto solo verifica y se rehashea al vigente en el login.
+# PASSWORD_HASHERS=argon2,pbkdf2 (alias) o rutas completas de clases.
+_HASHER_ALIASES = {
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "pbkdf2_sha1": "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "argon2": "django.contrib.auth.hashers.Argon2PasswordHasher",  # pip install argon2-cffi
+    "bcrypt_sha256": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",  # pip install bcrypt
+    "scrypt": "django.contrib.auth.hashers.ScryptPasswordHasher",
+}
+PASSWORD_HASHERS = [
+    _HASHER_ALIASES.get(h.strip(), h.strip())
+    for h in os.getenv("PASSWORD_HASHERS", "pbkdf2,pbkdf2_sha1,argon2,bcrypt_sha256,scrypt").split(",")
+    if h.strip()
+]
+
+# Verificación de passwords fuera del hilo del request (core/passwords.py):
+# WORKERS hilos (pbkdf2/scrypt/argon2 liberan el GIL) y a lo sumo MAX_PENDING
+# verificaciones en curso o en cola; por encima se responde 503 + Retry-After.
+PASSWORD_VERIFY = {
+    "WORKERS": int(os.getenv("PASSWORD_VERIFY_WORKERS", "2")),
+    "MAX_PENDING": int(os.getenv("PASSWORD_VERIFY_MAX_PENDING", "16")),
+    "RETRY_AFTER": int(os.getenv("PASSWORD_VERIFY_RETRY_AFTER", "1")),
+}
+
 LANGUAGE_CODE = "es"
 TIME_ZONE = "America/Bogota"
 USE_I18N = True
@@ -87,19 +160,131 @@ DOMAIN = os.getenv("DOMAIN")
 MEDIA_URL = "/comunidadia_uploads/"
 MEDIA_ROOT = os.path.join(PUBLIC_ROOT, "comunidadia_uploads")
 
+# HTML de publicaciones comprimido en disco: none | gzip | zstd (requiere zstandard)
+PUBLICATION_STORAGE = {
+    # Dónde se guarda el HTML de publicaciones nuevas: file (MEDIA_ROOT/publications) | db (Publication.content)
+    # Las existentes se mueven con manage.py migrate_publication_content
+    "BACKEND": os.getenv("PUBLICATION_BACKEND", "file"),
+    "COMPRESSION": os.getenv("PUBLICATION_COMPRESSION", "gzip"),
+    "GZIP_LEVEL": int(os.getenv("PUBLICATION_GZIP_LEVEL", "6")),
+    "ZSTD_LEVEL": int(os.getenv("PUBLICATION_ZSTD_LEVEL", "3")),
+    # publications/<id>/content: django (FileResponse) | x-accel (nginx) | x-sendfile (apache)
+    "SERVE": os.getenv("PUBLICATION_SERVE", "django"),
+    # location "internal" de nginx que apunta a MEDIA_ROOT
+    "ACCEL_PREFIX": os.getenv("PUBLICATION_ACCEL_PREFIX", "/_protected_media/"),
+    "CACHE_MAX_AGE": int(os.getenv("PUBLICATION_CACHE_MAX_AGE", "60")),
+    # Escrituras atómicas (temporal + os.replace): none | file (fsync) | full (fsync + directorio)
+    "FSYNC": os.getenv("PUBLICATION_FSYNC", "file"),
+}
+
+# Límites de imágenes subidas (se validan por cabecera, sin decodificar la imagen)
+IMAGE_UPLOAD = {
+    "MAX_BYTES": int(os.getenv("IMAGE_MAX_BYTES", str(20 * 1024 * 1024))),
+    "MAX_PIXELS": int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000))),
+    "ALLOWED_FORMATS": [
+        f.strip().upper() for f in os.getenv("IMAGE_ALLOWED_FORMATS", "JPEG,PNG,GIF,WEBP").split(",") if f.strip()
+    ],
+}
+
+# Subidas por partes reanudables (fuera de MEDIA_ROOT: no deben ser públicas)
+UPLOAD_SESSIONS = {
+    "TEMP_DIR": os.getenv("UPLOAD_TEMP_DIR", os.path.join(tempfile.gettempdir(), "comunidadai_uploads")),
+    "MAX_SIZE": int(os.getenv("UPLOAD_MAX_SIZE", str(50 * 1024 * 1024))),
+    "MAX_CHUNK": int(os.getenv("UPLOAD_MAX_CHUNK", str(8 * 1024 * 1024))),
+    "TTL_HOURS": int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")),
+}
+
+# Idempotency-Key en los POST de creación (core/idempotency.py)
+IDEMPOTENCY = {
+    "TTL_HOURS": int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24")),
+    # Segundos tras los que una key "en curso" se considera abandonada
+    "LOCK_TIMEOUT": int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60")),
+}
+
+# Ranking de publicaciones en tendencia (update_trending -> publication/trending)
+TRENDING = {
+    # Vida media de un comentario en el score (horas)
+    "HALF_LIFE_HOURS": float(os.getenv("TRENDING_HALF_LIFE_HOURS", "12")),
+    # Primera corrida: solo comentarios de las últimas N horas
+    "WINDOW_HOURS": int(os.getenv("TRENDING_WINDOW_HOURS", "72")),
+    # Segundos que se vuelven a leer por created_at: cubre comentarios que commitean tarde
+    # (tiene que superar la transacción más larga que crea un Commentary)
+    "OVERLAP_SECONDS": int(os.getenv("TRENDING_OVERLAP_SECONDS", "300")),
+    # score = comment_score * (1 + FOLLOWER_WEIGHT * ln(1 + seguidores del autor))
+    "FOLLOWER_WEIGHT": float(os.getenv("TRENDING_FOLLOWER_WEIGHT", "0.25")),
+    # Filas con comment_score menor salen del ranking; se guardan a lo sumo MAX_ROWS
+    "MIN_COMMENT_SCORE": float(os.getenv("TRENDING_MIN_COMMENT_SCORE", "0.05")),
+    "MAX_ROWS": int(os.getenv("TRENDING_MAX_ROWS", "1000")),
+}
+
+# Sugerencias "a quién seguir" (educator/suggestions, grafo en memoria de core/follow_graph.py)
+FOLLOW_SUGGESTIONS = {
+    # Reconstrucción completa (única forma de ver unfollows de otros procesos)
+    "REFRESH_SECONDS": int(os.getenv("FOLLOW_GRAPH_REFRESH_SECONDS", "600")),
+    # Cada cuánto se leen follows nuevos de otros procesos (id > último visto)
+    "POLL_SECONDS": float(os.getenv("FOLLOW_GRAPH_POLL_SECONDS", "5")),
+    # Aristas en el delta antes de forzar reconstrucción
+    "MAX_DELTA": int(os.getenv("FOLLOW_GRAPH_MAX_DELTA", "20000")),
+    # Vecinos recorridos por nodo (acota la latencia con cuentas muy seguidas)
+    "MAX_DEGREE": int(os.getenv("FOLLOW_GRAPH_MAX_DEGREE", "500")),
+    "FOF_WEIGHT": float(os.getenv("FOLLOW_SUGGESTIONS_FOF_WEIGHT", "1.0")),
+    "AUDIENCE_WEIGHT": float(os.getenv("FOLLOW_SUGGESTIONS_AUDIENCE_WEIGHT", "0.5")),
+    "MAX_LIMIT": 50,
+}
+
+# educator/autocomplete: índice de prefijos en memoria ("memory") o istartswith en la DB ("db")
+NICK_AUTOCOMPLETE = {
+    "BACKEND": os.getenv("NICK_AUTOCOMPLETE_BACKEND", "memory"),
+    # Reconstrucción completa (cambios de nick hechos en otros procesos)
+    "REFRESH_SECONDS": int(os.getenv("NICK_AUTOCOMPLETE_REFRESH_SECONDS", "300")),
+    "MAX_LIMIT": 20,
+}
+
+# Notificaciones (core/notifications.py): fan-out en segundo plano, en lotes
+NOTIFICATIONS = {
+    # False: el fan-out corre en el mismo hilo al hacer commit (tests, shell)
+    "ASYNC": os.getenv("NOTIFICATIONS_ASYNC", "true").lower() == "true",
+    "WORKERS": int(os.getenv("NOTIFICATIONS_WORKERS", "2")),
+    # Destinatarios por bulk_create/transacción
+    "CHUNK_SIZE": int(os.getenv("NOTIFICATIONS_CHUNK_SIZE", "1000")),
+    # Reintentos por lote ante deadlock/timeout antes de descartarlo
+    "RETRIES": int(os.getenv("NOTIFICATIONS_RETRIES", "3")),
+    "MAX_LIMIT": 100,
+}
+
+# Subida en lote (upload/batch): validación y guardado en paralelo
+UPLOAD_BATCH = {
+    "MAX_FILES": int(os.getenv("UPLOAD_BATCH_MAX_FILES", "30")),
+    "WORKERS": int(os.getenv("UPLOAD_BATCH_WORKERS", "4")),
+}
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'core.auth.JWTAuthenticationCustom',
     ),
+    # orjson (fallback a json de la stdlib si no está instalado)
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "core.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # Sin efecto en vistas sin throttle_scope; presupuestos en RATE_LIMITS
+    "DEFAULT_THROTTLE_CLASSES": ("core.throttling.TokenBucketThrottle",),
+    "NUM_PROXIES": int(os.getenv("NUM_PROXIES")) if os.getenv("NUM_PROXIES") else None,
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
     "PAGE_SIZE": 10,
 }
+if API_DOCS:
+    REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = "drf_spectacular.openapi.AutoSchema"
 
 SPECTACULAR_SETTINGS = {
     "TITLE": "ComunidadAI API",
@@ -114,10 +299,72 @@ SPECTACULAR_SETTINGS = {
     "SECURITY": [{"BearerAuth": []}],
 }
 
+# Schema OpenAPI pregenerado (core/openapi.py, manage.py build_openapi_schema).
+# CODE_VERSION: p. ej. el sha del deploy; vacío = hash de las fuentes .py
+OPENAPI_SCHEMA = {
+    "PATH": os.getenv("OPENAPI_SCHEMA_PATH", str(BASE_DIR / "openapi_schema.json")),
+    "CODE_VERSION": os.getenv("CODE_VERSION", ""),
+}
+
 # Config JWT (tiempos desde .env)
 ACCESS_MIN = int(os.getenv("JWT_ACCESS_MINUTES", "30"))
 REFRESH_DAYS = int(os.getenv("JWT_REFRESH_DAYS", "7"))
 JWT_CONFIG = {
     "ACCESS_LIFETIME": timedelta(minutes=ACCESS_MIN),
     "REFRESH_LIFETIME": timedelta(days=REFRESH_DAYS),
+    # Sesiones (refresh tokens) simultáneas por usuario; 0 = sin límite
+    "REFRESH_MAX_SESSIONS": int(os.getenv("JWT_REFRESH_MAX_SESSIONS", "10")),
+    # Access tokens verificados cacheados por proceso (LRU); 0 = desactivado
+    "VERIFIED_CACHE_SIZE": int(os.getenv("JWT_VERIFIED_CACHE_SIZE", "4096")),
+}
+
+# Profiling de requests bajo demanda (solo tokens ADMIN)
+PROFILING = {
+    "ENABLED": os.getenv("PROFILING_ENABLED", "False") == "True",
+    "HEADER": "X-Profile",  # X-Profile: 1 para perfilar la request
+    "SAMPLE_RATE": float(os.getenv("PROFILING_SAMPLE_RATE", "0")),  # 0..1 de requests ADMIN
+    "MODE": os.getenv("PROFILING_MODE", "cprofile"),  # cprofile | sampling (flamegraph)
+    "SAMPLING_INTERVAL_MS": int(os.getenv("PROFILING_SAMPLING_INTERVAL_MS", "5")),
+    "DIR": os.getenv("PROFILING_DIR", str(BASE_DIR / "profiles")),
+    "MAX_FILES": int(os.getenv("PROFILING_MAX_FILES", "200")),
+}
+
+# Métricas Prometheus (GET /api/metrics: token ADMIN o IP interna)
+METRICS = {
+    "ENABLED": os.getenv("METRICS_ENABLED", "True") == "True",
+    # Solo válido en un listener directo/interno (detrás de nginx local todo llega como 127.0.0.1)
+    "ALLOWED_IPS": [ip for ip in os.getenv("METRICS_ALLOWED_IPS", "").split(",") if ip],
+    # Prometheus lo manda en X-Metrics-Token (http_headers en scrape_config)
+    "TOKEN": os.getenv("METRICS_TOKEN", ""),
+    # Directorio compartido entre workers de gunicorn (vacío = solo este proceso)
+    "MULTIPROCESS_DIR": os.getenv("METRICS_MULTIPROCESS_DIR", ""),
+    # Segundos entre volcados del hilo en segundo plano de cada worker
+    "FLUSH_INTERVAL": float(os.getenv("METRICS_FLUSH_INTERVAL", "1")),
+}
+
+# Hilos para I/O bloqueante (archivos HTML) de las vistas async (core/async_views.py)
+ASYNC_IO_WORKERS = int(os.getenv("ASYNC_IO_WORKERS", "8"))
+
+# Rate limiting por cliente (user id o IP) para las vistas con throttle_scope.
+# "N/periodo" (s|min|h|day): ráfaga de N y recarga de N por periodo; vacío = sin límite.
+# BACKEND: memory (por proceso) | cache (CACHES[CACHE], compartido entre workers)
+RATE_LIMITS = {
+    "BACKEND": os.getenv("RATE_LIMIT_BACKEND", "memory"),
+    "CACHE": os.getenv("RATE_LIMIT_CACHE", "default"),
+    "MAX_KEYS": int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")),
+    "SCOPES": {
+        "search": os.getenv("RATE_LIMIT_SEARCH", "60/min"),
+        "login": os.getenv("RATE_LIMIT_LOGIN", "10/min"),
+        "upload": os.getenv("RATE_LIMIT_UPLOAD", "60/min"),
+    },
+}
+
+# Load shedding: requests en curso por proceso (0 = sin límite)
+LOAD_SHEDDING = {
+    "MAX_IN_FLIGHT": int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", "0")),
+    "SCOPES": {
+        "search": int(os.getenv("LOAD_SHED_SEARCH", "16")),
+        "upload": int(os.getenv("LOAD_SHED_UPLOAD", "8")),
+    },
+    "RETRY_AFTER": int(os.getenv("LOAD_SHED_RETRY_AFTER", "1")),
 }
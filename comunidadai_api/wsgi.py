@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'comunidadai_api.settings')
 
 application = get_wsgi_application()
+
+# Carga urls y vistas al importar, no en el primer request. Con
+# `gunicorn --preload` ocurre una vez en el master y los workers lo heredan.
+from django.urls import get_resolver  # noqa: E402
+get_resolver().url_patterns
@@ -1,8 +1,33 @@
 from django.contrib import admin
-from .models import User, Educator, Publication, Commentary, Subscription, RefreshToken, Image
-from django.contrib.auth.hashers import make_password, identify_hasher
+from .models import User, Educator, Publication, Commentary, Subscription, RefreshToken, Image, UploadSession
+from django import forms
+from django.db.models import F
+from django.contrib.auth.hashers import make_password, identify_hasher, get_hasher
+
+class UserAdminForm(forms.ModelForm):
+    class Meta:
+        model = User
+        fields = ("name", "email", "role", "password")
+
+    def clean_password(self):
+        pwd = self.cleaned_data.get("password")
+        if self.instance.pk and pwd == self.instance.password:
+            return pwd  # campo sin tocar: el hash guardado se conserva (se rehashea en el próximo login)
+        try:
+            hasher = identify_hasher(pwd)
+        except ValueError:
+            return pwd  # texto plano: save_model lo hashea
+        # Un hash ya calculado solo se acepta si es del hasher vigente y con sus parámetros
+        current = get_hasher("default")
+        if hasher.algorithm != current.algorithm or hasher.must_update(pwd):
+            raise forms.ValidationError(
+                f"Solo se aceptan hashes {current.algorithm} con los parámetros vigentes; "
+                "ingresa el password en texto plano."
+            )
+        return pwd
 
 class UserCreate(admin.ModelAdmin):
+    form = UserAdminForm
     list_display = ("id", "name", "email", "role")
     fields = ("name", "email", "role", "password")
     search_fields = ("email", "name")
@@ -11,16 +36,29 @@ class UserCreate(admin.ModelAdmin):
         pwd = form.cleaned_data.get("password")
         if pwd:
             try:
-                identify_hasher(pwd)
+                identify_hasher(pwd)  # ya validado en UserAdminForm.clean_password
                 obj.password = pwd
-            except Exception:
+            except ValueError:
                 obj.password = make_password(pwd)
         super().save_model(request, obj, form, change)
 
+class PublicationAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "educator", "version", "updated_at")
+    readonly_fields = ("version",)
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # Igual que update_publication_versioned: toda edición sube version (ETag, 409)
+            obj.version = F("version") + 1
+        super().save_model(request, obj, form, change)
+        if change:
+            obj.refresh_from_db(fields=["version"])
+
 admin.site.register(User, UserCreate)
 admin.site.register(Educator)
-admin.site.register(Publication)
+admin.site.register(Publication, PublicationAdmin)
 admin.site.register(Commentary)
 admin.site.register(Subscription)
 admin.site.register(RefreshToken)
 admin.site.register(Image)
+admin.site.register(UploadSession)
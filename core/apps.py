@@ -6,5 +6,6 @@ class CoreConfig(AppConfig):
     verbose_name = "Core App"
 
     def ready(self):
-        import core.schema  # noqa
-        import core.signals
\ No newline at end of file
+        # core.schema (extensión de drf_spectacular) lo importa core.openapi al generar el schema
+        import core.signals
+        import core.db_router  # registra el check de DB_REPLICAS["PIN_CACHE"]
@@ -0,0 +1,180 @@
+# core/async_views.py
+"""
+Versiones async (Django async views + ORM async) de los endpoints de lectura
+con más tráfico. Se montan bajo /api/async/ con el mismo contrato que sus
+equivalentes DRF de core/views.py; pensadas para servirse con asgi.py.
+"""
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+
+from .auth import JWTAuthenticationCustom
+from .models import Educator, Publication, Commentary, Subscription
+from .serializers import EducatorSerializer, PublicationSerializer, CommentarySerializer
+from .renderers import dumps
+from .throttling import TokenBucketThrottle
+from .storage import get_publication_html
+from .views import require_offset_limit, paginated
+
+# Lecturas de archivos fuera del event loop
+_io_executor = ThreadPoolExecutor(max_workers=settings.ASYNC_IO_WORKERS, thread_name_prefix="async-io")
+
+async def read_publication_html(content_url):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, get_publication_html, content_url)
+
+
+def _json(data, status=200):
+    return HttpResponse(dumps(data), status=status, content_type="application/json")
+
+def _detail(message, status):
+    return _json({"detail": str(message)}, status=status)
+
+
+class AsyncAPIView(View):
+    """
+    Autenticación con JWTAuthenticationCustom (misma semántica que DRF con
+    IsAuthenticated) y TokenBucketThrottle si la vista define throttle_scope,
+    antes de despachar al handler async.
+    """
+    authenticator = JWTAuthenticationCustom()
+    throttle_scope = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            result = await sync_to_async(self.authenticator.authenticate)(request)
+        except exceptions.AuthenticationFailed as e:
+            return self._unauthorized(e.detail)
+        if result is None:
+            return self._unauthorized(exceptions.NotAuthenticated.default_detail)
+        request.user = result[0]
+        if self.throttle_scope:
+            throttle = TokenBucketThrottle()
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                wait = throttle.wait()
+                response = _detail(exceptions.Throttled(wait).detail, 429)
+                response["Retry-After"] = str(math.ceil(wait))
+                return response
+        return await super().dispatch(request, *args, **kwargs)
+
+    def _unauthorized(self, message):
+        response = _detail(message, 401)
+        response["WWW-Authenticate"] = self.authenticator.authenticate_header(None)
+        return response
+
+
+async def _me_educator(user):
+    return await Educator.objects.filter(user_id=user.id).afirst()
+
+async def _follow_flags(me_edu, page):
+    if not me_edu:
+        return set(), set()
+    ids = [edu.id for edu in page]
+    followed_by_me = Subscription.objects.filter(
+        subscriber=me_edu, subscribed__in=ids,
+    ).values_list("subscribed_id", flat=True)
+    following_me = Subscription.objects.filter(
+        subscriber__in=ids, subscribed=me_edu,
+    ).values_list("subscriber_id", flat=True)
+    return {i async for i in followed_by_me}, {i async for i in following_me}
+
+
+# -------- Educators --------
+class AsyncEducatorListView(AsyncAPIView):
+    async def get(self, request):
+        try:
+            offset, limit = require_offset_limit(request)
+        except ValueError as e:
+            return _detail(e, 400)
+
+        qs = Educator.objects.select_related("user").order_by("id")
+        page = [edu async for edu in paginated(qs, offset, limit)]
+        followed_by_me_ids, following_me_ids = await _follow_flags(await _me_educator(request.user), page)
+
+        results = []
+        for edu in page:
+            item = EducatorSerializer(edu).data
+            item["followed_by_me"] = edu.id in followed_by_me_ids
+            item["following_me"] = edu.id in following_me_ids
+            results.append(item)
+        return _json(results)
+
+
+# -------- Publications --------
+class AsyncPublicationListView(AsyncAPIView):
+    async def get(self, request):
+        try:
+            offset, limit = require_offset_limit(request)
+        except ValueError as e:
+            return _detail(e, 400)
+        qs = Publication.objects.select_related("educator", "educator__user").order_by("-created_at")
+        page = [pub async for pub in paginated(qs, offset, limit)]
+        return _json(PublicationSerializer(page, many=True).data)
+
+class AsyncPublicationDetailView(AsyncAPIView):
+    async def get(self, request, publication_id: int):
+        pub = await (
+            Publication.objects
+            .with_content()
+            .select_related("educator", "educator__user")
+            .filter(id=publication_id)
+            .afirst()
+        )
+        if not pub:
+            return _detail("Publicación no encontrada.", 404)
+
+        comments_qs = (
+            Commentary.objects
+            .select_related("educator", "educator__user")
+            .filter(publication=pub)
+            .order_by("-created_at")
+        )
+
+        async def load_comments():
+            return [c async for c in comments_qs]
+
+        async def load_content():
+            if pub.content_in_db:
+                return pub.content or ""
+            return await read_publication_html(pub.content_url)
+
+        # Comentarios (DB) y contenido (archivo, si no vino en la fila) en paralelo
+        comments, content = await asyncio.gather(
+            load_comments(), load_content(), return_exceptions=True,
+        )
+        if isinstance(comments, BaseException):
+            raise comments
+        if isinstance(content, BaseException):
+            return _detail("Error al leer el contenido.", 400)
+
+        data = PublicationSerializer(pub).data
+        data["comments"] = CommentarySerializer(comments, many=True).data
+        data["content"] = content
+        return _json(data)
+
+class AsyncPublicationSearchView(AsyncAPIView):
+    throttle_scope = "search"
+
+    async def get(self, request):
+        try:
+            offset, limit = require_offset_limit(request)
+        except ValueError as e:
+            return _detail(e, 400)
+        nick = request.GET.get("nickname_part", "").strip()
+        title = request.GET.get("title_part", "").strip()
+        if not nick and not title:
+            return _detail("Se requiere nickname_part o title", 400)
+        qs = Publication.objects.select_related("educator", "educator__user")
+        if nick:
+            qs = qs.filter(educator__nick_name__icontains=nick)
+        if title:
+            qs = qs.filter(title__icontains=title)
+        qs = qs.order_by("-created_at")
+        page = [pub async for pub in paginated(qs, offset, limit)]
+        return _json(PublicationSerializer(page, many=True).data)
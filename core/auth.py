@@ -4,7 +4,12 @@ from rest_framework import exceptions
 from django.utils.translation import gettext_lazy as _
 from .models import User
 from .jwt_utils import decode_any_token
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .metrics import AUTH_FAILURES
+from .db_router import set_request_user
+
+def _failed(reason, message):
+    AUTH_FAILURES.inc(reason=reason)
+    return exceptions.AuthenticationFailed(message)
 
 class JWTAuthenticationCustom(BaseAuthentication):
     """
@@ -23,24 +28,26 @@ class JWTAuthenticationCustom(BaseAuthentication):
             return None
 
         if len(auth) == 1:
-            raise exceptions.AuthenticationFailed(_('Invalid Authorization header. No credentials provided.'))
+            raise _failed("no_credentials", _('Invalid Authorization header. No credentials provided.'))
         elif len(auth) > 2:
-            raise exceptions.AuthenticationFailed(_('Invalid Authorization header. Token string should not contain spaces.'))
+            raise _failed("malformed_header", _('Invalid Authorization header. Token string should not contain spaces.'))
 
         token = auth[1].decode('utf-8')
 
         try:
             payload = decode_any_token(token)
         except Exception:
-            raise exceptions.AuthenticationFailed(_('Invalid or expired token.'))
+            raise _failed("invalid_token", _('Invalid or expired token.'))
 
         user_id = payload.get('sub')
         if not user_id:
-            raise exceptions.AuthenticationFailed(_('Invalid token payload.'))
+            raise _failed("invalid_payload", _('Invalid token payload.'))
+
+        set_request_user(user_id)  # read-your-writes con réplicas
 
         user = User.objects.filter(id=user_id).first()
         if not user:
-            raise exceptions.AuthenticationFailed(_('User not found.'))
+            raise _failed("user_not_found", _('User not found.'))
 
         return (user, None)
 
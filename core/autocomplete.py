@@ -0,0 +1,122 @@
+# core/autocomplete.py
+"""
+Índice de prefijos de nick_name para educator/autocomplete.
+
+Lista ordenada de (nick normalizado, id) por proceso: una búsqueda es un
+bisect más un recorrido de a lo sumo `limit` entradas, sin tocar la DB.
+Las señales de Educator lo mantienen al día en este proceso; los cambios
+hechos en otros procesos se ven en la reconstrucción completa, cada
+NICK_AUTOCOMPLETE["REFRESH_SECONDS"]. Con BACKEND=db (p. ej. muchos
+workers con poca memoria) se responde desde la DB con istartswith sobre el
+índice UPPER(nick_name); ahí no se ignoran los acentos.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Upper
+
+from .metrics import record_cache
+from .models import Educator
+
+
+def normalize(nick: str) -> str:
+    """Sin acentos y en casefold: "Ñandú" y "nandu" comparten prefijo."""
+    decomposed = unicodedata.normalize("NFKD", nick)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold().strip()
+
+
+class NickIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._entries = None  # [(normalizado, id)] ordenada
+        self._nicks = {}      # id -> nick_name original
+        self._built_at = 0.0
+
+    @property
+    def ready(self):
+        return self._entries is not None
+
+    def rebuild(self):
+        rows = Educator.objects.exclude(nick_name__isnull=True).exclude(nick_name="").values_list("id", "nick_name")
+        nicks = dict(rows.iterator(chunk_size=10000))
+        entries = sorted((normalize(nick), pk) for pk, nick in nicks.items())
+        with self._lock:
+            self._entries, self._nicks = entries, nicks
+            self._built_at = time.monotonic()
+
+    def refresh(self, blocking=True):
+        """Construye o renueva el índice; sin `blocking` no espera a otro thread que ya lo hace."""
+        if self.ready and time.monotonic() - self._built_at <= settings.NICK_AUTOCOMPLETE["REFRESH_SECONDS"]:
+            return
+        if self._build_lock.acquire(blocking=blocking):
+            try:
+                if not self.ready or time.monotonic() - self._built_at > settings.NICK_AUTOCOMPLETE["REFRESH_SECONDS"]:
+                    self.rebuild()
+            finally:
+                self._build_lock.release()
+
+    def _discard(self, pk):
+        nick = self._nicks.pop(pk, None)
+        if nick is None:
+            return
+        key = (normalize(nick), pk)
+        i = bisect_left(self._entries, key)
+        if i < len(self._entries) and self._entries[i] == key:
+            del self._entries[i]
+
+    def upsert(self, pk, nick):
+        with self._lock:
+            if not self.ready:
+                return  # la construcción lo va a leer de la DB
+            self._discard(pk)
+            if nick:
+                self._nicks[pk] = nick
+                insort(self._entries, (normalize(nick), pk))
+
+    def remove(self, pk):
+        with self._lock:
+            if self.ready:
+                self._discard(pk)
+
+    def search(self, prefix, limit):
+        """[(id, nick_name)] cuyo nick normalizado empieza con `prefix`, en orden alfabético."""
+        prefix = normalize(prefix)
+        with self._lock:
+            entries = self._entries
+            i = bisect_left(entries, (prefix,))
+            results = []
+            while i < len(entries) and len(results) < limit and entries[i][0].startswith(prefix):
+                pk = entries[i][1]
+                results.append((pk, self._nicks[pk]))
+                i += 1
+        return results
+
+
+nick_index = NickIndex()
+
+
+def autocomplete(prefix, limit):
+    if settings.NICK_AUTOCOMPLETE["BACKEND"] == "memory":
+        # La primera vez construye (el resto de threads espera); luego renueva sin bloquear
+        nick_index.refresh(blocking=not nick_index.ready)
+        if nick_index.ready:
+            record_cache("nick_autocomplete", True)
+            return nick_index.search(prefix, limit)
+    record_cache("nick_autocomplete", False)
+    return list(
+        Educator.objects.filter(nick_name__istartswith=prefix.strip())
+        .order_by(Upper("nick_name"), "id").values_list("id", "nick_name")[:limit]
+    )
+
+
+def on_educator_saved(pk, nick):
+    transaction.on_commit(lambda: nick_index.upsert(pk, nick))
+
+
+def on_educator_deleted(pk):
+    transaction.on_commit(lambda: nick_index.remove(pk))
@@ -0,0 +1,14 @@
+# core/compression.py
+from django.http import FileResponse
+from django.middleware.gzip import GZipMiddleware as DjangoGZipMiddleware
+
+
+class GZipMiddleware(DjangoGZipMiddleware):
+    """
+    GZip de Django para las respuestas JSON, sin tocar archivos servidos con
+    FileResponse: comprimirlos al vuelo rompería Range y sendfile.
+    """
+    def process_response(self, request, response):
+        if isinstance(response, FileResponse):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,2 @@
+# Backend PostgreSQL con pool de conexiones en proceso.
+# ENGINE = "core.db_pool" (ver DB_POOL en settings.py)
@@ -0,0 +1,170 @@
+# core/db_pool/base.py
+"""
+DatabaseWrapper de PostgreSQL que toma las conexiones de un pool por alias
+en lugar de abrir una nueva (TCP + auth) en cada request.
+
+Django sigue "cerrando" la conexión al terminar la request (CONN_MAX_AGE=0);
+aquí ese cierre la devuelve al pool. Pensado sobre todo para ASGI, donde
+las conexiones persistentes por hilo no se reutilizan bien.
+"""
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from django.db.backends.postgresql import base as pg_base
+
+from core.metrics import registry
+
+POOL_DEFAULTS = {
+    "MAX_SIZE": 10,          # conexiones abiertas como máximo por proceso
+    "TIMEOUT": 10.0,         # segundos esperando una conexión libre
+    "MAX_IDLE": 300.0,       # se cierran conexiones ociosas más antiguas
+    "CHECK_IDLE_AFTER": 30.0,  # SELECT 1 antes de reutilizar si estuvo ociosa más de esto
+}
+
+
+class ConnectionPool:
+    def __init__(self, alias, options):
+        self.alias = alias
+        self.options = {**POOL_DEFAULTS, **options}
+        self._idle = deque()  # (raw_connection, released_at)
+        self._size = 0
+        self._cond = threading.Condition()
+        self.stats = {"acquired": 0, "created": 0, "waits": 0, "timeouts": 0, "discarded": 0}
+
+    @property
+    def in_use(self):
+        return self._size - len(self._idle)
+
+    def acquire(self, connect, is_usable):
+        deadline = time.monotonic() + self.options["TIMEOUT"]
+        with self._cond:
+            self._close_expired()
+            waited = False
+            while True:
+                if self._idle:
+                    conn, released_at = self._idle.pop()
+                    idle_for = time.monotonic() - released_at
+                    if conn.closed or (idle_for > self.options["CHECK_IDLE_AFTER"] and not is_usable(conn)):
+                        self._discard(conn)
+                        continue
+                    self.stats["acquired"] += 1
+                    return conn
+                if self._size < self.options["MAX_SIZE"]:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    raise OperationalError(f"Pool '{self.alias}' agotado ({self.options['MAX_SIZE']} conexiones)")
+                if not waited:
+                    self.stats["waits"] += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        # Conexión nueva fuera del lock
+        try:
+            conn = connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats["created"] += 1
+            self.stats["acquired"] += 1
+        return conn
+
+    def release(self, conn):
+        with self._cond:
+            if conn.closed:
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, conn):
+        with self._cond:
+            self._discard(conn)
+            self._cond.notify()
+
+    def _discard(self, conn):
+        self._size -= 1
+        self.stats["discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _close_expired(self):
+        # Las más antiguas quedan a la izquierda (se reutiliza por la derecha)
+        limit = time.monotonic() - self.options["MAX_IDLE"]
+        while self._idle and self._idle[0][1] < limit:
+            conn, _ = self._idle.popleft()
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(alias, options):
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is None:
+            pool = _pools[alias] = ConnectionPool(alias, options)
+        return pool
+
+
+def _pool_connections():
+    values = {}
+    for alias, pool in list(_pools.items()):
+        values[(alias, "idle")] = len(pool._idle)
+        values[(alias, "in_use")] = pool.in_use
+    return values
+
+def _pool_events():
+    return {
+        (alias, event): count
+        for alias, pool in list(_pools.items())
+        for event, count in pool.stats.items()
+    }
+
+registry.gauge("db_pool_connections", "Conexiones del pool por estado.", ["alias", "state"],
+               callback=_pool_connections)
+registry.gauge("db_pool_events", "Eventos acumulados del pool de este proceso.", ["alias", "event"],
+               callback=_pool_events)
+
+
+class DatabaseWrapper(pg_base.DatabaseWrapper):
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict.get("POOL", {}))
+
+    def get_new_connection(self, conn_params):
+        parent = super().get_new_connection
+        return self.pool.acquire(lambda: parent(conn_params), self._raw_is_usable)
+
+    def _raw_is_usable(self, conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        conn = self.connection
+        if conn is None:
+            return
+        if conn.closed or (self.errors_occurred and not self._raw_is_usable(conn)):
+            self.pool.discard(conn)
+            return
+        try:
+            # Nunca devolver al pool una transacción abierta
+            if conn.info.transaction_status != 0:
+                conn.rollback()
+        except self.Database.Error:
+            self.pool.discard(conn)
+            return
+        self.pool.release(conn)
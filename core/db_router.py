@@ -0,0 +1,185 @@
+# core/db_router.py
+"""
+Router de réplicas de lectura.
+
+- Solo las requests GET/HEAD/OPTIONS leen de réplicas; todo lo demás
+  (management commands, hilos en background) usa la primaria.
+- Tras una escritura dentro de la request, el resto de la request lee de la
+  primaria, y el usuario queda "pineado" a la primaria durante
+  DB_REPLICAS["LAG_TOLERANCE"] segundos (read-your-writes entre requests).
+- Réplicas con un lag mayor a LAG_TOLERANCE se descartan temporalmente.
+- El pin vive en CACHES[PIN_CACHE]: con réplicas tiene que ser un cache
+  compartido entre workers (el check core.E001 rechaza LocMem/Dummy).
+"""
+import contextvars
+import math
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import connections
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_state = contextvars.ContextVar("db_routing_state", default=None)
+
+
+class RoutingState:
+    __slots__ = ("read_only", "wrote", "user_id", "pinned")
+
+    def __init__(self, read_only):
+        self.read_only = read_only
+        self.wrote = False
+        self.user_id = None
+        self.pinned = False
+
+
+def _conf(key):
+    return settings.DB_REPLICAS[key]
+
+def _pin_cache():
+    return caches[_conf("PIN_CACHE")]
+
+_LOCAL_CACHES = ("django.core.cache.backends.locmem.LocMemCache", "django.core.cache.backends.dummy.DummyCache")
+
+@checks.register(checks.Tags.caches, checks.Tags.database)
+def check_pin_cache(app_configs=None, **kwargs):
+    if not _conf("ALIASES"):
+        return []
+    alias = _conf("PIN_CACHE")
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend in _LOCAL_CACHES:
+        return [checks.Error(
+            f"DB_REPLICAS['PIN_CACHE'] ({alias!r}) usa {backend.rsplit('.', 1)[-1]}: el pin "
+            "read-your-writes no se ve desde los otros workers.",
+            hint="Configurar REDIS_URL o DB_REPLICA_PIN_CACHE con un cache compartido.",
+            id="core.E001",
+        )]
+    return []
+
+def _pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+def set_request_user(user_id):
+    """
+    Lo llama la autenticación apenas conoce el usuario (antes de su propia
+    consulta) para aplicar el pin read-your-writes de ese usuario.
+    """
+    state = _state.get()
+    if state is None or not _conf("ALIASES"):
+        return
+    state.user_id = user_id
+    if state.read_only and _pin_cache().get(_pin_key(user_id)):
+        state.pinned = True
+
+
+# -------- Lag de réplicas --------
+_lag_lock = threading.Lock()
+_lag_checked = {}  # alias -> (monotonic, lag_ok)
+
+def _replica_lag(alias):
+    conn = connections[alias]
+    if conn.vendor != "postgresql":
+        return 0.0
+    with conn.cursor() as cursor:
+        # Recibido == aplicado: al día aunque el último commit replicado sea viejo
+        # (sin escrituras en la primaria, now() - replay_timestamp crece igual)
+        cursor.execute(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+            " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )
+        return float(cursor.fetchone()[0])
+
+def _replica_ok(alias):
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checked.get(alias)
+        if checked and now - checked[0] < _conf("LAG_CHECK_INTERVAL"):
+            return checked[1]
+    try:
+        ok = _replica_lag(alias) <= _conf("LAG_TOLERANCE")
+    except Exception:
+        ok = False
+    with _lag_lock:
+        _lag_checked[alias] = (now, ok)
+    return ok
+
+def healthy_replicas():
+    return [alias for alias in _conf("ALIASES") if _replica_ok(alias)]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.read_only or state.wrote or state.pinned:
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        replicas = healthy_replicas()
+        if not replicas:
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        dbs = {PRIMARY, *_conf("ALIASES")}
+        if obj1._state.db in dbs and obj2._state.db in dbs:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas se alimentan por replicación, nunca por migrate
+        if db in _conf("ALIASES"):
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    # Sync y async; el estado va en un ContextVar, que sync_to_async copia a sus hilos
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(read_only=request.method in SAFE_METHODS)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if self._should_pin(state):
+            _pin_cache().set(_pin_key(state.user_id), 1, timeout=math.ceil(_conf("LAG_TOLERANCE")))
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState(read_only=request.method in SAFE_METHODS)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if self._should_pin(state):
+            await _pin_cache().aset(_pin_key(state.user_id), 1, timeout=math.ceil(_conf("LAG_TOLERANCE")))
+        return response
+
+    @staticmethod
+    def _should_pin(state):
+        return state.wrote and state.user_id is not None and _conf("ALIASES")
@@ -0,0 +1,30 @@
+# core/docs.py
+"""
+Decoradores de documentación OpenAPI para las vistas.
+
+Con API_DOCS=True son los de drf_spectacular. Con API_DOCS=False son no-ops
+y drf_spectacular no se importa (ahorra su carga al arrancar cada worker).
+"""
+from django.conf import settings
+
+if settings.API_DOCS:
+    from drf_spectacular.utils import (  # noqa: F401
+        OpenApiExample, OpenApiParameter, OpenApiRequest, OpenApiTypes, extend_schema, extend_schema_field,
+    )
+else:
+    class _Placeholder:
+        """Acepta cualquier argumento/atributo (OpenApiParameter(...), OpenApiTypes.STR...) y no hace nada."""
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __getattr__(self, name):
+            return self
+
+    OpenApiExample = OpenApiParameter = OpenApiRequest = _Placeholder
+    OpenApiTypes = _Placeholder()
+    OpenApiParameter.HEADER = OpenApiParameter.QUERY = OpenApiParameter.PATH = None
+
+    def extend_schema(*args, **kwargs):
+        return lambda target: target
+
+    extend_schema_field = extend_schema
@@ -0,0 +1,301 @@
+# core/follow_graph.py
+"""
+Grafo de seguimiento en memoria para educator/suggestions.
+
+Subscription se carga en dos estructuras CSR (offsets + destinos en
+array('q'), 8 bytes por arista): "a quién sigue" y "quién lo sigue". Los
+cambios llegan como delta sobre esa base:
+
+- los follow/unfollow de este proceso, por señales (on_commit);
+- los follow de otros procesos, leyendo Subscription con id > último visto
+  cada POLL_SECONDS (una consulta por rango de PK).
+
+Los unfollow de otros procesos se ven en la reconstrucción completa, cada
+REFRESH_SECONDS o cuando el delta supera MAX_DELTA aristas. La reconstrucción
+corre en un hilo aparte: mientras tanto se sigue respondiendo con el grafo
+anterior y, antes de la primera, con suggestions_db (consultas a Subscription).
+"""
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count
+
+from .metrics import registry
+from .models import Subscription
+
+GRAPH_BUILD_SECONDS = registry.histogram(
+    "follow_graph_build_seconds", "Tiempo de reconstrucción completa del grafo de seguimiento.")
+
+
+class CSR:
+    """Adyacencia compacta: vecinos de n = targets[offsets[i]:offsets[i + 1]] con i = index[n], ordenados."""
+    def __init__(self, pairs_by_source):
+        # pairs_by_source: iterable de (origen, destino) ordenado por origen y destino
+        self.index = {}
+        self.offsets = array("q", [0])
+        self.targets = array("q")
+        for source, target in pairs_by_source:
+            if source not in self.index:
+                if self.index:
+                    self.offsets.append(len(self.targets))
+                self.index[source] = len(self.index)
+            self.targets.append(target)
+        if self.index:
+            self.offsets.append(len(self.targets))
+
+    def __len__(self):
+        return len(self.targets)
+
+    def bounds(self, node):
+        i = self.index.get(node)
+        if i is None:
+            return 0, 0
+        return self.offsets[i], self.offsets[i + 1]
+
+    def neighbors(self, node):
+        lo, hi = self.bounds(node)
+        return self.targets[lo:hi]
+
+    def degree(self, node):
+        lo, hi = self.bounds(node)
+        return hi - lo
+
+    def has(self, source, target):
+        lo, hi = self.bounds(source)
+        i = bisect_left(self.targets, target, lo, hi)
+        return i < hi and self.targets[i] == target
+
+    def transposed(self):
+        # Counting sort de las aristas por destino (sin volver a consultar la DB); como los
+        # orígenes se recorren en orden, cada lista de la transpuesta queda ordenada
+        counts = defaultdict(int)
+        for target in self.targets:
+            counts[target] += 1
+        result = CSR(())
+        result.index = {node: i for i, node in enumerate(sorted(counts))}
+        result.offsets = array("q", [0] * (len(result.index) + 1))
+        for node, i in result.index.items():
+            result.offsets[i + 1] = result.offsets[i] + counts[node]
+        result.targets = array("q", bytes(8 * len(self.targets)))
+        cursor = array("q", result.offsets[:-1])
+        for source, i in self.index.items():
+            for target in self.targets[self.offsets[i]:self.offsets[i + 1]]:
+                j = result.index[target]
+                result.targets[cursor[j]] = source
+                cursor[j] += 1
+        return result
+
+
+class FollowGraph:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._following = None  # CSR subscriber -> subscribed
+        self._followers = None  # CSR subscribed -> subscriber
+        self._popular = []      # ids por cantidad de seguidores (relleno sin señal)
+        self._max_id = 0
+        self._built_at = 0.0
+        self._polled_at = 0.0
+        self._reset_delta()
+
+    def _reset_delta(self):
+        self._added_out = defaultdict(set)
+        self._added_in = defaultdict(set)
+        self._removed = set()
+
+    # ---- construcción y refresco ----
+
+    def rebuild(self):
+        started = time.perf_counter()
+        max_id = Subscription.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        pairs = (
+            Subscription.objects.filter(id__lte=max_id)
+            .order_by("subscriber_id", "subscribed_id")
+            .values_list("subscriber_id", "subscribed_id")
+            .iterator(chunk_size=10000)
+        )
+        following = CSR(pairs)
+        followers = following.transposed()
+        popular = [node for node, _ in heapq.nlargest(
+            settings.FOLLOW_SUGGESTIONS["MAX_LIMIT"], ((n, followers.degree(n)) for n in followers.index), key=lambda x: x[1],
+        )]
+        with self._lock:
+            self._following, self._followers, self._popular = following, followers, popular
+            self._max_id = max_id
+            self._built_at = self._polled_at = time.monotonic()
+            self._reset_delta()
+        GRAPH_BUILD_SECONDS.observe(time.perf_counter() - started)
+
+    def _poll(self):
+        rows = list(
+            Subscription.objects.filter(id__gt=self._max_id).order_by("id")
+            .values_list("id", "subscriber_id", "subscribed_id")[: settings.FOLLOW_SUGGESTIONS["MAX_DELTA"]]
+        )
+        with self._lock:
+            for sub_id, source, target in rows:
+                self._add(source, target)
+                self._max_id = max(self._max_id, sub_id)
+            self._polled_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self._build_lock.release()
+            connections.close_all()  # solo las conexiones de este hilo
+
+    def start_rebuild(self):
+        """Lanza la reconstrucción en otro hilo salvo que ya haya una en curso."""
+        if self._build_lock.acquire(blocking=False):
+            try:
+                threading.Thread(target=self._rebuild_in_background, name="follow-graph", daemon=True).start()
+            except BaseException:
+                self._build_lock.release()
+                raise
+
+    @property
+    def ready(self):
+        return self._following is not None
+
+    def refresh(self):
+        conf = settings.FOLLOW_SUGGESTIONS
+        now = time.monotonic()
+        if not self.ready:
+            self.start_rebuild()
+            return
+        if now - self._built_at > conf["REFRESH_SECONDS"] or self.delta_size() > conf["MAX_DELTA"]:
+            self.start_rebuild()
+        if now - self._polled_at > conf["POLL_SECONDS"]:
+            self._poll()
+
+    def delta_size(self):
+        return sum(map(len, self._added_out.values())) + len(self._removed)
+
+    # ---- cambios (señales de Subscription) ----
+
+    def _add(self, source, target):
+        if (source, target) in self._removed:
+            self._removed.discard((source, target))
+        elif self._following is not None and not self._following.has(source, target):
+            self._added_out[source].add(target)
+            self._added_in[target].add(source)
+
+    def add(self, source, target):
+        with self._lock:
+            self._add(source, target)
+
+    def remove(self, source, target):
+        with self._lock:
+            if target in self._added_out.get(source, ()):
+                self._added_out[source].discard(target)
+                self._added_in[target].discard(source)
+            elif self._following is not None and self._following.has(source, target):
+                self._removed.add((source, target))
+
+    # ---- consultas ----
+
+    def following(self, node):
+        return self._merged(self._following.neighbors(node), self._added_out.get(node), lambda t: (node, t))
+
+    def followers(self, node):
+        return self._merged(self._followers.neighbors(node), self._added_in.get(node), lambda s: (s, node))
+
+    def _merged(self, base, added, edge):
+        if self._removed:
+            base = [n for n in base if edge(n) not in self._removed]
+        if added:
+            return list(base) + list(added)
+        return base
+
+    def suggestions(self, educator_id, k):
+        """
+        Top-k (id, score, mutuals) para `educator_id`, excluyendo a quien ya sigue y a sí mismo.
+        score = FOF_WEIGHT * seguidos que lo siguen + AUDIENCE_WEIGHT * seguidores míos que lo siguen.
+        """
+        conf = settings.FOLLOW_SUGGESTIONS
+        self.refresh()
+        if not self.ready:
+            return suggestions_db(educator_id, k)
+        max_degree = conf["MAX_DEGREE"]
+        with self._lock:
+            following = self.following(educator_id)
+            exclude = set(following)
+            exclude.add(educator_id)
+            scores = defaultdict(float)
+            mutuals = defaultdict(int)
+            # Amigos de amigos; los vecinos con más de MAX_DEGREE aristas se recortan para acotar la latencia
+            for friend in following[:max_degree]:
+                for candidate in self.following(friend)[:max_degree]:
+                    if candidate not in exclude:
+                        scores[candidate] += conf["FOF_WEIGHT"]
+                        mutuals[candidate] += 1
+            # Audiencia compartida: a quién más siguen mis seguidores
+            for follower in self.followers(educator_id)[:max_degree]:
+                for candidate in self.following(follower)[:max_degree]:
+                    if candidate not in exclude:
+                        scores[candidate] += conf["AUDIENCE_WEIGHT"]
+            top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+            result = [(node, score, mutuals[node]) for node, score in top]
+            # Sin señal suficiente (usuario nuevo): completar con los más seguidos
+            if len(result) < k:
+                for node in self._popular:
+                    if node not in exclude and node not in scores:
+                        result.append((node, 0.0, 0))
+                        if len(result) >= k:
+                            break
+        return result
+
+
+def suggestions_db(educator_id, k):
+    """
+    Mismo ranking que FollowGraph.suggestions con consultas a Subscription
+    (sin el recorte por MAX_DEGREE); se usa hasta que el grafo está construido.
+    """
+    conf = settings.FOLLOW_SUGGESTIONS
+    following = Subscription.objects.filter(subscriber_id=educator_id).values("subscribed_id")
+    followers = Subscription.objects.filter(subscribed_id=educator_id).values("subscriber_id")
+
+    def candidates(sources):
+        return dict(
+            Subscription.objects.filter(subscriber_id__in=sources)
+            .exclude(subscribed_id__in=following).exclude(subscribed_id=educator_id)
+            .values("subscribed_id").annotate(n=Count("id")).values_list("subscribed_id", "n")
+        )
+
+    mutuals = candidates(following)
+    scores = defaultdict(float)
+    for node, n in mutuals.items():
+        scores[node] += conf["FOF_WEIGHT"] * n
+    for node, n in candidates(followers).items():
+        scores[node] += conf["AUDIENCE_WEIGHT"] * n
+    top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+    result = [(node, score, mutuals.get(node, 0)) for node, score in top]
+    if len(result) < k:
+        exclude = set(following.values_list("subscribed_id", flat=True)) | {educator_id} | set(scores)
+        popular = (
+            Subscription.objects.values("subscribed_id").annotate(n=Count("id"))
+            .order_by("-n", "subscribed_id").values_list("subscribed_id", flat=True)[: conf["MAX_LIMIT"]]
+        )
+        for node in popular:
+            if node not in exclude:
+                result.append((node, 0.0, 0))
+                if len(result) >= k:
+                    break
+    return result
+
+
+follow_graph = FollowGraph()
+
+
+def on_follow(source, target):
+    transaction.on_commit(lambda: follow_graph.add(source, target))
+
+
+def on_unfollow(source, target):
+    transaction.on_commit(lambda: follow_graph.remove(source, target))
@@ -0,0 +1,142 @@
+# core/idempotency.py
+"""
+Soporte de `Idempotency-Key` para los POST que crean recursos.
+
+El primer request con una key inserta una fila "en curso" (el UNIQUE de
+key_hash hace de lock entre workers), ejecuta el handler y guarda status y
+cuerpo. Los reintentos con la misma key reciben la respuesta guardada sin
+volver a ejecutar el handler; si el original sigue en curso reciben 409.
+Las respuestas 5xx y las excepciones liberan la key para poder reintentar.
+
+Los campos de SECRET_FIELDS no entran en la huella del payload ni en la
+respuesta guardada; un endpoint que devuelve tokens (signup) pasa `reissue`,
+que en cada replay verifica al cliente y emite tokens nuevos. Los hashes son
+HMAC con SECRET_KEY.
+"""
+import functools
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+from .renderers import dumps
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Nunca entran en la huella del payload ni en la respuesta guardada
+SECRET_FIELDS = {"password", "new_password", "old_password", "access_token", "refresh_token", "token"}
+
+
+def _hmac(value: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+
+
+def _key_hash(request, client_key):
+    user = getattr(request, "user", None)
+    owner = user.id if getattr(user, "is_authenticated", False) and getattr(user, "id", None) else "anon"
+    return _hmac(f"{owner}:{request.method}:{request.path}:{client_key}")
+
+
+def _request_hash(request):
+    """Huella del payload; de los archivos solo nombre y tamaño (no se leen)."""
+    data = request.data
+    fields = {k: data.getlist(k) for k in data} if hasattr(data, "getlist") else data
+    if isinstance(fields, dict):
+        fields = {k: v for k, v in fields.items() if k not in SECRET_FIELDS}
+    files = sorted((k, f.name, f.size) for k, fs in request.FILES.lists() for f in fs)
+    payload = json.dumps([fields, files], sort_keys=True, default=str)
+    return _hmac(payload)
+
+
+def _stored_body(response):
+    data = getattr(response, "data", None)
+    if data is None:
+        return None
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in SECRET_FIELDS}
+    return dumps(data)
+
+
+def _replay(entry, request, reissue):
+    data = json.loads(entry.response_body) if entry.response_body else None
+    if reissue is not None and 200 <= entry.status_code < 300:
+        fresh = reissue(request, data)
+        if isinstance(fresh, Response):
+            return fresh
+        data = {**data, **fresh}
+    return Response(data, status=entry.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def _claim(key_hash, request_hash):
+    """Crea la fila en curso; None si ya existía (otro request tiene o tuvo la key)."""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(key_hash=key_hash, request_hash=request_hash)
+    except IntegrityError:
+        return None
+
+
+def _expired(entry):
+    conf = settings.IDEMPOTENCY
+    now = timezone.now()
+    if entry.status_code is None:
+        return entry.created_at < now - timedelta(seconds=conf["LOCK_TIMEOUT"])
+    return entry.created_at < now - timedelta(hours=conf["TTL_HOURS"])
+
+
+def idempotent(handler=None, *, reissue=None):
+    """
+    Decorador para métodos post() de APIView: @idempotent o @idempotent(reissue=f).
+    f(request, data_guardada) devuelve los campos secretos nuevos (dict) o un
+    Response que corta el replay (p. ej. credenciales que no coinciden).
+    """
+    if handler is None:
+        return functools.partial(idempotent, reissue=reissue)
+
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if not client_key:
+            return handler(self, request, *args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return Response({"detail": f"{HEADER} demasiado larga (máx. {MAX_KEY_LENGTH})."}, status=400)
+
+        key_hash = _key_hash(request, client_key)
+        request_hash = _request_hash(request)
+        entry = _claim(key_hash, request_hash)
+        if entry is None:
+            existing = IdempotencyKey.objects.filter(key_hash=key_hash).first()
+            if existing is None or _expired(existing):
+                # Liberada entre medio, vencida o en curso abandonada (worker caído): se reintenta una vez
+                if existing is not None:
+                    IdempotencyKey.objects.filter(id=existing.id).delete()
+                entry = _claim(key_hash, request_hash)
+                existing = None if entry else IdempotencyKey.objects.filter(key_hash=key_hash).first()
+            if entry is None:
+                if existing is None or existing.status_code is None:
+                    return Response(
+                        {"detail": "Hay un request en curso con esta Idempotency-Key."},
+                        status=409, headers={"Retry-After": "1"},
+                    )
+                if existing.request_hash != request_hash:
+                    return Response({"detail": f"{HEADER} reutilizada con otro payload."}, status=422)
+                return _replay(existing, request, reissue)
+
+        try:
+            response = handler(self, request, *args, **kwargs)
+        except BaseException:
+            entry.delete()
+            raise
+        if response.status_code >= 500:
+            entry.delete()
+            return response
+        body = _stored_body(response)
+        IdempotencyKey.objects.filter(id=entry.id).update(status_code=response.status_code, response_body=body)
+        return response
+    return wrapper
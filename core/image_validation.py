@@ -0,0 +1,97 @@
+# core/image_validation.py
+"""
+Validación barata de imágenes subidas.
+
+En vez de decodificar y verificar la imagen completa (ImageField de DRF),
+se identifica el formato por los bytes de cabecera y se leen las dimensiones
+con la apertura lazy de Pillow, que solo parsea el header. Los límites de
+IMAGE_UPLOAD (bytes, píxeles y formatos) se aplican antes de guardar nada.
+"""
+import os
+from typing import NamedTuple
+
+from django.conf import settings
+from PIL import Image as PILImage
+
+HEADER_SIZE = 16
+
+# (formato Pillow, prefijo, offset) — WEBP es RIFF....WEBP
+_SIGNATURES = (
+    ("JPEG", b"\xff\xd8\xff", 0),
+    ("PNG", b"\x89PNG\r\n\x1a\n", 0),
+    ("GIF", b"GIF87a", 0),
+    ("GIF", b"GIF89a", 0),
+    ("WEBP", b"WEBP", 8),
+    ("BMP", b"BM", 0),
+    ("TIFF", b"II*\x00", 0),
+    ("TIFF", b"MM\x00*", 0),
+)
+
+
+class ImageValidationError(ValueError):
+    pass
+
+
+class ImageInfo(NamedTuple):
+    format: str
+    width: int
+    height: int
+
+
+def sniff_format(header: bytes):
+    for fmt, magic, offset in _SIGNATURES:
+        if header[offset:offset + len(magic)] == magic:
+            if fmt == "WEBP" and not header.startswith(b"RIFF"):
+                continue
+            return fmt
+    return None
+
+
+def _file_size(fileobj):
+    size = getattr(fileobj, "size", None)
+    if size is not None:
+        return size
+    pos = fileobj.tell()
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(pos)
+    return size
+
+
+def inspect_image(fileobj) -> ImageInfo:
+    """
+    Valida un archivo abierto (UploadedFile o file object binario) contra
+    IMAGE_UPLOAD sin decodificar los píxeles. Deja el puntero al inicio.
+    """
+    limits = settings.IMAGE_UPLOAD
+    size = _file_size(fileobj)
+    if size > limits["MAX_BYTES"]:
+        raise ImageValidationError(f"La imagen supera el máximo de {limits['MAX_BYTES']} bytes")
+
+    fileobj.seek(0)
+    fmt = sniff_format(fileobj.read(HEADER_SIZE))
+    fileobj.seek(0)
+    if fmt is None:
+        raise ImageValidationError("El archivo no es una imagen válida")
+    if fmt not in limits["ALLOWED_FORMATS"]:
+        raise ImageValidationError(f"Formato {fmt} no permitido")
+
+    try:
+        # open() es lazy: solo parsea la cabecera; formats evita probar otros plugins
+        with PILImage.open(fileobj, formats=[fmt]) as img:
+            width, height = img.size
+    except PILImage.DecompressionBombError:
+        raise ImageValidationError("La imagen supera el máximo de píxeles")
+    except Exception:
+        raise ImageValidationError("El archivo no es una imagen válida")
+    finally:
+        fileobj.seek(0)
+
+    if width * height > limits["MAX_PIXELS"]:
+        raise ImageValidationError(f"La imagen supera el máximo de {limits['MAX_PIXELS']} píxeles")
+    return ImageInfo(fmt, width, height)
+
+
+def inspect_image_path(path) -> ImageInfo:
+    with open(path, "rb") as fh:
+        return inspect_image(fh)
@@ -3,7 +3,12 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import RefreshToken, User
+from .metrics import record_cache
+from collections import OrderedDict
+import hashlib
 import secrets
+import threading
+import time
 
 def _now():
     return timezone.now()
@@ -20,25 +25,127 @@ def generate_access_token(user: User):
     token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
     return token
 
+def hash_refresh(token: str) -> str:
+    # Tokens de 512 bits aleatorios: un sha256 sin sal basta para el lookup
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def generate_and_store_refresh(user: User):
     exp = _now() + settings.JWT_CONFIG["REFRESH_LIFETIME"]
     token = secrets.token_urlsafe(64)
-    RefreshToken.objects.update_or_create(
-        user=user, defaults={"token": token, "expiry_date": exp}
-    )
+    RefreshToken.objects.create(user=user, token_hash=hash_refresh(token), expiry_date=exp)
+    max_sessions = settings.JWT_CONFIG["REFRESH_MAX_SESSIONS"]
+    if max_sessions:
+        # Solo se conservan las N sesiones más recientes del usuario
+        stale = RefreshToken.objects.filter(user=user).order_by("-created_at", "-id").values_list("id", flat=True)[max_sessions:]
+        RefreshToken.objects.filter(id__in=list(stale)).delete()
     return token, exp
 
+def rotate_refresh(token: str):
+    """
+    Consume el refresh token y emite uno nuevo para la misma sesión.
+    Devuelve (user, nuevo_token, expiración); ValueError si es inválido o expiró.
+    """
+    ref = RefreshToken.objects.select_related("user").filter(token_hash=hash_refresh(token)).first()
+    if not ref:
+        raise ValueError("Refresh token inválido")
+    # El delete condicional evita que dos refresh concurrentes con el mismo token ganen ambos
+    deleted, _ = RefreshToken.objects.filter(id=ref.id).delete()
+    if not deleted:
+        raise ValueError("Refresh token inválido")
+    if ref.expiry_date < _now():
+        raise ValueError("Refresh token expirado")
+    exp = _now() + settings.JWT_CONFIG["REFRESH_LIFETIME"]
+    new_token = secrets.token_urlsafe(64)
+    RefreshToken.objects.create(user=ref.user, token_hash=hash_refresh(new_token), expiry_date=exp)
+    return ref.user, new_token, exp
+
+def revoke_refresh(token: str):
+    """Borra la sesión; devuelve el user_id dueño del token o None si no existía."""
+    ref = RefreshToken.objects.filter(token_hash=hash_refresh(token)).only("id", "user_id").first()
+    if not ref:
+        return None
+    ref.delete()
+    return ref.user_id
+
+class VerifiedTokenCache:
+    """
+    LRU por proceso: digest del token -> claims ya verificados, válido hasta `exp`.
+    Evita repetir la verificación HS256 + parseo en cada request del mismo cliente.
+    Revocar solo saca las entradas de este proceso: el token se vuelve a verificar
+    completo en el próximo request y, como en cualquier otro worker, vale hasta su
+    `exp` (el access token no tiene estado; logout invalida el refresh token).
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # digest -> claims
+        self._by_user = {}             # sub -> {digest}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    def get(self, digest):
+        with self._lock:
+            claims = self._entries.get(digest)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                self._discard(digest)
+                return None
+            self._entries.move_to_end(digest)
+            return claims
+
+    def put(self, digest, claims):
+        if not self.maxsize or "exp" not in claims:
+            return
+        with self._lock:
+            self._entries[digest] = claims
+            self._entries.move_to_end(digest)
+            self._by_user.setdefault(claims.get("sub"), set()).add(digest)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def revoke_token(self, token: str):
+        with self._lock:
+            self._discard(self.digest(token))
+
+    def revoke_user(self, user_id):
+        with self._lock:
+            for digest in self._by_user.pop(user_id, ()):
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _discard(self, digest):
+        claims = self._entries.pop(digest, None)
+        if claims is not None:
+            digests = self._by_user.get(claims.get("sub"))
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_user[claims.get("sub")]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+verified_tokens = VerifiedTokenCache(settings.JWT_CONFIG["VERIFIED_CACHE_SIZE"])
+
 def decode_any_token(token: str):
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    if not verified_tokens.maxsize:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    digest = verified_tokens.digest(token)
+    claims = verified_tokens.get(digest)
+    record_cache("jwt", claims is not None)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        verified_tokens.put(digest, claims)
+    return dict(claims)  # copia: los claims cacheados no deben mutarse
 
 def invalidate_refresh(user: User):
     RefreshToken.objects.filter(user=user).delete()
-
-def new_access_from_access(user: User) -> str:
-    # Según tu regla: refresh recibe access_token y devuelve uno nuevo
-    # (no estándar, pero lo permitimos usando el refresh guardado en DB)
-    # Verificamos que tenga refresh válido:
-    rt = RefreshToken.objects.filter(user=user, expiry_date__gt=_now()).first()
-    if not rt:
-        raise ValueError("No hay refresh válido")
-    return generate_access_token(user)
+    verified_tokens.revoke_user(user.id)
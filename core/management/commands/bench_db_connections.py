@@ -0,0 +1,50 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la latencia por request de: conexión nueva por request (CONN_MAX_AGE=0), "
+        "conexión persistente (CONN_MAX_AGE) y pool (core.db_pool, solo PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **opts):
+        base = connections[opts["database"]]
+        wrappers = [
+            ("nueva por request", base.__class__, {"CONN_MAX_AGE": 0}),
+            ("persistente", base.__class__, {"CONN_MAX_AGE": 600}),
+        ]
+        if base.vendor == "postgresql":
+            from core.db_pool.base import DatabaseWrapper as PooledWrapper
+            wrappers.append(("pool", PooledWrapper, {"CONN_MAX_AGE": 0}))
+        else:
+            self.stdout.write(f"Pool omitido: requiere PostgreSQL (vendor={base.vendor}).")
+
+        self.stdout.write(f"{'modo':<20}{'media ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for label, wrapper_class, overrides in wrappers:
+            conn = wrapper_class({**base.settings_dict, **overrides}, alias=f"bench_{label.replace(' ', '_')}")
+            timings = []
+            try:
+                for _ in range(opts["requests"]):
+                    start = time.perf_counter()
+                    # Mismo ciclo que request_started / request_finished
+                    conn.close_if_unusable_or_obsolete()
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                        cursor.fetchone()
+                    conn.close_if_unusable_or_obsolete()
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                conn.close()
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f"{label:<20}{statistics.mean(timings):>10.3f}{statistics.median(timings):>10.3f}{p99:>10.3f}"
+            )
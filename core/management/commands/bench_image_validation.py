@@ -0,0 +1,37 @@
+import io
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from PIL import Image as PILImage
+from rest_framework import serializers
+
+from core.image_validation import inspect_image
+
+
+class Command(BaseCommand):
+    help = "Compara serializers.ImageField (verify completo) con core.image_validation.inspect_image."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--width", type=int, default=4000)
+        parser.add_argument("--height", type=int, default=3000)
+        parser.add_argument("--rounds", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        size = (opts["width"], opts["height"])
+        samples = []
+        for fmt, name in (("JPEG", "foto.jpg"), ("PNG", "foto.png")):
+            buf = io.BytesIO()
+            PILImage.effect_noise(size, 64).convert("RGB").save(buf, fmt)
+            samples.append((name, buf.getvalue()))
+
+        drf_field = serializers.ImageField()
+        self.stdout.write(f"{'archivo':<12}{'bytes':>12}{'ImageField ms':>16}{'inspect ms':>14}")
+        for name, data in samples:
+            timings = []
+            for fn in (drf_field.run_validation, inspect_image):
+                start = time.perf_counter()
+                for _ in range(opts["rounds"]):
+                    fn(SimpleUploadedFile(name, data))
+                timings.append((time.perf_counter() - start) * 1000 / opts["rounds"])
+            self.stdout.write(f"{name:<12}{len(data):>12}{timings[0]:>16.3f}{timings[1]:>14.3f}")
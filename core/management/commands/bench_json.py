@@ -0,0 +1,51 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Educator, Publication, PublicationType, User
+from core.renderers import FastJSONRenderer, FastJSONParser, orjson
+from core.serializers import PublicationSerializer
+
+
+class Command(BaseCommand):
+    help = "Compara JSONRenderer/JSONParser de DRF con los de core.renderers sobre el payload de PublicationListView."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Publicaciones por respuesta.")
+        parser.add_argument("--rounds", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        if orjson is None:
+            self.stdout.write("orjson no está instalado: FastJSONRenderer usa la stdlib.")
+        # Payload sintético (sin DB) con la misma forma que PublicationListView
+        now = timezone.now()
+        pubs = []
+        for i in range(opts["limit"]):
+            user = User(id=i, name=f"Educador {i} ñandú", email=f"user{i}@example.com")
+            edu = Educator(id=i, nick_name=f"nick_{i}", user=user)
+            pubs.append(Publication(
+                id=i, title=f"Publicación {i} sobre IA en el aula", created_at=now, updated_at=now,
+                educator=edu, publication_type=PublicationType.ARTICLE,
+                content_url=f"/comunidadia_uploads/publications/{i:032x}.html",
+            ))
+        data = PublicationSerializer(pubs, many=True).data
+
+        stdlib_out = JSONRenderer().render(data)
+        fast_out = FastJSONRenderer().render(data)
+        self.stdout.write(f"payload: {len(stdlib_out)} bytes, salida idéntica: {stdlib_out == fast_out}")
+
+        self.stdout.write(f"{'operación':<28}{'ms/op':>10}")
+        for label, fn in (
+            ("render stdlib (DRF)", lambda: JSONRenderer().render(data)),
+            ("render FastJSONRenderer", lambda: FastJSONRenderer().render(data)),
+            ("parse stdlib (DRF)", lambda: JSONParser().parse(BytesIO(stdlib_out))),
+            ("parse FastJSONParser", lambda: FastJSONParser().parse(BytesIO(stdlib_out))),
+        ):
+            start = time.perf_counter()
+            for _ in range(opts["rounds"]):
+                fn()
+            self.stdout.write(f"{label:<28}{(time.perf_counter() - start) * 1000 / opts['rounds']:>10.3f}")
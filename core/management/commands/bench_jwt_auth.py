@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory
+
+from core.auth import JWTAuthenticationCustom
+from core.jwt_utils import decode_any_token, generate_access_token, verified_tokens
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = "Mide decode_any_token y JWTAuthenticationCustom.authenticate con y sin el cache de tokens verificados."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=20000)
+
+    def handle(self, *args, **opts):
+        rounds = opts["rounds"]
+        user = User.objects.order_by("id").first()
+        token = generate_access_token(user or User(id=1, email="bench@example.com", role="EDUCATOR"))
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        auth = JWTAuthenticationCustom()
+
+        cases = [("decode_any_token", lambda: decode_any_token(token))]
+        if user:
+            cases.append(("authenticate (incluye SELECT user)", lambda: auth.authenticate(request)))
+        else:
+            self.stdout.write("No hay usuarios en la DB: solo se mide decode_any_token.")
+
+        size = verified_tokens.maxsize
+        self.stdout.write(f"{'operación':<38}{'sin cache µs':>14}{'con cache µs':>14}")
+        try:
+            for label, fn in cases:
+                timings = []
+                for maxsize in (0, size or 4096):
+                    verified_tokens.maxsize = maxsize
+                    verified_tokens.clear()
+                    fn()  # calienta
+                    start = time.perf_counter()
+                    for _ in range(rounds):
+                        fn()
+                    timings.append((time.perf_counter() - start) * 1e6 / rounds)
+                self.stdout.write(f"{label:<38}{timings[0]:>14.2f}{timings[1]:>14.2f}")
+        finally:
+            verified_tokens.maxsize = size
+            verified_tokens.clear()
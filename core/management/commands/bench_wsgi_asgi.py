@@ -0,0 +1,81 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from core.jwt_utils import generate_access_token
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Throughput en proceso con concurrencia: WSGI (vistas DRF en hilos) vs ASGI "
+        "(vistas DRF y vistas async de /api/async/). Usa la base de datos configurada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=400)
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--user-id", type=int, help="Usuario para el token (por defecto el primero).")
+        parser.add_argument("--path", default="publication?offset=0&limit=20",
+                            help="Ruta relativa a /api/ (y a /api/async/).")
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(id=opts["user_id"]).first() if opts["user_id"] else User.objects.order_by("id").first()
+        if not user:
+            raise CommandError("Se necesita al menos un usuario.")
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*" and not h.startswith(".")), "localhost")
+        headers = {"host": host, "authorization": f"Bearer {generate_access_token(user)}"}
+        sync_path = f"/api/{opts['path']}"
+        async_path = f"/api/async/{opts['path']}"
+
+        self.stdout.write(f"{opts['requests']} requests, concurrencia {opts['concurrency']}")
+        self.stdout.write(f"{'modo':<28}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        self._report("WSGI + vistas DRF", *self._run_wsgi(sync_path, headers, opts))
+        self._report("ASGI + vistas DRF", *asyncio.run(self._run_asgi(sync_path, headers, opts)))
+        self._report("ASGI + vistas async", *asyncio.run(self._run_asgi(async_path, headers, opts)))
+
+    def _run_wsgi(self, path, headers, opts):
+        client = Client(headers=headers)
+
+        def one(_):
+            start = time.perf_counter()
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"{path} -> {response.status_code}")
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=opts["concurrency"]) as pool:
+            timings = list(pool.map(one, range(opts["requests"])))
+        return time.perf_counter() - start, timings
+
+    async def _run_asgi(self, path, headers, opts):
+        # En ASGI el host sale de scope["server"], no del header
+        client = AsyncClient(server=(headers["host"], "80"))
+        headers = {k: v for k, v in headers.items() if k != "host"}
+        semaphore = asyncio.Semaphore(opts["concurrency"])
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                if response.status_code != 200:
+                    raise CommandError(f"{path} -> {response.status_code}")
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(one() for _ in range(opts["requests"])))
+        return time.perf_counter() - start, list(timings)
+
+    def _report(self, label, elapsed, timings):
+        timings = sorted(timings)
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f"{label:<28}{len(timings) / elapsed:>10.1f}"
+            f"{statistics.median(timings) * 1000:>10.2f}{p99 * 1000:>10.2f}"
+        )
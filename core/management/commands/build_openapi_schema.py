@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.openapi import code_version, generate_schema, read_schema, write_schema
+
+
+class Command(BaseCommand):
+    help = "Genera el schema OpenAPI y lo guarda en OPENAPI_SCHEMA['PATH'] con la versión del código."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerar aunque la versión coincida.")
+
+    def handle(self, *args, **opts):
+        version = code_version()
+        path = settings.OPENAPI_SCHEMA["PATH"]
+        if not opts["force"] and read_schema(version) is not None:
+            self.stdout.write(f"{path} ya está en la versión {version}")
+            return
+        start = time.perf_counter()
+        schema = generate_schema()
+        write_schema(schema, version)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(f"Schema {version} ({len(schema.get('paths', {}))} paths) -> {path} en {elapsed:.0f} ms")
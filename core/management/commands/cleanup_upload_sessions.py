@@ -0,0 +1,43 @@
+import os
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Borra sesiones de subida abandonadas (más viejas que UPLOAD_SESSIONS['TTL_HOURS']) y sus .part."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **opts):
+        ttl = timedelta(hours=settings.UPLOAD_SESSIONS["TTL_HOURS"])
+        cutoff = timezone.now() - ttl
+        deleted = 0
+        while True:
+            ids = list(
+                UploadSession.objects.filter(updated_at__lt=cutoff)
+                .values_list("id", flat=True)[: opts["batch_size"]]
+            )
+            if not ids:
+                break
+            # delete() dispara post_delete -> borra cada .part
+            deleted += UploadSession.objects.filter(id__in=ids).delete()[0]
+
+        # .part sin sesión (p. ej. borrada sin pasar por el ORM)
+        strays = 0
+        folder = settings.UPLOAD_SESSIONS["TEMP_DIR"]
+        if os.path.isdir(folder):
+            limit = time.time() - ttl.total_seconds()
+            for entry in os.scandir(folder):
+                if not entry.name.endswith(".part") or entry.stat().st_mtime >= limit:
+                    continue
+                if not UploadSession.objects.filter(id=entry.name[:-5]).exists():
+                    os.unlink(entry.path)
+                    strays += 1
+        self.stdout.write(f"Sesiones borradas: {deleted}, .part huérfanos: {strays}")
@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import Publication
+from core.storage import delete_publication_html, get_publication_html, save_publication_html
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve el HTML de las publicaciones entre archivos (content_url) y la columna content. "
+        "Cada fila se actualiza con un UPDATE condicional (id, version, updated_at, content_url): si alguien "
+        "la edita a mitad de la migración se salta y se reintenta en la próxima corrida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--to", choices=("db", "file"), required=True)
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa en segundos entre lotes.")
+        parser.add_argument("--keep-files", action="store_true", help="No borrar los archivos al pasar a db.")
+
+    def handle(self, *args, **opts):
+        to_db = opts["to"] == "db"
+        if to_db:
+            pending = Publication.objects.exclude(content_url="").only("id", "version", "updated_at", "content_url")
+        else:
+            pending = Publication.objects.filter(content_url="").only("id", "version", "updated_at", "content_url", "content")
+        pending = pending.order_by("id")
+        moved = skipped = failed = 0
+        last_id = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[: opts["batch_size"]])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for pub in batch:
+                result = self.to_db(pub, opts["keep_files"]) if to_db else self.to_file(pub)
+                if result is None:
+                    failed += 1
+                elif result:
+                    moved += 1
+                else:
+                    skipped += 1
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+        self.stdout.write(f"Publicaciones movidas a {opts['to']}: {moved}, editadas durante la migración: {skipped}, con error: {failed}")
+
+    def to_db(self, pub, keep_files):
+        try:
+            html = get_publication_html(pub.content_url)
+        except OSError as e:
+            self.stderr.write(f"publicación {pub.id}: no se pudo leer {pub.content_url}: {e}")
+            return None
+        updated = Publication.objects.filter(id=pub.id, version=pub.version, updated_at=pub.updated_at, content_url=pub.content_url).update(
+            content=html, content_url="",
+        )
+        if updated and not keep_files:
+            delete_publication_html(pub.content_url)
+        return bool(updated)
+
+    def to_file(self, pub):
+        try:
+            content_url = save_publication_html(pub.content or "")
+        except OSError as e:
+            self.stderr.write(f"publicación {pub.id}: no se pudo escribir: {e}")
+            return None
+        updated = Publication.objects.filter(id=pub.id, version=pub.version, updated_at=pub.updated_at, content_url="").update(
+            content=None, content_url=content_url,
+        )
+        if not updated:
+            delete_publication_html(content_url)  # la fila cambió: el archivo nuevo queda sin uso
+        return bool(updated)
@@ -0,0 +1,32 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = "Borra Idempotency-Keys más viejas que IDEMPOTENCY['TTL_HOURS'] en lotes cortos; pensado para cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa en segundos entre lotes.")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(hours=settings.IDEMPOTENCY["TTL_HOURS"])
+        deleted = 0
+        while True:
+            ids = list(
+                IdempotencyKey.objects.filter(created_at__lt=cutoff)
+                .order_by("created_at")
+                .values_list("id", flat=True)[: opts["batch_size"]]
+            )
+            if not ids:
+                break
+            deleted += IdempotencyKey.objects.filter(id__in=ids).delete()[0]
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+        self.stdout.write(f"Idempotency-Keys vencidas borradas: {deleted}")
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import RefreshToken
+
+
+class Command(BaseCommand):
+    help = "Borra refresh tokens expirados en lotes cortos (cada DELETE toma pocos locks); pensado para cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0, help="Pausa en segundos entre lotes.")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now()
+        deleted = 0
+        while True:
+            # Recorre el índice de expiry_date; un lote por transacción (autocommit)
+            ids = list(
+                RefreshToken.objects.filter(expiry_date__lt=cutoff)
+                .order_by("expiry_date")
+                .values_list("id", flat=True)[: opts["batch_size"]]
+            )
+            if not ids:
+                break
+            deleted += RefreshToken.objects.filter(id__in=ids).delete()[0]
+            if opts["sleep"]:
+                time.sleep(opts["sleep"])
+        self.stdout.write(f"Refresh tokens expirados borrados: {deleted}")
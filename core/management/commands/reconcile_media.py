@@ -0,0 +1,135 @@
+import os
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.models import Image, Publication
+from core.storage import publication_path
+
+
+def scan_files(folder):
+    """Recorre `folder` con os.scandir (generador, sin listar el árbol completo en memoria)."""
+    stack = [folder]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara MEDIA_ROOT/publications y MEDIA_ROOT/images con la DB. Reporta archivos huérfanos "
+        "(sin fila que los referencie) y referencias colgantes (filas cuyo archivo no existe). "
+        "Con --delete borra los huérfanos y las filas Image colgantes; las Publication colgantes solo se reportan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--min-age", type=int, default=60,
+            help="Minutos: archivos más nuevos se ignoran (escrituras en curso, renombres de Image.save).",
+        )
+
+    def handle(self, *args, **opts):
+        self.verbosity = opts["verbosity"]
+        self.delete = opts["delete"]
+        self.batch_size = opts["batch_size"]
+        self.cutoff = time.time() - opts["min_age"] * 60
+        media_root = settings.MEDIA_ROOT
+
+        # Archivo -> referencia tal como se guarda en la DB
+        pub_files, pub_orphans, pub_bytes = self.reconcile_folder(
+            os.path.join(media_root, "publications"),
+            lambda rel: f"{settings.MEDIA_URL}{rel}",
+            lambda refs: Publication.objects.filter(content_url__in=refs).values_list("content_url", flat=True),
+        )
+        img_files, img_orphans, img_bytes = self.reconcile_folder(
+            os.path.join(media_root, "images"),
+            lambda rel: rel,
+            lambda refs: Image.objects.filter(file__in=refs).values_list("file", flat=True),
+        )
+
+        # Filas recién creadas pueden estar aún escribiendo/renombrando su archivo
+        created_before = datetime.fromtimestamp(self.cutoff, tz=dt_timezone.utc)
+        pub_dangling = self.dangling(
+            Publication.objects.filter(created_at__lt=created_before).exclude(content_url="")  # content_url vacío = HTML en DB
+            .order_by("id").values_list("id", "content_url"),
+            publication_path, delete_model=None,
+        )
+        img_dangling = self.dangling(
+            Image.objects.filter(created_at__lt=created_before).order_by("id").values_list("id", "file"),
+            lambda name: os.path.join(media_root, name), delete_model=Image,
+        )
+
+        verb = "borrados" if self.delete else "encontrados"
+        self.stdout.write(
+            f"publications: {pub_files} archivos, {pub_orphans} huérfanos {verb} ({pub_bytes} bytes), "
+            f"{pub_dangling} publicaciones sin archivo"
+        )
+        self.stdout.write(
+            f"images: {img_files} archivos, {img_orphans} huérfanos {verb} ({img_bytes} bytes), "
+            f"{img_dangling} imágenes sin archivo{' borradas' if self.delete else ''}"
+        )
+
+    def reconcile_folder(self, folder, to_ref, lookup):
+        media_root = settings.MEDIA_ROOT
+        total = orphans = orphan_bytes = 0
+        for batch in batched(scan_files(folder), self.batch_size):
+            total += len(batch)
+            candidates = {}
+            for entry in batch:
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime >= self.cutoff:
+                    continue
+                rel = os.path.relpath(entry.path, media_root).replace(os.sep, "/")
+                candidates[to_ref(rel)] = (entry.path, stat.st_size)
+            if not candidates:
+                continue
+            # Una consulta por lote: set de referencias existentes
+            referenced = set(lookup(list(candidates)))
+            for ref, (path, size) in candidates.items():
+                if ref in referenced:
+                    continue
+                orphans += 1
+                orphan_bytes += size
+                if self.verbosity > 1:
+                    self.stdout.write(f"huérfano: {path}")
+                if self.delete:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+        return total, orphans, orphan_bytes
+
+    def dangling(self, rows, to_path, delete_model):
+        count = 0
+        for batch in batched(rows.iterator(chunk_size=self.batch_size), self.batch_size):
+            missing = [pk for pk, ref in batch if not ref or not os.path.exists(to_path(ref))]
+            count += len(missing)
+            if self.verbosity > 1:
+                for pk in missing:
+                    self.stdout.write(f"sin archivo: {rows.model.__name__} {pk}")
+            if self.delete and delete_model is not None and missing:
+                delete_model.objects.filter(id__in=missing).delete()
+        return count
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+# Se ejecuta en un intérprete nuevo: el proceso de manage.py ya tiene todo importado
+PROBE = r"""
+import json, os, time
+t0 = time.perf_counter()
+import django
+from django.conf import settings
+settings.INSTALLED_APPS  # carga settings (.env incluido)
+t_settings = time.perf_counter()
+django.setup()
+t_setup = time.perf_counter()
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+from django.urls import get_resolver
+handler = WSGIHandler()
+get_resolver().url_patterns
+t_urls = time.perf_counter()
+handler(RequestFactory().get(os.environ["STARTUP_PROBE_PATH"]).environ, lambda status, headers: None)
+t_request = time.perf_counter()
+print("STARTUP_PROFILE " + json.dumps({
+    "settings": t_settings - t0, "django.setup()": t_setup - t_settings,
+    "urls + vistas": t_urls - t_setup, "primer request": t_request - t_urls,
+    "total": t_request - t0,
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Arranca un intérprete limpio con -X importtime, mide settings/setup/urls/primer "
+        "request y lista los paquetes con mayor costo de import acumulado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--path", default="/__startup_probe__", help="Path del primer request (404 no toca la DB).")
+
+    def handle(self, *args, **opts):
+        env = {**os.environ, "STARTUP_PROBE_PATH": opts["path"]}
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", PROBE],
+            cwd=os.getcwd(), env=env, capture_output=True, text=True,
+        )
+        phases = None
+        for line in proc.stdout.splitlines():
+            if line.startswith("STARTUP_PROFILE "):
+                phases = json.loads(line[len("STARTUP_PROFILE "):])
+        if phases is None:
+            self.stderr.write(proc.stderr[-2000:])
+            return
+
+        # "import time: self [us] | cumulative | imported package"; solo módulos de primer nivel
+        per_package = defaultdict(int)
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if name.startswith(" ") and not name.startswith("  "):
+                per_package[name.strip().split(".")[0]] += int(cumulative)
+
+        self.stdout.write("Fases (ms):")
+        for label, seconds in phases.items():
+            self.stdout.write(f"  {label:<18}{seconds * 1000:>10.1f}")
+        self.stdout.write(f"\nImports por paquete raíz (ms acumulados, top {opts['top']}):")
+        for name, us in sorted(per_package.items(), key=lambda kv: kv[1], reverse=True)[: opts["top"]]:
+            self.stdout.write(f"  {name:<32}{us / 1000:>10.1f}")
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.trending import update_trending
+
+
+class Command(BaseCommand):
+    help = (
+        "Actualiza el ranking de publication/trending de forma incremental: envejece los scores "
+        "y suma solo los comentarios creados desde la corrida anterior. Pensado para cron."
+    )
+
+    def handle(self, *args, **opts):
+        stats = update_trending()
+        self.stdout.write(
+            f"Comentarios nuevos: {stats['new_comments']}, publicaciones en tendencia: {stats['publications']}, "
+            f"fuera del ranking: {stats['pruned']}"
+        )
@@ -0,0 +1,370 @@
+# core/metrics.py
+"""
+Registro de métricas en proceso con exposición en formato texto de Prometheus.
+
+Con METRICS["MULTIPROCESS_DIR"] cada worker (gunicorn) vuelca su snapshot a
+un archivo propio (metrics_<pid>_<inicio>.json) desde un hilo en segundo plano
+cada FLUSH_INTERVAL y al salir; el request solo actualiza memoria. El
+endpoint suma todos los archivos. Los de workers muertos (pid inexistente o
+reutilizado por un proceso con otro inicio) se pliegan en
+metrics_aggregate.json y se borran, así sus counters no retroceden.
+"""
+import atexit
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _conf(key):
+    return settings.METRICS[key]
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels esperados {self.labelnames}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def snapshot(self):
+        with self.registry.lock:
+            return {json.dumps(k): v for k, v in self._values.items()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, registry, name, documentation, labelnames=(), callback=None):
+        super().__init__(registry, name, documentation, labelnames)
+        # callback() -> {(label values...): valor}, se evalúa al exportar
+        self.callback = callback
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception:
+                values = {}
+            with self.registry.lock:
+                self._values = {tuple(str(v) for v in k): val for k, val in values.items()}
+        return super().snapshot()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self._flusher_pid = None
+        self._started_at = time.time()
+
+    def _register(self, metric):
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Métrica duplicada: {metric.name}")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Gauge(self, name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def snapshot(self):
+        return {
+            name: {
+                "kind": m.kind,
+                "help": m.documentation,
+                "labelnames": list(m.labelnames),
+                "buckets": list(getattr(m, "buckets", ())),
+                "values": m.snapshot(),
+            }
+            for name, m in list(self.metrics.items())
+        }
+
+    # -------- Modo multiproceso (archivo por worker) --------
+    def start_flusher(self):
+        """Arranca (una vez por proceso: los hilos no sobreviven al fork) el volcado periódico."""
+        if self._flusher_pid == os.getpid() or not _conf("MULTIPROCESS_DIR"):
+            return
+        with self.lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._started_at = time.time()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(self.flush)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(_conf("FLUSH_INTERVAL"))
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+    def _filename(self):
+        pid = os.getpid()
+        return f"metrics_{pid}_{_process_start(pid) or int(self._started_at)}.json"
+
+    def flush(self):
+        folder = _conf("MULTIPROCESS_DIR")
+        if not folder:
+            return
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        tmp = folder / f".metrics_{pid}.tmp"
+        tmp.write_text(json.dumps({"pid": pid, "metrics": self.snapshot()}), encoding="utf-8")
+        os.replace(tmp, folder / self._filename())
+
+    def collect(self):
+        folder = _conf("MULTIPROCESS_DIR")
+        if not folder:
+            return self.snapshot()
+        self.start_flusher()
+        self.flush()
+        folder = Path(folder)
+        self._fold_dead_workers(folder)
+        merged = {}
+        for path in [folder / AGGREGATE_FILE, *folder.glob("metrics_*_*.json")]:
+            data = _read_json(path)
+            if data is not None:
+                _merge_into(merged, data["metrics"], with_gauges=True)
+        return merged
+
+    def _fold_dead_workers(self, folder):
+        own = self._filename()
+        with open(folder / ".aggregate.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # otro worker puede estar plegando los mismos archivos
+            dead = [
+                path for path in folder.glob("metrics_*_*.json")
+                if path.name != own and not _worker_alive(path)
+            ]
+            if not dead:
+                return
+            aggregate = (_read_json(folder / AGGREGATE_FILE) or {"metrics": {}})["metrics"]
+            for path in dead:
+                data = _read_json(path)
+                if data is not None:
+                    # Los gauges de workers muertos no se suman (los counters y histogramas sí)
+                    _merge_into(aggregate, data["metrics"], with_gauges=False)
+            tmp = folder / ".metrics_aggregate.tmp"
+            tmp.write_text(json.dumps({"metrics": aggregate}), encoding="utf-8")
+            os.replace(tmp, folder / AGGREGATE_FILE)
+            for path in dead:
+                path.unlink(missing_ok=True)
+
+    def render(self):
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric["labelnames"]
+            for key, value in sorted(metric["values"].items()):
+                labels = list(zip(labelnames, json.loads(key)))
+                if metric["kind"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"], value["buckets"]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', _fmt(bound))])} {cumulative}")
+                    lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_fmt(value['sum'])}")
+                    lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+AGGREGATE_FILE = "metrics_aggregate.json"
+
+
+def _read_json(path):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def _merge_into(merged, metrics, with_gauges):
+    for name, metric in metrics.items():
+        if metric["kind"] == "gauge" and not with_gauges:
+            continue
+        target = merged.setdefault(name, {**metric, "values": {}})
+        for key, value in metric["values"].items():
+            target["values"][key] = _merge_value(target["values"].get(key), value)
+
+def _process_start(pid):
+    """Inicio del proceso en ticks desde el boot (/proc, Linux); None si no se puede leer."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+        return int(stat.rsplit(")", 1)[1].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _worker_alive(path):
+    """Vivo si el pid existe y, donde hay /proc, sigue siendo el mismo proceso."""
+    try:
+        _, pid, start = path.stem.split("_")
+        pid, start = int(pid), int(start)
+    except ValueError:
+        return False
+    if not _pid_alive(pid):
+        return False
+    current = _process_start(pid)
+    return current is None or current == start
+
+def _merge_value(current, value):
+    if current is None:
+        return value
+    if isinstance(value, dict):
+        return {
+            "buckets": [a + b for a, b in zip(current["buckets"], value["buckets"])],
+            "sum": current["sum"] + value["sum"],
+            "count": current["count"] + value["count"],
+        }
+    return current + value
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except (OSError, TypeError):
+        return False
+    return True
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _fmt(value):
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "http_requests_total", "Requests HTTP por ruta, método y status.", ["route", "method", "status"])
+REQUEST_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "Latencia de requests HTTP por ruta.", ["route", "method"])
+AUTH_FAILURES = registry.counter(
+    "auth_failures_total", "Fallos de autenticación JWT por motivo.", ["reason"])
+STORAGE_BYTES = registry.counter(
+    "storage_bytes_total", "Bytes leídos/escritos en el almacenamiento de publicaciones.", ["op"])
+CACHE_REQUESTS = registry.counter(
+    "cache_requests_total", "Consultas a caches en proceso (hit/miss).", ["cache", "result"])
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class MetricsMiddleware:
+    """
+    Cuenta requests y mide latencia por ruta (patrón de URL, no el path
+    concreto, para no explotar la cardinalidad). Sync y async: bajo ASGI no
+    obliga a Django a correr la cadena en un hilo.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not _conf("ENABLED"):
+            return self.get_response(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not _conf("ENABLED"):
+            return await self.get_response(request)
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def _record(self, request, response, elapsed):
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        REQUEST_LATENCY.observe(elapsed, route=route, method=request.method)
+        registry.start_flusher()
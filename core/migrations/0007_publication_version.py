@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_publication_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publication',
+            name='content',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='publication',
+            name='content_url',
+            field=models.CharField(blank=True, db_column='content_url', max_length=1000),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-19 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_publication_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingPublication',
+            fields=[
+                ('publication', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='core.publication')),
+                ('comment_score', models.FloatField(default=0)),
+                ('score', models.FloatField(db_index=True, default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TrendingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_commentary_id', models.BigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
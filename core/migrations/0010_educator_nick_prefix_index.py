@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-19 17:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_trending_publication'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='educator',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('nick_name'), name='text_pattern_ops'), name='educator_nick_upper_prefix'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def purge_keys(apps, schema_editor):
+    # Las filas previas pueden guardar respuestas de signup con tokens en claro y
+    # usan sha256 sin clave: con los hashes HMAC ya no coincidirían igualmente
+    apps.get_model("core", "IdempotencyKey").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_keys, migrations.RunPython.noop),
+    ]
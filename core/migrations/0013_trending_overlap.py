@@ -0,0 +1,23 @@
+# Generated by Django 5.0.6 on 2026-10-19 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_purge_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendingstate',
+            name='recent_commentary_ids',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AlterField(
+            model_name='commentary',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_column='createdAt', db_index=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import OpClass
 from django.contrib.auth.hashers import make_password
 import os
+import uuid
 from django.conf import settings
 
 class Role(models.TextChoices):
@@ -11,6 +14,10 @@ class PublicationType(models.TextChoices):
     ARTICLE = "ARTICLE", "ARTICLE"
     FORUM = "FORUM", "FORUM"
 
+class NotificationKind(models.IntegerChoices):
+    PUBLICATION = 1, "PUBLICATION"
+    COMMENTARY = 2, "COMMENTARY"
+
 class User(models.Model):
     # Tabla users
     name = models.CharField(max_length=255, null=False)
@@ -33,14 +40,40 @@ class Educator(models.Model):
     id = models.BigAutoField(primary_key=True)
     nick_name = models.CharField(max_length=255, unique=True, null=True, db_column="nick_name")
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="educator", db_column="user_id")
+
+    class Meta:
+        indexes = [
+            # Respaldo de educator/autocomplete: istartswith -> UPPER(nick_name) LIKE 'X%'
+            models.Index(OpClass(Upper("nick_name"), name="text_pattern_ops"), name="educator_nick_upper_prefix"),
+        ]
     
+class PublicationQuerySet(models.QuerySet):
+    def with_content(self):
+        return self.defer(None)
+
+class PublicationManager(models.Manager.from_queryset(PublicationQuerySet)):
+    def get_queryset(self):
+        # El HTML en DB puede pesar cientos de KB (TOAST): solo se trae con with_content()
+        return super().get_queryset().defer("content")
+
 class Publication(models.Model):
     title = models.CharField(max_length=255, null=False)
     created_at = models.DateTimeField(auto_now_add=True, null=False, db_column="createdAt")
     updated_at = models.DateTimeField(auto_now=True, null=False, db_column="updatedAt")
     educator = models.ForeignKey(Educator, on_delete=models.CASCADE, related_name="publications", db_column="educator_id")
     publication_type = models.CharField(max_length=20, choices=PublicationType.choices, db_column="publication_type")
-    content_url = models.CharField(max_length=1000, null=False, db_column="content_url")
+    # Backend de contenido (PUBLICATION_STORAGE["BACKEND"]): "file" -> content_url apunta al
+    # .html[.gz|.zst] y content es NULL; "db" -> content_url vacío y el HTML va en content
+    content_url = models.CharField(max_length=1000, null=False, blank=True, db_column="content_url")
+    content = models.TextField(null=True, blank=True)
+    # Se incrementa en cada edición; PublicationMeUpdateView rechaza con 409 versiones viejas
+    version = models.PositiveIntegerField(default=1)
+
+    objects = PublicationManager()
+
+    @property
+    def content_in_db(self):
+        return not self.content_url
 
 def image_upload_path(instance, filename):
     # El filename NO se usa — lo reemplazamos por el id luego en save()
@@ -63,25 +96,45 @@ class Image(models.Model):
         super().save(*args, **kwargs)
 
         if is_new:
-            old_path = self.file.path
-            ext = os.path.splitext(old_path)[1]  # .png, .jpg, etc
-            new_name = f"{self.pk}{ext}"  # filename = id.ext
-            new_path = os.path.join(os.path.dirname(old_path), new_name)
-
-            # Renombrar archivo físico
-            os.rename(old_path, new_path)
-
-            # Actualizar file field
-            self.file.name = f"images/{new_name}"
-
-            # Generar URL pública
-            self.url = f"{settings.DOMAIN}{settings.MEDIA_URL}{self.file.name}"
+            self.rename_to_pk()
 
             # Guardar cambios
             super().save(update_fields=["file", "url"])
 
+    def rename_to_pk(self):
+        # También lo usa la subida en lote (bulk_create no llama a save())
+        old_path = self.file.path
+        ext = os.path.splitext(old_path)[1]  # .png, .jpg, etc
+        new_name = f"{self.pk}{ext}"  # filename = id.ext
+        new_path = os.path.join(os.path.dirname(old_path), new_name)
+
+        # Renombrar archivo físico
+        os.rename(old_path, new_path)
+
+        # Actualizar file field
+        self.file.name = f"images/{new_name}"
+
+        # Generar URL pública
+        self.url = f"{settings.DOMAIN}{settings.MEDIA_URL}{self.file.name}"
+
+class UploadSession(models.Model):
+    # Subida por partes reanudable; los bytes van a UPLOAD_SESSIONS["TEMP_DIR"]/<id>.part
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.UPLOAD_SESSIONS["TEMP_DIR"], f"{self.id}.part")
+
 class Commentary(models.Model):
-    created_at = models.DateTimeField(auto_now_add=True, null=False, db_column="createdAt")
+    # Indexado: update_trending vuelve a leer los últimos OVERLAP_SECONDS por created_at
+    created_at = models.DateTimeField(auto_now_add=True, null=False, db_column="createdAt", db_index=True)
     updated_at = models.DateTimeField(auto_now=True, null=False, db_column="updatedAt")
     content = models.TextField(max_length=2000, null=False)
     educator = models.ForeignKey(Educator, on_delete=models.CASCADE, related_name="commentaries", db_column="educator_id")
@@ -96,6 +149,53 @@ class Subscription(models.Model):
         unique_together = ("subscriber", "subscribed")
 
 class RefreshToken(models.Model):
-    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="refresh_token")
-    token = models.CharField(max_length=512, unique=True)
-    expiry_date = models.DateTimeField()
+    # Una fila por sesión; se guarda el sha256 del token (64 hex), nunca el token en claro
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="refresh_tokens")
+    token_hash = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expiry_date = models.DateTimeField(db_index=True)  # purge_refresh_tokens barre por aquí
+
+class IdempotencyKey(models.Model):
+    # Respuesta guardada de un POST con Idempotency-Key (core/idempotency.py).
+    # key_hash = sha256(usuario, ruta, key del cliente); status_code NULL = en curso
+    key_hash = models.CharField(max_length=64, unique=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.BinaryField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)  # purge_idempotency_keys barre por aquí
+
+class TrendingPublication(models.Model):
+    # Ranking materializado por update_trending; publication/trending lo lee por el índice de score
+    publication = models.OneToOneField(Publication, on_delete=models.CASCADE, primary_key=True, related_name="trending")
+    # Comentarios ponderados con decaimiento exponencial, valor a TrendingState.computed_at
+    comment_score = models.FloatField(default=0)
+    score = models.FloatField(default=0, db_index=True)
+
+class TrendingState(models.Model):
+    # Fila única (id=1): hasta qué comentario procesó update_trending y cuándo
+    last_commentary_id = models.BigIntegerField(default=0)
+    computed_at = models.DateTimeField(null=True)
+    # Ids ya sumados con created_at dentro de la ventana de solape de la próxima corrida
+    recent_commentary_ids = models.JSONField(default=list)
+
+class Notification(models.Model):
+    # Sin texto: tipo + referencias (el cliente arma el mensaje); una fila por destinatario
+    id = models.BigAutoField(primary_key=True)
+    recipient = models.ForeignKey(Educator, on_delete=models.CASCADE, related_name="notifications", db_index=False)
+    actor = models.ForeignKey(Educator, on_delete=models.CASCADE, related_name="+")
+    kind = models.PositiveSmallIntegerField(choices=NotificationKind.choices)
+    publication = models.ForeignKey(Publication, on_delete=models.CASCADE, related_name="+")
+    commentary = models.ForeignKey(Commentary, on_delete=models.CASCADE, null=True, related_name="+")
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Listado por cursor (id < cursor) y marcado como leídas de un destinatario
+            models.Index(fields=["recipient", "-id"], name="notification_recipient_id"),
+        ]
+
+class NotificationCounter(models.Model):
+    # No leídas por educator; lo mantienen core/notifications.py (fan-out y marcar leídas)
+    educator = models.OneToOneField(Educator, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter")
+    unread = models.PositiveIntegerField(default=0)
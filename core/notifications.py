@@ -0,0 +1,174 @@
+# core/notifications.py
+"""
+Notificaciones a educators: publicación nueva de alguien que siguen y
+comentario en una publicación propia.
+
+El request que crea la publicación/comentario solo encola el fan-out
+(on_commit) en un pool de hilos; el pool recorre los seguidores en lotes de
+NOTIFICATIONS["CHUNK_SIZE"] y por cada lote hace, en una transacción, un
+bulk_create de Notification y un UPDATE de NotificationCounter. Un autor con
+100k seguidores no bloquea su request ni toma locks largos.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .metrics import registry
+from .models import Notification, NotificationCounter, NotificationKind, Subscription
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATIONS_CREATED = registry.counter(
+    "notifications_created_total", "Notificaciones creadas por tipo.", ["kind"])
+NOTIFICATIONS_DROPPED = registry.counter(
+    "notifications_dropped_total", "Notificaciones no entregadas tras agotar reintentos por tipo.", ["kind"])
+FAN_OUT_FAILURES = registry.counter(
+    "notification_fan_out_failures_total", "Fan-outs de notificaciones que fallaron por tipo.", ["kind"])
+
+_executor = ThreadPoolExecutor(max_workers=settings.NOTIFICATIONS["WORKERS"], thread_name_prefix="notify")
+
+
+def _chunks(ids, size):
+    chunk = []
+    for pk in ids:
+        chunk.append(pk)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _deliver_chunk(chunk, actor_id, kind, publication_id, commentary_id):
+    with transaction.atomic():
+        Notification.objects.bulk_create([
+            Notification(recipient_id=pk, actor_id=actor_id, kind=kind,
+                         publication_id=publication_id, commentary_id=commentary_id)
+            for pk in chunk
+        ])
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(educator_id=pk) for pk in chunk], ignore_conflicts=True,
+        )
+        # Locks siempre en orden de educator_id: dos fan-outs con destinatarios en común no se bloquean en cruz
+        list(NotificationCounter.objects.select_for_update().filter(educator_id__in=chunk)
+             .order_by("educator_id").values_list("educator_id", flat=True))
+        NotificationCounter.objects.filter(educator_id__in=chunk).update(unread=F("unread") + 1)
+
+
+def deliver(recipient_ids, actor_id, kind, publication_id, commentary_id=None):
+    """
+    Inserta las notificaciones y suma a los contadores, un lote por transacción.
+    Un lote que falla (deadlock, timeout) se reintenta RETRIES veces; si sigue
+    fallando se registra y se continúa con el resto de destinatarios.
+    """
+    conf = settings.NOTIFICATIONS
+    total = dropped = 0
+    for chunk in _chunks(recipient_ids, conf["CHUNK_SIZE"]):
+        chunk.sort()
+        for attempt in range(conf["RETRIES"] + 1):
+            try:
+                _deliver_chunk(chunk, actor_id, kind, publication_id, commentary_id)
+                total += len(chunk)
+                break
+            except OperationalError:
+                if attempt == conf["RETRIES"]:
+                    dropped += len(chunk)
+                    logger.exception(
+                        "Notificaciones descartadas: %s destinatarios (%s..%s) de publicación %s",
+                        len(chunk), chunk[0], chunk[-1], publication_id,
+                    )
+                else:
+                    time.sleep(0.05 * 2 ** attempt)
+    label = NotificationKind(kind).label
+    NOTIFICATIONS_CREATED.inc(total, kind=label)
+    if dropped:
+        NOTIFICATIONS_DROPPED.inc(dropped, kind=label)
+    return total
+
+
+def _run(kind, job, *args):
+    try:
+        job(*args)
+    except Exception:
+        FAN_OUT_FAILURES.inc(kind=NotificationKind(kind).label)
+        logger.exception("Fan-out de notificaciones falló")
+    finally:
+        connections.close_all()  # solo las conexiones de este hilo del pool
+
+
+def _submit(kind, job, *args):
+    if settings.NOTIFICATIONS["ASYNC"]:
+        transaction.on_commit(lambda: _executor.submit(_run, kind, job, *args))
+    else:
+        transaction.on_commit(lambda: job(*args))
+
+
+def _followers(author_id):
+    # Paginación por clave (subscriber_id > último): sin cursor abierto entre las transacciones de deliver
+    last = 0
+    while True:
+        chunk = list(
+            Subscription.objects.filter(subscribed_id=author_id, subscriber_id__gt=last)
+            .order_by("subscriber_id").values_list("subscriber_id", flat=True)[: settings.NOTIFICATIONS["CHUNK_SIZE"]]
+        )
+        if not chunk:
+            return
+        yield from chunk
+        last = chunk[-1]
+
+
+def _fan_out_publication(publication_id, author_id):
+    deliver(_followers(author_id), author_id, NotificationKind.PUBLICATION, publication_id)
+
+
+def notify_publication(publication):
+    """A los seguidores del autor."""
+    _submit(NotificationKind.PUBLICATION, _fan_out_publication, publication.id, publication.educator_id)
+
+
+def notify_commentary(commentary, publication):
+    """Al autor de la publicación, salvo que comente él mismo."""
+    if commentary.educator_id == publication.educator_id:
+        return
+    _submit(
+        NotificationKind.COMMENTARY, deliver,
+        [publication.educator_id], commentary.educator_id, NotificationKind.COMMENTARY, publication.id, commentary.id,
+    )
+
+
+def mark_read(educator_id, ids=None, up_to=None):
+    """Marca leídas las indicadas (ids) o todas hasta `up_to` inclusive; devuelve (marcadas, no leídas)."""
+    qs = Notification.objects.filter(recipient_id=educator_id, is_read=False)
+    qs = qs.filter(id__in=ids) if ids is not None else qs.filter(id__lte=up_to)
+    with transaction.atomic():
+        updated = qs.update(is_read=True)
+        if updated:
+            NotificationCounter.objects.filter(educator_id=educator_id).update(unread=Greatest(F("unread") - updated, 0))
+    return updated, unread_count(educator_id)
+
+
+def unread_count(educator_id):
+    return NotificationCounter.objects.filter(educator_id=educator_id).values_list("unread", flat=True).first() or 0
+
+
+def recount_unread(educator_ids):
+    """Recalcula NotificationCounter.unread desde las filas (tras borrados en cascada)."""
+    if not educator_ids:
+        return
+    unread = (
+        Notification.objects.filter(recipient_id=OuterRef("educator_id"), is_read=False)
+        .order_by().values("recipient_id").annotate(n=Count("id")).values("n")
+    )
+    NotificationCounter.objects.filter(educator_id__in=educator_ids).update(unread=Coalesce(Subquery(unread), 0))
+
+
+def unread_recipients(**lookup):
+    """Destinatarios con no leídas que apuntan a lo que se va a borrar (publication_id=..., actor_id=...)."""
+    return set(
+        Notification.objects.filter(is_read=False, **lookup).values_list("recipient_id", flat=True).distinct()
+    )
@@ -0,0 +1,126 @@
+# core/openapi.py
+"""
+Schema OpenAPI pregenerado.
+
+Generar el schema introspecciona todas las vistas y serializers (cientos de
+ms); aquí se genera una vez, se guarda en OPENAPI_SCHEMA["PATH"] junto a la
+versión del código y cada proceso lo sirve desde memoria con ETag. Si la
+versión guardada no coincide con la del código se regenera.
+
+    python manage.py build_openapi_schema   # en el deploy, antes de levantar workers
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import drf_spectacular
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.views import SpectacularAPIView
+
+from . import schema  # noqa: F401  registra JWTAuthScheme antes de generar
+
+_SOURCE_DIRS = ("core", "comunidadai_api")
+
+
+def code_version() -> str:
+    """CODE_VERSION del entorno (p. ej. el sha del deploy) o hash de las fuentes .py."""
+    if settings.OPENAPI_SCHEMA["CODE_VERSION"]:
+        return settings.OPENAPI_SCHEMA["CODE_VERSION"]
+    digest = hashlib.sha256(drf_spectacular.__version__.encode())
+    digest.update(json.dumps(settings.SPECTACULAR_SETTINGS, sort_keys=True, default=str).encode())
+    for folder in _SOURCE_DIRS:
+        for path in sorted(Path(settings.BASE_DIR, folder).rglob("*.py")):
+            if "migrations" in path.parts:
+                continue
+            digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def generate_schema() -> dict:
+    return SchemaGenerator().get_schema(request=None, public=True)
+
+
+def write_schema(schema: dict, version: str, path=None):
+    path = Path(path or settings.OPENAPI_SCHEMA["PATH"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".schema-")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump({"version": version, "schema": schema}, fh, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def read_schema(version: str, path=None):
+    """Schema guardado si es de `version`; None si no existe o está desactualizado."""
+    try:
+        with open(path or settings.OPENAPI_SCHEMA["PATH"], encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data["schema"] if data.get("version") == version else None
+
+
+class SchemaCache:
+    """Schema y sus representaciones (yaml/json) por proceso; el código no cambia en vida del proceso."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = None
+        self.schema = None
+        self._rendered = {}
+
+    def get(self):
+        with self._lock:
+            if self.schema is None:
+                self.version = code_version()
+                schema = read_schema(self.version)
+                if schema is None:
+                    schema = generate_schema()
+                    write_schema(schema, self.version)
+                self.schema = schema
+            return self.version, self.schema
+
+    def rendered(self, renderer, media_type):
+        version, schema = self.get()
+        key = (renderer.format, media_type)
+        entry = self._rendered.get(key)
+        if entry is None:
+            body = renderer.render(schema, media_type, {})
+            entry = self._rendered[key] = (body, f'"{version}-{renderer.format}"')
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self.version = self.schema = None
+            self._rendered.clear()
+
+
+schema_cache = SchemaCache()
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """
+    SpectacularAPIView servido desde SchemaCache. ?lang= y ?version= siguen
+    generando el schema en el request (no se pregeneran).
+    """
+    def _get_schema_response(self, request):
+        if request.GET.get("lang") or self.api_version or request.version or self._get_version_parameter(request):
+            return super()._get_schema_response(request)
+
+        renderer, media_type = self.perform_content_negotiation(request)
+        body, etag = schema_cache.rendered(renderer, media_type)
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponseNotModified()
+        else:
+            content_type = renderer.media_type
+            if renderer.charset:
+                content_type += f"; charset={renderer.charset}"
+            response = HttpResponse(body, content_type=content_type)
+            response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+        response["ETag"] = etag
+        response["Cache-Control"] = "no-cache"  # revalidar siempre: el ETag cambia con cada deploy
+        return response
@@ -0,0 +1,92 @@
+# core/passwords.py
+"""
+Verificación de passwords en un pool acotado.
+
+check_password (PBKDF2 por defecto) son decenas de ms de CPU por login. Se
+ejecuta en PASSWORD_VERIFY["WORKERS"] hilos con a lo sumo MAX_PENDING
+verificaciones admitidas; el resto falla rápido con PasswordVerifierBusy
+(503) en vez de acaparar los workers que atienden las lecturas.
+Si el hash guardado no es del hasher vigente, se rehashea en el mismo hilo
+del pool y se guarda al volver.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .metrics import registry
+
+PASSWORD_CHECKS = registry.counter(
+    "password_checks_total", "Verificaciones de password por resultado.", ["result"])
+PASSWORD_CHECK_SECONDS = registry.histogram(
+    "password_check_seconds", "Tiempo de verificación de password (cola + hash).")
+
+
+class PasswordVerifierBusy(Exception):
+    pass
+
+
+class PasswordVerifier:
+    def __init__(self, workers, max_pending):
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0  # admitidas y no terminadas (en cola + ejecutándose)
+        self.running = 0
+
+    def _check(self, raw, encoded):
+        with self._lock:
+            self.running += 1
+        try:
+            upgraded = []
+            ok = check_password(raw, encoded, setter=lambda pwd: upgraded.append(make_password(pwd)))
+            return ok, (upgraded[0] if upgraded else None)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def verify(self, raw, encoded):
+        """Devuelve (ok, nuevo_hash | None). PasswordVerifierBusy si el pool está lleno."""
+        if not self._slots.acquire(blocking=False):
+            PASSWORD_CHECKS.inc(result="busy")
+            raise PasswordVerifierBusy()
+        with self._lock:
+            self.pending += 1
+        start = time.perf_counter()
+        try:
+            return self._executor.submit(self._check, raw, encoded).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            PASSWORD_CHECK_SECONDS.observe(time.perf_counter() - start)
+
+
+verifier = PasswordVerifier(settings.PASSWORD_VERIFY["WORKERS"], settings.PASSWORD_VERIFY["MAX_PENDING"])
+
+registry.gauge(
+    "password_verifier_tasks", "Verificaciones de password en el pool por estado.", ["state"],
+    callback=lambda: {
+        ("queued",): verifier.pending - verifier.running,
+        ("running",): verifier.running,
+    },
+)
+
+
+def verify_user_password(user, raw) -> bool:
+    """
+    check_password fuera del hilo del request; si el hash es de un hasher
+    viejo (o con menos iteraciones) guarda el rehash con el hasher vigente.
+    """
+    if not raw:
+        return False
+    ok, upgraded = verifier.verify(raw, user.password)
+    PASSWORD_CHECKS.inc(result="ok" if ok else "fail")
+    if ok and upgraded:
+        user.password = upgraded
+        type(user).objects.filter(id=user.id).update(password=upgraded)
+        PASSWORD_CHECKS.inc(result="rehash")
+    return ok
@@ -1,10 +1,29 @@
+import hmac
 from rest_framework.permissions import BasePermission
+from django.conf import settings
 from .models import Role
 
 class IsAdmin(BasePermission):
     def has_permission(self, request, view):
         return getattr(request.user, "role", None) == Role.ADMIN
 
+class IsAdminOrInternal(BasePermission):
+    """
+    ADMIN autenticado, header X-Metrics-Token igual a METRICS["TOKEN"], o
+    REMOTE_ADDR en METRICS["ALLOWED_IPS"] (vacío por defecto).
+
+    La lista de IPs solo sirve si el scrape llega directo o por un listener
+    interno: detrás de nginx en la misma máquina todo request externo llega
+    como 127.0.0.1. En ese caso usar el token.
+    """
+    def has_permission(self, request, view):
+        if getattr(request.user, "role", None) == Role.ADMIN:
+            return True
+        token = settings.METRICS["TOKEN"]
+        if token and hmac.compare_digest(request.headers.get("X-Metrics-Token", ""), token):
+            return True
+        return request.META.get("REMOTE_ADDR") in settings.METRICS["ALLOWED_IPS"]
+
 class IsOwnerEducatorObject(BasePermission):
     """
     Verifica que el recurso (Publication/Commentary) pertenezca al educator autenticado.
@@ -0,0 +1,267 @@
+# core/profiling.py
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from rest_framework.authentication import get_authorization_header
+
+from .jwt_utils import decode_any_token
+from .models import Role
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+$")
+PROFILE_SUFFIXES = (".prof", ".collapsed")
+
+
+def _conf(key):
+    return settings.PROFILING[key]
+
+def profiles_dir() -> Path:
+    return Path(_conf("DIR"))
+
+def _admin_payload(request):
+    # Solo tokens ADMIN pueden activar el profiling (sin tocar la DB)
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b"bearer":
+        return None
+    try:
+        payload = decode_any_token(auth[1].decode("utf-8"))
+    except Exception:
+        return None
+    if payload.get("role") != Role.ADMIN:
+        return None
+    return payload
+
+
+class SamplingProfiler:
+    """
+    Muestrea periódicamente la pila del hilo que atiende la request.
+    Genera stacks en formato "collapsed" (compatible con flamegraph.pl / speedscope).
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+class RequestProfilerMiddleware:
+    """
+    Perfila la request completa cuando un ADMIN lo pide con el header
+    configurado (PROFILING["HEADER"]) o cuando cae en el muestreo (SAMPLE_RATE).
+    Guarda el resultado en PROFILING["DIR"] junto a un .json con metadatos.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        if not _conf("ENABLED"):
+            return None
+        header = request.headers.get(_conf("HEADER"), "")
+        sampled = _conf("SAMPLE_RATE") > 0 and random.random() < _conf("SAMPLE_RATE")
+        if header not in ("1", "true", "True") and not sampled:
+            return None
+        return _admin_payload(request)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        payload = self.should_profile(request)
+        if payload is None:
+            return self.get_response(request)
+
+        mode = _conf("MODE")
+        start = time.perf_counter()
+        if mode == "sampling":
+            profiler = SamplingProfiler(_conf("SAMPLING_INTERVAL_MS") / 1000)
+            profiler.start()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.stop()
+        else:
+            profiler = cProfile.Profile()
+            response = profiler.runcall(self.get_response, request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._save(profiler, mode, request, response, payload, elapsed_ms)
+        return response
+
+    async def __acall__(self, request):
+        payload = self.should_profile(request)
+        if payload is None:
+            return await self.get_response(request)
+
+        # En el event loop: cProfile/el muestreo ven también otras corrutinas que
+        # avancen mientras esta espera; sirve para ver dónde se va el tiempo de CPU
+        mode = _conf("MODE")
+        start = time.perf_counter()
+        if mode == "sampling":
+            profiler = SamplingProfiler(_conf("SAMPLING_INTERVAL_MS") / 1000)
+            profiler.start()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.stop()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        await sync_to_async(self._save)(profiler, mode, request, response, payload, elapsed_ms)
+        return response
+
+    @staticmethod
+    def _save(profiler, mode, request, response, payload, elapsed_ms):
+        try:
+            name = save_profile(profiler, mode, request, response, payload, elapsed_ms)
+            response["X-Profile-Id"] = name
+        except OSError:
+            logger.exception("No se pudo guardar el perfil")
+
+
+def save_profile(profiler, mode, request, response, payload, elapsed_ms):
+    folder = profiles_dir()
+    folder.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^\w]+", "_", request.path).strip("_")[:60] or "root"
+    stem = f"{time.strftime('%Y%m%d-%H%M%S')}_{uuid.uuid4().hex[:8]}_{request.method}_{slug}"
+    suffix = ".collapsed" if mode == "sampling" else ".prof"
+    name = stem + suffix
+
+    if mode == "sampling":
+        profiler.dump(folder / name)
+    else:
+        profiler.dump_stats(str(folder / name))
+
+    meta = {
+        "name": name,
+        "mode": mode,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(elapsed_ms, 2),
+        "user_id": payload.get("sub"),
+        "created_at": time.time(),
+    }
+    (folder / f"{stem}.json").write_text(json.dumps(meta), encoding="utf-8")
+    _prune(folder)
+    return name
+
+def _prune(folder: Path):
+    # Conserva solo los MAX_FILES perfiles más recientes
+    files = sorted(
+        (f for f in os.scandir(folder) if f.name.endswith(PROFILE_SUFFIXES)),
+        key=lambda f: f.stat().st_mtime,
+        reverse=True,
+    )
+    for f in files[_conf("MAX_FILES"):]:
+        stem = os.path.splitext(f.path)[0]
+        for path in (f.path, stem + ".json"):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+# -------- Lectura (endpoints admin) --------
+def list_profiles(limit=50):
+    folder = profiles_dir()
+    if not folder.is_dir():
+        return []
+    metas = []
+    for f in os.scandir(folder):
+        if not f.name.endswith(".json"):
+            continue
+        try:
+            metas.append(json.loads(Path(f.path).read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    metas.sort(key=lambda m: m.get("created_at", 0), reverse=True)
+    return metas[:limit]
+
+def profile_path(name: str) -> Path:
+    if not PROFILE_NAME_RE.match(name) or not name.endswith(PROFILE_SUFFIXES):
+        raise FileNotFoundError("Perfil inválido")
+    path = profiles_dir() / name
+    if not path.is_file():
+        raise FileNotFoundError("No se encontró el perfil")
+    return path
+
+def summarize_profile(name: str, limit=30):
+    """
+    Top de funciones por tiempo acumulado.
+    .prof -> pstats (segundos); .collapsed -> muestras (inclusivas / propias).
+    """
+    path = profile_path(name)
+    rows = []
+    if name.endswith(".prof"):
+        stats = pstats.Stats(str(path))
+        for (filename, line, func), (cc, nc, tt, ct, _callers) in stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({func})",
+                "calls": nc,
+                "primitive_calls": cc,
+                "total_time": round(tt, 6),
+                "cumulative_time": round(ct, 6),
+            })
+        rows.sort(key=lambda r: r["cumulative_time"], reverse=True)
+        total = stats.total_tt
+    else:
+        inclusive, own = Counter(), Counter()
+        total = 0
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                stack, _, count = line.rstrip("\n").rpartition(" ")
+                count = int(count)
+                frames = stack.split(";")
+                total += count
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    inclusive[frame] += count
+        for frame, count in inclusive.most_common():
+            rows.append({"function": frame, "cumulative_samples": count, "own_samples": own[frame]})
+    return {"name": name, "total": total, "functions": rows[:limit]}
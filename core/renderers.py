@@ -0,0 +1,56 @@
+# core/renderers.py
+"""
+Renderer/parser JSON rápidos basados en orjson, con fallback a los de DRF
+(json de la stdlib) si orjson no está instalado.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+# Fechas y tipos no nativos (lazy strings de gettext_lazy, Decimal, UUID...)
+# pasan por el encoder de DRF para que la salida sea idéntica a la de JSONRenderer.
+_drf_encoder = JSONEncoder()
+# OPT_NON_STR_KEYS: los errores de ListField/DictField vienen indexados por int ({"ids": {0: [...]}})
+_ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def dumps(data) -> bytes:
+    if orjson is None:
+        return JSONRenderer().render(data)
+    content = orjson.dumps(data, default=_drf_encoder.default, option=_ORJSON_OPTIONS)
+    # Igual que DRF: escapar separadores de línea unicode (seguros en JS)
+    if b"\xe2\x80\xa8" in content or b"\xe2\x80\xa9" in content:
+        content = content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return content
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        # ?indent / Accept: application/json; indent=4 -> camino de la stdlib
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if encoding.lower().replace("_", "-") not in ("utf-8", "utf8"):
+                content = content.decode(encoding)
+            return orjson.loads(content)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -1,7 +1,7 @@
 from rest_framework import serializers
-from .models import User, Educator, Publication, Commentary, Subscription, RefreshToken, Role, PublicationType, Image
+from .models import User, Educator, Publication, Commentary, Subscription, RefreshToken, Role, PublicationType, Image, UploadSession, Notification
 from rest_framework.validators import UniqueValidator
-from drf_spectacular.utils import OpenApiTypes, extend_schema_field
+from .image_validation import ImageValidationError, inspect_image
 
 class MessageSerializer(serializers.Serializer):
     detail = serializers.CharField()
@@ -46,7 +46,12 @@ class PublicationSerializer(serializers.ModelSerializer):
     writer = EducatorSerializer(source="educator", read_only=True)
     class Meta:
         model = Publication
-        fields = ["id", "title", "publication_type", "content_url", "created_at", "updated_at", "writer"]
+        fields = ["id", "title", "publication_type", "content_url", "version", "created_at", "updated_at", "writer"]
+
+class TrendingPublicationSerializer(PublicationSerializer):
+    score = serializers.FloatField(read_only=True)
+    class Meta(PublicationSerializer.Meta):
+        fields = PublicationSerializer.Meta.fields + ["score"]
 
 class PublicationCreateSerializer(serializers.Serializer):
     title = serializers.CharField()
@@ -61,6 +66,18 @@ class EducatorWithFollowSerializer(serializers.Serializer):
     followed_by_me = serializers.BooleanField()
     following_me = serializers.BooleanField()
     
+class EducatorAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    nick_name = serializers.CharField()
+
+class EducatorSuggestionSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    nick_name = serializers.CharField()
+    user = UserSerializer()
+
+    score = serializers.FloatField()
+    mutual_follows = serializers.IntegerField()
+
 class EducatorDetailWithPublicationsSerializer(EducatorWithFollowSerializer):
     publications = PublicationSerializer(many=True)
 
@@ -103,10 +120,37 @@ class PublicationUpdateSerializer(serializers.Serializer):
     title = serializers.CharField(required=False)
     publication_type = serializers.ChoiceField(choices=["ARTICLE", "FORUM"], required=False)
     content = serializers.CharField(required=False)
+    # Versión sobre la que se editó (o header If-Match); si no coincide -> 409
+    version = serializers.IntegerField(required=False, min_value=1)
 
 class CommentaryUpdateSerializer(serializers.Serializer):
     content = serializers.CharField(required=True)
 
+class NotificationSerializer(serializers.ModelSerializer):
+    kind = serializers.CharField(source="get_kind_display")
+    actor_nick_name = serializers.CharField(source="actor.nick_name", allow_null=True)
+    class Meta:
+        model = Notification
+        fields = ["id", "kind", "actor", "actor_nick_name", "publication", "commentary", "is_read", "created_at"]
+
+class NotificationPageSerializer(serializers.Serializer):
+    results = NotificationSerializer(many=True)
+    next_cursor = serializers.IntegerField(allow_null=True)
+    unread = serializers.IntegerField()
+
+class NotificationReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=500)
+    up_to = serializers.IntegerField(required=False, help_text="Marca todas las de id <= up_to.")
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("up_to" in attrs):
+            raise serializers.ValidationError("Enviar ids o up_to (uno de los dos).")
+        return attrs
+
+class NotificationReadResponseSerializer(serializers.Serializer):
+    updated = serializers.IntegerField()
+    unread = serializers.IntegerField()
+
 # ---- Respuestas estandarizadas para Swagger ----
 from rest_framework import serializers
 from .models import User, Educator, Publication
@@ -117,6 +161,7 @@ class TokenPairSerializer(serializers.Serializer):
 
 class RefreshResponseSerializer(serializers.Serializer):
     new_access_token = serializers.CharField()
+    refresh_token = serializers.CharField()
 
 class SignupResponseSerializer(serializers.Serializer):
     user = UserSerializer()
@@ -148,10 +193,43 @@ class EducatorUserUpdateSerializer(serializers.Serializer):
 
 class ImageUploadRequestSerializer(serializers.Serializer):
     publication_id = serializers.IntegerField()
-    file = serializers.ImageField()
+    # FileField + inspect_image: valida por cabecera sin decodificar (ImageField hace verify completo)
+    file = serializers.FileField()
+
+    def validate_file(self, value):
+        try:
+            inspect_image(value)
+        except ImageValidationError as e:
+            raise serializers.ValidationError(str(e))
+        return value
 
 
 class ImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Image
-        fields = ["id", "file", "url", "created_at"]
\ No newline at end of file
+        fields = ["id", "file", "url", "created_at"]
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    publication_id = serializers.IntegerField()
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1)
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = ["id", "publication", "filename", "total_size", "received", "created_at", "updated_at"]
+
+class ProfileSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    mode = serializers.CharField()
+    method = serializers.CharField()
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    duration_ms = serializers.FloatField()
+    user_id = serializers.IntegerField(allow_null=True)
+    created_at = serializers.FloatField()
+
+class ProfileSummarySerializer(serializers.Serializer):
+    name = serializers.CharField()
+    total = serializers.FloatField()
+    functions = serializers.ListField(child=serializers.DictField())
@@ -1,7 +1,12 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_delete
-from .models import Publication, Image
+from django.db.models.signals import post_delete, post_save, pre_delete
+from .models import User, Educator, Publication, Commentary, Image, UploadSession, Subscription
+import os
 from .storage import delete_publication_html
+from .jwt_utils import verified_tokens
+from .follow_graph import on_follow, on_unfollow
+from .autocomplete import on_educator_saved, on_educator_deleted
+from .notifications import recount_unread, unread_recipients
 @receiver(post_delete, sender=Publication)
 def delete_publication_file_on_delete(sender, instance, **kwargs):
     delete_publication_html(instance.content_url)
@@ -11,4 +16,55 @@ def delete_image_file(sender, instance, **kwargs):
     
     storage = instance.file.storage
     if storage.exists(instance.file.name):
-        storage.delete(instance.file.name)
\ No newline at end of file
+        storage.delete(instance.file.name)
+
+@receiver(post_delete, sender=UploadSession)
+def delete_upload_part(sender, instance, **kwargs):
+    try:
+        os.unlink(instance.part_path)
+    except FileNotFoundError:
+        pass
+
+@receiver(post_delete, sender=User)
+def forget_user_tokens(sender, instance, **kwargs):
+    verified_tokens.revoke_user(instance.id)
+
+@receiver(post_save, sender=Subscription)
+def follow_graph_add(sender, instance, created, **kwargs):
+    if created:
+        on_follow(instance.subscriber_id, instance.subscribed_id)
+
+@receiver(post_delete, sender=Subscription)
+def follow_graph_remove(sender, instance, **kwargs):
+    on_unfollow(instance.subscriber_id, instance.subscribed_id)
+
+@receiver(post_save, sender=Educator)
+def nick_index_upsert(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or "nick_name" in update_fields:
+        on_educator_saved(instance.id, instance.nick_name)
+
+@receiver(post_delete, sender=Educator)
+def nick_index_remove(sender, instance, **kwargs):
+    on_educator_deleted(instance.id)
+
+# Las Notification se borran en cascada sin pasar por mark_read: antes del borrado se anotan
+# los destinatarios con no leídas afectadas y después se recalculan sus contadores.
+# Con sender explícito: un receiver global impediría el fast delete de todos los modelos.
+# Las de una publicación incluyen las de sus comentarios y las de un educator (actor) las de
+# sus publicaciones y comentarios, así que solo consulta el modelo donde se originó el borrado.
+_NOTIFICATION_REFS = {Publication: "publication_id", Commentary: "commentary_id", Educator: "actor_id"}
+
+def _origin_model(origin):
+    return getattr(origin, "model", type(origin))
+
+def notification_refs_before_delete(sender, instance, origin=None, **kwargs):
+    if sender is not Educator and _origin_model(origin) is not sender:
+        return
+    instance._unread_recipients = unread_recipients(**{_NOTIFICATION_REFS[sender]: instance.pk})
+
+def notification_counters_after_delete(sender, instance, **kwargs):
+    recount_unread(getattr(instance, "_unread_recipients", None))
+
+for _model in _NOTIFICATION_REFS:
+    pre_delete.connect(notification_refs_before_delete, sender=_model)
+    post_delete.connect(notification_counters_after_delete, sender=_model)
@@ -1,26 +1,117 @@
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils import timezone
 from pathlib import Path
+import gzip
+import os
+import tempfile
 import uuid
+from .metrics import STORAGE_BYTES
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Sufijo del archivo -> Content-Encoding HTTP (el formato se deduce del nombre,
+# así conviven archivos antiguos sin comprimir con los nuevos)
+ENCODING_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+SUFFIX_BY_ENCODING = {v: k for k, v in ENCODING_SUFFIXES.items()}
+
+def publication_path(content_url) -> Path:
+    # Convertir URL pública → ruta absoluta
+    url_part = content_url.replace(settings.MEDIA_URL, "", 1)
+    return Path(settings.MEDIA_ROOT) / url_part
+
+def stored_encoding(path) -> str | None:
+    return ENCODING_SUFFIXES.get(Path(path).suffix)
+
+def encode_content(content: str, encoding) -> bytes:
+    data = content.encode("utf-8")
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=settings.PUBLICATION_STORAGE["GZIP_LEVEL"])
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ImproperlyConfigured("PUBLICATION_COMPRESSION=zstd requiere el paquete zstandard")
+        return zstandard.ZstdCompressor(level=settings.PUBLICATION_STORAGE["ZSTD_LEVEL"]).compress(data)
+    return data
+
+def decode_content(data: bytes, encoding) -> str:
+    if encoding == "gzip":
+        data = gzip.decompress(data)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise ImproperlyConfigured("Leer contenido .zst requiere el paquete zstandard")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return data.decode("utf-8")
+
+def atomic_write(path: Path, data: bytes):
+    """
+    Escribe en un temporal del mismo directorio y lo mueve con os.replace: los
+    lectores ven el archivo anterior o el nuevo completo, nunca uno truncado.
+    PUBLICATION_STORAGE["FSYNC"]: none | file (fsync del archivo) | full (+ directorio).
+    """
+    mode = settings.PUBLICATION_STORAGE["FSYNC"]
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            if mode in ("file", "full"):
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.chmod(tmp, 0o644)  # mkstemp crea con 0600
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    if mode == "full":
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def read_publication_bytes(content_url):
+    """
+    Bytes tal como están guardados + su encoding (None si no está comprimido),
+    para servirlos sin descomprimir cuando el cliente acepta ese encoding.
+    """
+    abs_path = publication_path(content_url)
+    if abs_path.exists() and abs_path.is_file():
+        data = abs_path.read_bytes()
+        STORAGE_BYTES.inc(len(data), op="read")
+        return data, stored_encoding(abs_path)
+    raise FileNotFoundError("No se encontró el contenido")
 
 def get_publication_html(content_url):
+    data, encoding = read_publication_bytes(content_url)
+    return decode_content(data, encoding)
 
-        # Convertir URL pública → ruta absoluta
-        url_part = content_url.replace(settings.MEDIA_URL, "", 1)
-        abs_path = Path(settings.MEDIA_ROOT) / url_part
+def new_publication_content(content: str) -> dict:
+    """Campos content/content_url de una publicación nueva según PUBLICATION_STORAGE["BACKEND"]."""
+    if settings.PUBLICATION_STORAGE["BACKEND"] == "db":
+        return {"content": content, "content_url": ""}
+    return {"content": None, "content_url": save_publication_html(content)}
 
-        if abs_path.exists() and abs_path.is_file():
-            return abs_path.read_text(encoding="utf-8")
-        else:
-            raise FileNotFoundError("No se encontró el contenido")
+def read_publication_content(pub) -> str:
+    """HTML de la publicación; si está en DB, pub debe venir de with_content() para no hacer otra query."""
+    if pub.content_in_db:
+        return pub.content or ""
+    return get_publication_html(pub.content_url)
 
 def save_publication_html(content: str) -> str:
-    # Guarda el contenido como archivo .html dentro de ./media/publications/
+    # Guarda el contenido como archivo .html[.gz|.zst] dentro de ./media/publications/
     folder = Path(settings.MEDIA_ROOT) / "publications"
     folder.mkdir(parents=True, exist_ok=True)
-    filename = f"{uuid.uuid4().hex}.html"
+    encoding = settings.PUBLICATION_STORAGE["COMPRESSION"]
+    filename = f"{uuid.uuid4().hex}.html{SUFFIX_BY_ENCODING.get(encoding, '')}"
     path = folder / filename
-    path.write_text(content, encoding="utf-8")
+    data = encode_content(content, encoding)
+    atomic_write(path, data)
+    STORAGE_BYTES.inc(len(data), op="write")
     # URL (sirviendo media en desarrollo con runserver)
     return f"{settings.MEDIA_URL}publications/{filename}"
 
@@ -29,17 +120,16 @@ def update_publication_html(content_url: str, content: str):
         if not content_url:
             return "content_url not provided"
 
-        # 1. Convertir URL → ruta relativa del filesystem
-        relative_path = content_url.replace(settings.MEDIA_URL, "", 1)
-
-        # 2. Ruta absoluta
-        abs_path = Path(settings.MEDIA_ROOT) / relative_path
+        # 1. Convertir URL → ruta absoluta del filesystem
+        abs_path = publication_path(content_url)
 
-        # 3. Asegurar existencia del directorio
+        # 2. Asegurar existencia del directorio
         abs_path.parent.mkdir(parents=True, exist_ok=True)
 
-        # 4. Escribir el nuevo contenido
-        abs_path.write_text(content, encoding="utf-8")
+        # 3. Escribir el nuevo contenido (mismo encoding que el archivo existente)
+        data = encode_content(content, stored_encoding(abs_path))
+        atomic_write(abs_path, data)
+        STORAGE_BYTES.inc(len(data), op="write")
 
         return "ok"
 
@@ -51,11 +141,9 @@ def delete_publication_html(content_url):
     if not content_url:
         return
 
-    relative_path = content_url.replace(settings.MEDIA_URL, "", 1)
-
-    abs_path = Path(settings.MEDIA_ROOT) / relative_path
+    abs_path = publication_path(content_url)
 
-    # 3. Borrar si existe
+    # Borrar si existe
     try:
         if abs_path.exists() and abs_path.is_file():
             abs_path.unlink()
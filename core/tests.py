@@ -0,0 +1,1388 @@
+import fcntl
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError
+from django.db.models.deletion import Collector
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+from . import autocomplete, db_router, follow_graph, idempotency, metrics, openapi, passwords, throttling
+from .admin import UserAdminForm
+from .db_pool.base import ConnectionPool
+from .image_validation import HEADER_SIZE, ImageValidationError, inspect_image, sniff_format
+from .jwt_utils import (
+    VerifiedTokenCache, decode_any_token, generate_access_token, generate_and_store_refresh, hash_refresh, verified_tokens,
+)
+from .models import (
+    Commentary, Educator, IdempotencyKey, Image, Notification, NotificationCounter, NotificationKind, Publication,
+    RefreshToken, Subscription, TrendingPublication, TrendingState, UploadSession, User,
+)
+from .notifications import deliver
+from .passwords import verify_user_password
+from .renderers import FastJSONRenderer, dumps
+from .storage import get_publication_html, publication_path, save_publication_html, update_publication_html
+from .trending import decay, update_trending
+from .uploads import UploadConflict, append_chunk, finalize
+from .views import _FileRange, parse_byte_range
+
+
+def make_educator(nick, role="EDUCATOR"):
+    user = User(name=nick, email=f"{nick}@example.com", role=role)
+    user.set_password("secret")
+    user.save()
+    return Educator.objects.create(id=user.id, user=user, nick_name=nick)
+
+
+def make_publication(educator, title="t"):
+    return Publication.objects.create(educator=educator, title=title, publication_type="ARTICLE", content="<p>x</p>")
+
+
+def auth_headers(educator):
+    return {"authorization": "Bearer " + generate_access_token(educator.user)}
+
+
+class _IdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField())
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_renders_list_field_errors_keyed_by_int(self):
+        ser = _IdsSerializer(data={"ids": ["x", 1]})
+        self.assertFalse(ser.is_valid())
+        body = FastJSONRenderer().render(ser.errors)
+        self.assertEqual(list(json.loads(body)["ids"]), ["0"])
+
+    def test_dumps_matches_stdlib_for_str_keys(self):
+        data = {"a": [1, 2], "b": {"c": None}}
+        self.assertEqual(json.loads(dumps(data)), data)
+
+
+_SQLITE_PAIR = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "replica_1": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
+
+
+@override_settings(DB_REPLICAS={**settings.DB_REPLICAS, "ALIASES": ["replica_1"], "PIN_CACHE": "default"})
+class ReplicaRouterTests(SimpleTestCase):
+    """Primaria + una réplica, ambas SQLite en memoria."""
+
+    def setUp(self):
+        patcher = mock.patch.object(db_router, "connections", ConnectionHandler(_SQLITE_PAIR))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        db_router._lag_checked.clear()
+        caches["default"].clear()
+        self.router = db_router.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def _request(self, method, user_id, body):
+        seen = []
+
+        def view(request):
+            db_router.set_request_user(user_id)
+            body(seen)
+            return None
+
+        db_router.ReplicaRoutingMiddleware(view)(self.factory.generic(method, "/"))
+        return seen
+
+    def _read(self, seen):
+        seen.append(self.router.db_for_read(Publication))
+
+    def _write_then_read(self, seen):
+        self._read(seen)
+        self.router.db_for_write(Publication)
+        self._read(seen)
+
+    def test_safe_methods_read_from_replica(self):
+        self.assertEqual(self._request("GET", 1, self._read), ["replica_1"])
+
+    def test_unsafe_methods_read_from_primary(self):
+        self.assertEqual(self._request("POST", 1, self._read), ["default"])
+
+    def test_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Publication), "default")
+
+    def test_write_pins_rest_of_request_and_next_requests_of_user(self):
+        self.assertEqual(self._request("GET", 1, self._write_then_read), ["replica_1", "default"])
+        self.assertEqual(self._request("GET", 1, self._read), ["default"])
+        self.assertEqual(self._request("GET", 2, self._read), ["replica_1"])
+
+    def test_lagging_replica_is_skipped(self):
+        with mock.patch.object(db_router, "_replica_lag", return_value=60.0):
+            self.assertEqual(self._request("GET", 1, self._read), ["default"])
+
+    def test_pin_cache_check_rejects_process_local_cache(self):
+        errors = db_router.check_pin_cache()
+        self.assertEqual([e.id for e in errors], ["core.E001"])
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://x"}}
+        with override_settings(CACHES=redis):
+            self.assertEqual(db_router.check_pin_cache(), [])
+
+
+class NotificationCounterCascadeTests(TestCase):
+    def setUp(self):
+        self.author, self.reader, self.other = (make_educator(n) for n in ("author", "reader", "other"))
+        self.pub = make_publication(self.author)
+        deliver([self.reader.id, self.other.id], self.author.id, NotificationKind.PUBLICATION, self.pub.id)
+        self.comment = Commentary.objects.create(educator=self.reader, publication=self.pub, content="c")
+        deliver([self.author.id], self.reader.id, NotificationKind.COMMENTARY, self.pub.id, self.comment.id)
+        other_pub = make_publication(self.other)
+        deliver([self.reader.id, self.author.id], self.other.id, NotificationKind.PUBLICATION, other_pub.id)
+
+    def assertCountersExact(self):
+        for counter in NotificationCounter.objects.all():
+            unread = Notification.objects.filter(recipient_id=counter.educator_id, is_read=False).count()
+            self.assertEqual(counter.unread, unread, counter.educator_id)
+
+    def test_deleting_commentary(self):
+        self.comment.delete()
+        self.assertCountersExact()
+        self.assertEqual(NotificationCounter.objects.get(educator=self.author).unread, 1)
+
+    def test_deleting_publication_with_commentaries(self):
+        self.pub.delete()
+        self.assertCountersExact()
+        self.assertEqual(NotificationCounter.objects.get(educator=self.reader).unread, 1)
+
+    def test_deleting_actor(self):
+        self.other.user.delete()
+        self.assertCountersExact()
+        self.assertEqual(NotificationCounter.objects.get(educator=self.reader).unread, 1)
+
+    def test_queryset_delete(self):
+        Publication.objects.filter(id=self.pub.id).delete()
+        self.assertCountersExact()
+
+    def test_unrelated_models_keep_fast_delete(self):
+        collector = Collector(using="default")
+        for model in (Notification, RefreshToken, IdempotencyKey, TrendingPublication):
+            self.assertTrue(collector.can_fast_delete(model.objects.all()), model.__name__)
+
+
+class VerifiedTokenCacheTests(SimpleTestCase):
+    def setUp(self):
+        verified_tokens.clear()
+        self.addCleanup(verified_tokens.clear)
+
+    def _token(self, user_id):
+        return generate_access_token(User(id=user_id, email=f"{user_id}@example.com", role="EDUCATOR"))
+
+    def test_hit_returns_copy_of_claims(self):
+        token = self._token(1)
+        first = decode_any_token(token)
+        first["sub"] = 99
+        self.assertEqual(decode_any_token(token)["sub"], 1)
+        self.assertEqual(len(verified_tokens), 1)
+
+    def test_revoke_user_only_evicts_that_users_entries(self):
+        mine, theirs = self._token(1), self._token(2)
+        decode_any_token(mine)
+        decode_any_token(theirs)
+        verified_tokens.revoke_user(1)
+        self.assertIsNone(verified_tokens.get(VerifiedTokenCache.digest(mine)))
+        self.assertIsNotNone(verified_tokens.get(VerifiedTokenCache.digest(theirs)))
+        # Igual que en un worker sin la entrada: se vuelve a verificar y sigue valiendo hasta exp
+        self.assertEqual(decode_any_token(mine)["sub"], 1)
+
+    def test_lru_is_bounded(self):
+        cache = VerifiedTokenCache(maxsize=2)
+        for user_id in (1, 2, 3):
+            cache.put(VerifiedTokenCache.digest(str(user_id)), {"sub": user_id, "exp": 2 ** 40})
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(VerifiedTokenCache.digest("1")))
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.me = make_educator("me")
+        self.pub = make_publication(self.me)
+        self.url = f"/api/commentary/me/{self.pub.id}"
+        self.client = Client()
+
+    def _post(self, key, content="hola", url=None, **headers):
+        return self.client.post(
+            url or self.url, {"content": content}, content_type="application/json",
+            headers={**auth_headers(self.me), idempotency.HEADER: key, **headers},
+        )
+
+    def _key_hash(self, key):
+        request = SimpleNamespace(user=self.me.user, method="POST", path=self.url)
+        return idempotency._key_hash(request, key)
+
+    def test_replay_returns_stored_response_without_running_handler(self):
+        first = self._post("k1")
+        second = self._post("k1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Commentary.objects.count(), 1)
+
+    def test_payload_mismatch_is_422(self):
+        self._post("k1")
+        self.assertEqual(self._post("k1", content="otro").status_code, 422)
+        self.assertEqual(Commentary.objects.count(), 1)
+
+    def test_claim_in_progress_is_409(self):
+        IdempotencyKey.objects.create(key_hash=self._key_hash("k1"), request_hash="x")
+        response = self._post("k1")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Commentary.objects.exists())
+
+    def test_abandoned_claim_is_recovered(self):
+        entry = IdempotencyKey.objects.create(key_hash=self._key_hash("k1"), request_hash="x")
+        old = timezone.now() - timedelta(seconds=settings.IDEMPOTENCY["LOCK_TIMEOUT"] + 1)
+        IdempotencyKey.objects.filter(id=entry.id).update(created_at=old)
+        self.assertEqual(self._post("k1").status_code, 201)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_errors_release_the_key(self):
+        self.assertEqual(self._post("k1", url="/api/commentary/me/999999").status_code, 404)
+        with mock.patch("core.views.Commentary.objects.create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self._post("k2")
+        self.assertFalse(IdempotencyKey.objects.filter(key_hash=self._key_hash("k2")).exists())
+        self.assertEqual(self._post("k2").status_code, 201)
+
+    def test_key_is_scoped_per_user(self):
+        self._post("k1")
+        other = make_educator("other")
+        response = self.client.post(
+            self.url, {"content": "hola"}, content_type="application/json",
+            headers={**auth_headers(other), idempotency.HEADER: "k1"},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response)
+
+    def test_signup_replay_issues_fresh_tokens_without_storing_them(self):
+        payload = {"email": "new@example.com", "name": "N", "password": "Secret123", "nick_name": "nuevo"}
+        post = lambda data: self.client.post(
+            "/api/auth/signup", data, content_type="application/json", headers={idempotency.HEADER: "s1"})
+        first = post(payload)
+        self.assertEqual(first.status_code, 201)
+        stored = IdempotencyKey.objects.get().response_body
+        self.assertNotIn(b"token", bytes(stored))
+        replay = post(payload)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay.json()["user"], first.json()["user"])
+        self.assertNotEqual(replay.json()["refresh_token"], first.json()["refresh_token"])
+        self.assertEqual(User.objects.filter(email="new@example.com").count(), 1)
+        self.assertEqual(post({**payload, "password": "otra"}).status_code, 422)
+
+
+class PublicationVersionedUpdateTests(TestCase):
+    def setUp(self):
+        self.me = make_educator("me")
+        self.pub = make_publication(self.me)
+        self.url = f"/api/publication/me/update/{self.pub.id}"
+        self.client = Client()
+
+    def _put(self, data, **headers):
+        return self.client.put(self.url, data, content_type="application/json",
+                               headers={**auth_headers(self.me), **headers})
+
+    def test_stale_version_is_409_with_current_version(self):
+        self.assertEqual(self._put({"title": "a", "version": 1}).status_code, 200)
+        response = self._put({"title": "b", "version": 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["version"], 2)
+        self.pub.refresh_from_db()
+        self.assertEqual((self.pub.title, self.pub.version), ("a", 2))
+
+    def test_if_match_header(self):
+        self.assertEqual(self._put({"title": "a"}, **{"If-Match": 'W/"1"'}).status_code, 200)
+        self.assertEqual(self._put({"title": "b"}, **{"If-Match": '"1"'}).status_code, 409)
+        self.assertEqual(self._put({"title": "b"}, **{"If-Match": "2"}).status_code, 200)
+        self.assertEqual(self._put({"title": "c"}, **{"If-Match": "abc"}).status_code, 400)
+
+    def test_without_version_uses_the_one_read(self):
+        response = self._put({"title": "a", "content": "<p>nuevo</p>"})
+        self.assertEqual(response.status_code, 200)
+        self.pub.refresh_from_db()
+        self.assertEqual((self.pub.title, self.pub.content, self.pub.version), ("a", "<p>nuevo</p>", 2))
+
+    def test_failed_file_write_rolls_back(self):
+        Publication.objects.filter(id=self.pub.id).update(content_url="publications/1.html", content=None)
+        with mock.patch("core.views.update_publication_html", return_value="disco lleno") as write:
+            response = self._put({"title": "a", "content": "<p>nuevo</p>", "version": 1})
+        write.assert_called_once()
+        self.assertEqual(response.status_code, 500)
+        self.pub.refresh_from_db()
+        self.assertEqual((self.pub.title, self.pub.version), ("t", 1))
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.folder = Path(tmp.name)
+        override = override_settings(METRICS={**settings.METRICS, "ENABLED": True, "MULTIPROCESS_DIR": tmp.name})
+        override.enable()
+        self.addCleanup(override.disable)
+        self.registry = metrics.MetricsRegistry()
+        self.registry.start_flusher = lambda: None  # sin hilo ni atexit en los tests
+        self.counter = self.registry.counter("jobs_total", "Jobs.", ["kind"])
+        self.gauge = self.registry.gauge("busy", "Busy.")
+        self.counter.inc(kind="a")
+
+    def _dead_pid(self):
+        proc = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+        return int(proc.stdout)
+
+    def _worker_file(self, pid, start, jobs):
+        other = metrics.MetricsRegistry()
+        other.counter("jobs_total", "Jobs.", ["kind"]).inc(jobs, kind="a")
+        other.gauge("busy", "Busy.").set(7)
+        path = self.folder / f"metrics_{pid}_{start}.json"
+        path.write_text(json.dumps({"pid": pid, "metrics": other.snapshot()}))
+        return path
+
+    def _jobs(self):
+        return self.registry.collect()["jobs_total"]["values"][json.dumps(["a"])]
+
+    def test_request_does_not_write_to_disk(self):
+        middleware = metrics.MetricsMiddleware(lambda request: mock.Mock(status_code=200))
+        with mock.patch.object(metrics.registry, "flush") as flush, \
+                mock.patch.object(metrics.threading, "Thread") as thread, \
+                mock.patch.object(metrics.atexit, "register"), \
+                mock.patch.object(metrics.registry, "_flusher_pid", None):
+            middleware(RequestFactory().get("/"))
+            middleware(RequestFactory().get("/"))
+        flush.assert_not_called()
+        thread.return_value.start.assert_called_once()
+
+    def test_dead_worker_is_folded_once(self):
+        path = self._worker_file(self._dead_pid(), 1, jobs=5)
+        self.assertEqual(self._jobs(), 6)
+        self.assertFalse(path.exists())
+        self.assertTrue((self.folder / metrics.AGGREGATE_FILE).exists())
+        self.assertEqual(self._jobs(), 6)
+        # Los gauges del muerto no se suman
+        self.assertEqual(self.registry.collect()["busy"]["values"], {})
+
+    def test_live_worker_is_not_folded(self):
+        path = self._worker_file(os.getppid(), metrics._process_start(os.getppid()) or 1, jobs=5)
+        self.assertEqual(self._jobs(), 6)
+        self.assertTrue(path.exists())
+
+    def test_reused_pid_is_folded(self):
+        start = metrics._process_start(os.getpid())
+        if start is None:
+            self.skipTest("sin /proc")
+        path = self._worker_file(os.getpid(), start - 1, jobs=5)
+        self.assertEqual(self._jobs(), 6)
+        self.assertFalse(path.exists())
+
+
+class FollowGraphTests(TestCase):
+    EDGES = [(0, 1), (0, 2), (1, 3), (1, 4), (2, 3), (2, 5), (3, 0), (4, 0), (4, 5), (5, 6), (6, 1), (7, 1), (7, 3)]
+
+    def setUp(self):
+        self.eds = [make_educator(f"e{i}") for i in range(9)]
+        for a, b in self.EDGES:
+            self._follow(a, b)
+        self.graph = follow_graph.FollowGraph()
+        self.graph.rebuild()
+
+    def _follow(self, a, b):
+        Subscription.objects.create(subscriber=self.eds[a], subscribed=self.eds[b])
+
+    def assertMatchesDb(self, scored_only=False):
+        for edu in self.eds:
+            for k in (2, 5, 20):
+                graph, db = self.graph.suggestions(edu.id, k), follow_graph.suggestions_db(edu.id, k)
+                if scored_only:
+                    graph, db = [r for r in graph if r[1]], [r for r in db if r[1]]
+                self.assertEqual(graph, db, (edu.nick_name, k))
+
+    def test_graph_matches_orm(self):
+        self.assertMatchesDb()
+
+    def test_delta_matches_orm(self):
+        self._follow(8, 0)
+        self.graph.add(self.eds[8].id, self.eds[0].id)
+        Subscription.objects.filter(subscriber=self.eds[2], subscribed=self.eds[3]).delete()
+        self.graph.remove(self.eds[2].id, self.eds[3].id)
+        # El relleno por popularidad se recalcula recién en la reconstrucción
+        self.assertMatchesDb(scored_only=True)
+
+    def test_first_request_does_not_build_synchronously(self):
+        graph = follow_graph.FollowGraph()
+        with mock.patch.object(follow_graph.threading, "Thread") as thread, \
+                mock.patch.object(graph, "rebuild") as rebuild:
+            result = graph.suggestions(self.eds[0].id, 5)
+            graph.suggestions(self.eds[0].id, 5)
+        rebuild.assert_not_called()
+        thread.return_value.start.assert_called_once()  # la segunda no lanza otra: hay una en curso
+        self.assertEqual(result, follow_graph.suggestions_db(self.eds[0].id, 5))
+
+    def test_stale_graph_keeps_serving_while_rebuilding(self):
+        self.graph._built_at -= settings.FOLLOW_SUGGESTIONS["REFRESH_SECONDS"] + 1
+        with mock.patch.object(follow_graph.threading, "Thread") as thread:
+            result = self.graph.suggestions(self.eds[0].id, 5)
+        thread.return_value.start.assert_called_once()
+        self.assertEqual(result, follow_graph.suggestions_db(self.eds[0].id, 5))
+
+
+class ParseByteRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        cases = {
+            "bytes=2-5": (2, 5),
+            "bytes=4-": (4, 9),
+            "bytes=2-100": (2, 9),
+            "bytes=-3": (7, 9),
+            "bytes=-20": (0, 9),
+        }
+        for header, expected in cases.items():
+            self.assertEqual(parse_byte_range(header, 10), expected, header)
+
+    def test_unusable_ranges_are_ignored(self):
+        for header in (None, "", "items=0-1", "bytes=0-1,4-5"):
+            self.assertIsNone(parse_byte_range(header, 10), header)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=10-", "bytes=5-2", "bytes=-0", "bytes=a-b", "bytes=-"):
+            with self.assertRaises(ValueError, msg=header):
+                parse_byte_range(header, 10)
+
+    def test_file_range_reads_only_its_length(self):
+        with tempfile.TemporaryFile() as fh:
+            fh.write(b"0123456789")
+            fh.seek(3)
+            part = _FileRange(fh, 4)
+            self.assertEqual(part.fileno(), fh.fileno())
+            self.assertEqual(part.read(3) + part.read() + part.read(), b"3456")
+
+
+class PublicationContentRangeTests(TestCase):
+    BODY = b"<p>0123456789abcdef</p>"
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media.name,
+            PUBLICATION_STORAGE={**settings.PUBLICATION_STORAGE, "SERVE": "django"},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        (Path(media.name) / "publications").mkdir()
+        (Path(media.name) / "publications" / "p.html").write_bytes(self.BODY)
+        self.me = make_educator("me")
+        self.pub = Publication.objects.create(
+            educator=self.me, title="t", publication_type="ARTICLE", content_url="publications/p.html")
+        self.url = f"/api/publications/{self.pub.id}/content"
+
+    def _get(self, **headers):
+        response = Client().get(self.url, headers={**auth_headers(self.me), **headers})
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_response_advertises_ranges(self):
+        response, body = self._get()
+        self.assertEqual((response.status_code, body), (200, self.BODY))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_closed_open_and_suffix_ranges(self):
+        size = len(self.BODY)
+        for header, start, end in (("bytes=3-6", 3, 6), ("bytes=10-", 10, size - 1), ("bytes=-4", size - 4, size - 1)):
+            response, body = self._get(Range=header)
+            self.assertEqual(response.status_code, 206, header)
+            self.assertEqual(body, self.BODY[start:end + 1], header)
+            self.assertEqual(response["Content-Range"], f"bytes {start}-{end}/{size}")
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+
+    def test_unsatisfiable_range_is_416(self):
+        response, _ = self._get(Range=f"bytes={len(self.BODY)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(self.BODY)}")
+
+    def test_multi_range_falls_back_to_full_body(self):
+        response, body = self._get(Range="bytes=0-1,4-5")
+        self.assertEqual((response.status_code, body), (200, self.BODY))
+
+    def test_if_range(self):
+        etag = self._get()[0]["ETag"]
+        response, body = self._get(Range="bytes=0-2", **{"If-Range": '"otro"'})
+        self.assertEqual((response.status_code, body), (200, self.BODY))
+        response, body = self._get(Range="bytes=0-2", **{"If-Range": etag})
+        self.assertEqual((response.status_code, body), (206, self.BODY[:3]))
+
+
+def image_bytes(fmt, size=(4, 4)):
+    from PIL import Image as PILImage
+    buf = io.BytesIO()
+    PILImage.new("RGB", size).save(buf, fmt)
+    return buf.getvalue()
+
+
+def png_bytes():
+    return image_bytes("PNG")
+
+
+class ResumableUploadTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=os.path.join(tmp.name, "media"),
+            UPLOAD_SESSIONS={**settings.UPLOAD_SESSIONS, "TEMP_DIR": os.path.join(tmp.name, "parts"), "MAX_CHUNK": 64},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.data = png_bytes()
+        me = make_educator("me")
+        self.session = UploadSession.objects.create(
+            user=me.user, publication=make_publication(me), filename="a.png", total_size=len(self.data))
+
+    def _append(self, offset, data, length=None):
+        return append_chunk(self.session, offset, io.BytesIO(data), len(data) if length is None else length)
+
+    def _upload_from(self, offset):
+        while offset < len(self.data):
+            offset = self._append(offset, self.data[offset:offset + 64])
+
+    def test_out_of_order_offset_is_conflict(self):
+        self._append(0, self.data[:10])
+        with self.assertRaises(UploadConflict) as ctx:
+            self._append(20, self.data[20:30])
+        self.assertEqual(ctx.exception.received, 10)
+        with self.assertRaises(UploadConflict):
+            self._append(0, self.data[:10])  # reenviar un chunk ya confirmado
+
+    def test_retry_after_cut_discards_unconfirmed_bytes(self):
+        # El cliente declaró 30 bytes y cortó tras 12: se confirma lo recibido
+        self.assertEqual(self._append(0, self.data[:12], length=30), 12)
+        with open(self.session.part_path, "ab") as fh:
+            fh.write(b"basura de un intento anterior")
+        self._upload_from(12)
+        with open(self.session.part_path, "rb") as fh:
+            self.assertEqual(fh.read(), self.data)
+
+    def test_size_and_chunk_limits(self):
+        with self.assertRaises(ValueError):
+            self._append(0, self.data + b"x")
+        with self.assertRaises(ValueError):
+            self._append(0, b"x" * 65)
+
+    def test_concurrent_append_is_conflict(self):
+        os.makedirs(settings.UPLOAD_SESSIONS["TEMP_DIR"], exist_ok=True)
+        with open(self.session.part_path, "ab") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            with self.assertRaises(UploadConflict):
+                self._append(0, self.data[:10])
+
+    def test_finalize_requires_complete_upload_and_runs_once(self):
+        self._append(0, self.data[:10])
+        with self.assertRaises(UploadConflict):
+            finalize(self.session)
+        self._upload_from(10)
+        stale = UploadSession.objects.get(id=self.session.id)
+        image = finalize(self.session)
+        self.assertEqual(Image.objects.get().id, image.id)
+        self.assertFalse(os.path.exists(self.session.part_path))
+        with self.assertRaises(UploadConflict):
+            finalize(stale)
+        self.assertEqual(Image.objects.count(), 1)
+
+
+@override_settings(TRENDING={
+    **settings.TRENDING, "HALF_LIFE_HOURS": 1, "WINDOW_HOURS": 24, "OVERLAP_SECONDS": 300,
+    "FOLLOWER_WEIGHT": 0, "MIN_COMMENT_SCORE": 0.05, "MAX_ROWS": 1000,
+})
+class TrendingTests(TestCase):
+    def setUp(self):
+        self.me = make_educator("me")
+        self.pubs = [make_publication(self.me, f"p{i}") for i in range(3)]
+        self.t0 = timezone.now()
+
+    def _comment(self, pub, at):
+        comment = Commentary.objects.create(educator=self.me, publication=pub, content="c")
+        Commentary.objects.filter(id=comment.id).update(created_at=at)
+        return comment
+
+    def _score(self, pub):
+        return TrendingPublication.objects.get(publication=pub).comment_score
+
+    def test_first_run_only_counts_window(self):
+        self._comment(self.pubs[0], self.t0 - timedelta(hours=1))
+        self._comment(self.pubs[1], self.t0 - timedelta(hours=48))
+        result = update_trending(now=self.t0)
+        self.assertEqual(result["new_comments"], 1)
+        self.assertAlmostEqual(self._score(self.pubs[0]), 0.5)
+        self.assertFalse(TrendingPublication.objects.filter(publication=self.pubs[1]).exists())
+
+    def test_incremental_run_decays_and_adds_new_comments(self):
+        self._comment(self.pubs[0], self.t0)
+        update_trending(now=self.t0)
+        self._comment(self.pubs[0], self.t0 + timedelta(hours=2))
+        update_trending(now=self.t0 + timedelta(hours=2))
+        # Igual a recalcular desde cero: 0.5 ** 2 + 1
+        self.assertAlmostEqual(self._score(self.pubs[0]), 1.25)
+
+    def test_overlap_counts_late_commit_once(self):
+        first = self._comment(self.pubs[0], self.t0)
+        late = self._comment(self.pubs[0], self.t0)
+        Commentary.objects.filter(id=late.id).delete()  # todavía sin commitear en la primera corrida
+        self._comment(self.pubs[0], self.t0)
+        update_trending(now=self.t0 + timedelta(seconds=1))
+        self.assertGreater(TrendingState.objects.get().last_commentary_id, late.id)
+
+        Commentary.objects.create(id=late.id, educator=self.me, publication=self.pubs[0], content="c")
+        Commentary.objects.filter(id=late.id).update(created_at=self.t0)
+        later = self.t0 + timedelta(seconds=60)
+        self.assertEqual(update_trending(now=later)["new_comments"], 1)
+        self.assertEqual(update_trending(now=later + timedelta(seconds=60))["new_comments"], 0)
+        expected = 3 * decay((later + timedelta(seconds=60) - self.t0).total_seconds())
+        self.assertAlmostEqual(self._score(self.pubs[0]), expected)
+        self.assertIn(first.id, TrendingState.objects.get().recent_commentary_ids)
+
+    def test_pruning(self):
+        for _ in range(3):
+            self._comment(self.pubs[0], self.t0)
+        self._comment(self.pubs[1], self.t0)
+        self._comment(self.pubs[2], self.t0 - timedelta(hours=5))  # 0.5 ** 5 < MIN_COMMENT_SCORE
+        with override_settings(TRENDING={**settings.TRENDING, "MAX_ROWS": 1}):
+            result = update_trending(now=self.t0)
+        self.assertEqual(result["pruned"], 2)
+        self.assertEqual(list(TrendingPublication.objects.values_list("publication_id", flat=True)), [self.pubs[0].id])
+        # Sin comentarios nuevos, el decaimiento termina sacándola
+        update_trending(now=self.t0 + timedelta(hours=10))
+        self.assertFalse(TrendingPublication.objects.exists())
+
+
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        override = override_settings(PROFILING={
+            **settings.PROFILING, "ENABLED": True, "DIR": tmp.name, "SAMPLE_RATE": 0, "MODE": "cprofile", "MAX_FILES": 2,
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = auth_headers(make_educator("admin", role="ADMIN"))
+        self.client = Client()
+
+    def _profiled(self, headers=None):
+        return self.client.get("/api/educator?offset=0&limit=1", headers={**(headers or self.admin), "X-Profile": "1"})
+
+    def test_admin_request_is_profiled_and_listed(self):
+        name = self._profiled()["X-Profile-Id"]
+        listed = self.client.get("/api/admin/profiles", headers=self.admin).json()
+        self.assertEqual([p["name"] for p in listed], [name])
+        summary = self.client.get(f"/api/admin/profiles/{name}/summary?limit=5", headers=self.admin)
+        self.assertEqual(summary.status_code, 200)
+        self.assertLessEqual(len(summary.json()["functions"]), 5)
+        download = self.client.get(f"/api/admin/profiles/{name}", headers=self.admin)
+        self.assertEqual(download.status_code, 200)
+
+    def test_non_admin_header_is_ignored(self):
+        response = self._profiled(auth_headers(make_educator("someone")))
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(os.listdir(self.dir), [])
+
+    def test_keeps_only_max_files(self):
+        for _ in range(3):
+            self._profiled()
+        self.assertEqual(len([f for f in os.listdir(self.dir) if f.endswith(".prof")]), 2)
+
+    def test_invalid_names_and_limits(self):
+        self.assertEqual(self.client.get("/api/admin/profiles/..%2Fsecret.prof", headers=self.admin).status_code, 404)
+        for limit in ("-1", "0", "x"):
+            self.assertEqual(self.client.get(f"/api/admin/profiles?limit={limit}", headers=self.admin).status_code, 400)
+
+    def test_save_failure_is_logged(self):
+        with mock.patch("core.profiling.save_profile", side_effect=OSError("disco lleno")), \
+                self.assertLogs("core.profiling", "ERROR"):
+            response = self._profiled()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.pool = ConnectionPool("test", {"MAX_SIZE": 2, "TIMEOUT": 0.05, "CHECK_IDLE_AFTER": 0, "MAX_IDLE": 300})
+        self.usable = True
+
+    def _acquire(self):
+        return self.pool.acquire(_FakeConnection, lambda conn: self.usable)
+
+    def test_released_connection_is_reused(self):
+        conn = self._acquire()
+        self.pool.release(conn)
+        self.assertIs(self._acquire(), conn)
+        self.assertEqual(self.pool.stats["created"], 1)
+
+    def test_exhausted_pool_times_out(self):
+        self._acquire(), self._acquire()
+        with self.assertRaises(OperationalError):
+            self._acquire()
+        self.assertEqual(self.pool.stats["timeouts"], 1)
+
+    def test_unusable_or_closed_connections_are_discarded(self):
+        first, second = self._acquire(), self._acquire()
+        second.close()
+        self.pool.release(first)
+        self.pool.release(second)
+        self.usable = False
+        fresh = self._acquire()
+        self.assertNotIn(fresh, (first, second))
+        self.assertTrue(first.closed)
+        self.assertEqual(self.pool.in_use, 1)
+
+    def test_failed_connect_frees_the_slot(self):
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire(mock.Mock(side_effect=RuntimeError), lambda conn: True)
+        self._acquire(), self._acquire()
+        self.assertEqual(self.pool.in_use, 2)
+
+    def test_idle_connections_expire(self):
+        conn = self._acquire()
+        self.pool.release(conn)
+        self.pool.options["MAX_IDLE"] = -1
+        self.assertIsNot(self._acquire(), conn)
+        self.assertTrue(conn.closed)
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        self.alice = make_educator("alice")
+        self.bob = make_educator("bob")
+        Subscription.objects.create(subscriber=self.alice, subscribed=self.bob)
+        self.pub = make_publication(self.bob, title="Álgebra")
+        make_publication(self.alice, title="Geometría")
+        Commentary.objects.create(publication=self.pub, educator=self.alice, content="bien")
+        self.headers = auth_headers(self.alice)
+
+    def assertSameAsSync(self, path):
+        sync = self.client.get("/api/" + path, headers=self.headers)
+        asynchronous = self.client.get("/api/async/" + path, headers=self.headers)
+        self.assertEqual(sync.status_code, 200)
+        self.assertEqual(asynchronous.status_code, 200)
+        self.assertEqual(json.loads(asynchronous.content), json.loads(sync.content))
+
+    def test_matches_drf_views(self):
+        self.assertSameAsSync("educator?offset=0&limit=10")
+        self.assertSameAsSync("publication?offset=0&limit=10")
+        self.assertSameAsSync(f"publications/{self.pub.id}")
+        self.assertSameAsSync("publication/search?title_part=lgeb&offset=0&limit=10")
+
+    def test_requires_authentication(self):
+        response = self.client.get("/api/async/publication?offset=0&limit=10")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+    def test_missing_publication(self):
+        response = self.client.get("/api/async/publications/999999", headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    async def test_served_through_async_middleware_chain(self):
+        response = await self.async_client.get(f"/api/async/publications/{self.pub.id}", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["comments"][0]["content"], "bien")
+
+    def test_middlewares_stay_async_under_asgi(self):
+        async def get_response(request):
+            return None
+
+        for dotted in ("core.metrics.MetricsMiddleware", "core.db_router.ReplicaRoutingMiddleware",
+                       "core.throttling.LoadSheddingMiddleware", "core.profiling.RequestProfilerMiddleware"):
+            with self.subTest(dotted):
+                self.assertTrue(iscoroutinefunction(import_string(dotted)(get_response)))
+
+
+class PublicationCompressionTests(TestCase):
+    HTML = "<p>" + "contenido comprimido " * 50 + "</p>"
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media.name,
+            PUBLICATION_STORAGE={**settings.PUBLICATION_STORAGE, "BACKEND": "file", "COMPRESSION": "gzip", "SERVE": "django"},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.me = make_educator("me")
+        self.pub = Publication.objects.create(
+            educator=self.me, title="t", publication_type="ARTICLE", content_url=save_publication_html(self.HTML))
+        self.url = f"/api/publications/{self.pub.id}/content"
+
+    def _get(self, **headers):
+        response = Client().get(self.url, headers={**auth_headers(self.me), **headers})
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_stored_gzipped_and_round_trips(self):
+        path = publication_path(self.pub.content_url)
+        self.assertEqual(path.suffix, ".gz")
+        self.assertEqual(gzip.decompress(path.read_bytes()).decode(), self.HTML)
+        self.assertEqual(update_publication_html(self.pub.content_url, "<p>nuevo</p>"), "ok")
+        self.assertEqual(get_publication_html(self.pub.content_url), "<p>nuevo</p>")
+
+    def test_served_as_stored_when_accepted(self):
+        response, body = self._get(**{"Accept-Encoding": "gzip, br"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body).decode(), self.HTML)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_decoded_when_not_accepted(self):
+        accepted_etag = self._get(**{"Accept-Encoding": "gzip"})[0]["ETag"]
+        for header in ({}, {"Accept-Encoding": "identity"}, {"Accept-Encoding": "br, zstd;q=0"}):
+            response, body = self._get(**header)
+            self.assertEqual(response.status_code, 200, header)
+            self.assertFalse(response.has_header("Content-Encoding"), header)
+            self.assertEqual(body.decode(), self.HTML, header)
+            self.assertNotEqual(response["ETag"], accepted_etag, header)
+
+
+class ImageBatchUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media = Path(media.name)
+        self.me = make_educator("me")
+        self.pub = make_publication(self.me)
+
+    def _post(self, *files, publication_id=None):
+        uploads = [SimpleUploadedFile(name, data) for name, data in files]
+        return Client().post(
+            "/api/upload/batch", {"publication_id": publication_id or self.pub.id, "files": uploads},
+            headers=auth_headers(self.me),
+        )
+
+    def test_all_valid_is_created_and_renamed(self):
+        response = self._post(("a.png", png_bytes()), ("b.png", png_bytes()))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 2)
+        for image in Image.objects.filter(publication=self.pub):
+            self.assertEqual(image.file.name, f"images/{image.id}.png")
+            self.assertTrue(image.url.endswith(f"images/{image.id}.png"))
+            self.assertTrue((self.media / image.file.name).is_file())
+        self.assertEqual(Image.objects.filter(publication=self.pub).count(), 2)
+
+    def test_mixed_is_multi_status_in_request_order(self):
+        response = self._post(("a.txt", b"no es imagen"), ("b.png", png_bytes()))
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([(r["index"], r["name"], r["ok"]) for r in results], [(0, "a.txt", False), (1, "b.png", True)])
+        self.assertIn("error", results[0])
+        self.assertEqual(Image.objects.filter(publication=self.pub).count(), 1)
+
+    def test_none_valid_is_400_without_rows_or_files(self):
+        response = self._post(("a.txt", b"x"), ("b.txt", b"y"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Image.objects.exists())
+        self.assertEqual([p for p in self.media.rglob("*") if p.is_file()], [])
+
+    def test_rejects_too_many_files_and_unknown_publication(self):
+        with override_settings(UPLOAD_BATCH={**settings.UPLOAD_BATCH, "MAX_FILES": 1}):
+            self.assertEqual(self._post(("a.png", png_bytes()), ("b.png", png_bytes())).status_code, 400)
+        self.assertEqual(self._post(("a.png", png_bytes()), publication_id=999999).status_code, 404)
+        self.assertFalse(Image.objects.exists())
+
+
+class ImageValidationTests(SimpleTestCase):
+    def test_sniffs_format_from_header(self):
+        for fmt in ("PNG", "JPEG", "GIF", "WEBP", "BMP"):
+            with self.subTest(fmt):
+                self.assertEqual(sniff_format(image_bytes(fmt)[:HEADER_SIZE]), fmt)
+        self.assertIsNone(sniff_format(b"RIFF\x00\x00\x00\x00WAVEfmt "))
+        self.assertIsNone(sniff_format(b"<html>"))
+
+    def test_reads_dimensions_and_rewinds(self):
+        fh = io.BytesIO(image_bytes("PNG", (7, 3)))
+        fh.seek(5)
+        self.assertEqual(inspect_image(fh), ("PNG", 7, 3))
+        self.assertEqual(fh.tell(), 0)
+
+    def test_limits(self):
+        limits = settings.IMAGE_UPLOAD
+        cases = (
+            ({**limits, "MAX_BYTES": 10}, image_bytes("PNG"), "bytes"),
+            ({**limits, "MAX_PIXELS": 15}, image_bytes("PNG"), "píxeles"),
+            ({**limits, "ALLOWED_FORMATS": ["PNG"]}, image_bytes("BMP"), "BMP"),
+        )
+        for conf, data, message in cases:
+            with self.subTest(message), override_settings(IMAGE_UPLOAD=conf):
+                with self.assertRaisesMessage(ImageValidationError, message):
+                    inspect_image(io.BytesIO(data))
+
+    def test_rejects_truncated_or_spoofed_files(self):
+        for data in (b"no es imagen", image_bytes("PNG")[:HEADER_SIZE], b"\x89PNG\r\n\x1a\n" + b"\x00" * 32):
+            with self.subTest(data[:12]), self.assertRaises(ImageValidationError):
+                inspect_image(io.BytesIO(data))
+
+    def test_does_not_decode_pixels(self):
+        # Cabecera válida y datos corruptos: la validación solo mira el header
+        data = bytearray(image_bytes("PNG", (5, 5)))
+        data[-20:-12] = b"\x00" * 8
+        self.assertEqual(inspect_image(io.BytesIO(bytes(data))), ("PNG", 5, 5))
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        self.me = make_educator("me")
+        throttling.store.clear()  # auth/login tiene throttle_scope
+
+    def _login(self):
+        response = Client().post("/api/auth/login", {"email": "me@example.com", "password": "secret"},
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["refresh_token"]
+
+    def _refresh(self, token):
+        return Client().post("/api/auth/refresh", {"refresh_token": token}, content_type="application/json")
+
+    def test_stores_only_the_hash(self):
+        token = self._login()
+        row = RefreshToken.objects.get(user=self.me.user)
+        self.assertEqual(row.token_hash, hash_refresh(token))
+
+    def test_rotation_invalidates_previous_token(self):
+        first = self._login()
+        response = self._refresh(first)
+        self.assertEqual(response.status_code, 200)
+        second = response.json()["refresh_token"]
+        self.assertNotEqual(second, first)
+        self.assertEqual(self._refresh(first).status_code, 401)  # reutilizar el rotado
+        self.assertEqual(self._refresh(second).status_code, 200)
+        self.assertEqual(RefreshToken.objects.filter(user=self.me.user).count(), 1)
+
+    def test_expired_token_is_rejected_and_consumed(self):
+        token = self._login()
+        RefreshToken.objects.update(expiry_date=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self._refresh(token).json()["detail"], "Refresh token expirado")
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_logout_revokes_only_that_session(self):
+        kept, revoked = self._login(), self._login()
+        response = Client().post("/api/auth/logout", {"refresh_token": revoked}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._refresh(revoked).status_code, 401)
+        self.assertEqual(self._refresh(kept).status_code, 200)
+
+    def test_max_sessions_keeps_most_recent(self):
+        with override_settings(JWT_CONFIG={**settings.JWT_CONFIG, "REFRESH_MAX_SESSIONS": 2}):
+            tokens = [generate_and_store_refresh(self.me.user)[0] for _ in range(3)]
+        self.assertEqual(
+            set(RefreshToken.objects.values_list("token_hash", flat=True)), {hash_refresh(t) for t in tokens[1:]})
+
+    def test_purge_deletes_only_expired_in_batches(self):
+        now = timezone.now()
+        for days in (-3, -2, -1, 1):
+            RefreshToken.objects.create(user=self.me.user, token_hash=f"{days:+}".ljust(64, "0"),
+                                        expiry_date=now + timedelta(days=days))
+        out = io.StringIO()
+        call_command("purge_refresh_tokens", batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().strip(), "Refresh tokens expirados borrados: 3")
+        self.assertEqual(list(RefreshToken.objects.values_list("expiry_date", flat=True)), [now + timedelta(days=1)])
+
+
+class PasswordVerificationTests(TestCase):
+    def setUp(self):
+        self.me = make_educator("me")
+
+    def _set_hash(self, encoded):
+        User.objects.filter(id=self.me.user.id).update(password=encoded)
+        self.me.user.refresh_from_db()
+
+    def test_legacy_hash_is_upgraded_on_success_only(self):
+        legacy = make_password("secret", hasher="pbkdf2_sha1")
+        self._set_hash(legacy)
+        self.assertFalse(verify_user_password(self.me.user, "otro"))
+        self.assertEqual(User.objects.get(id=self.me.user.id).password, legacy)
+        self.assertTrue(verify_user_password(self.me.user, "secret"))
+        stored = User.objects.get(id=self.me.user.id).password
+        self.assertEqual(identify_hasher(stored).algorithm, get_hasher("default").algorithm)
+        self.assertTrue(check_password("secret", stored))
+
+    def test_empty_password_skips_the_pool(self):
+        with mock.patch.object(passwords.verifier, "verify") as verify:
+            self.assertFalse(verify_user_password(self.me.user, ""))
+        verify.assert_not_called()
+
+    def test_full_pool_answers_503(self):
+        with mock.patch.object(passwords.verifier._slots, "acquire", return_value=False):
+            response = Client().post("/api/auth/login", {"email": "me@example.com", "password": "secret"},
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(settings.PASSWORD_VERIFY["RETRY_AFTER"]))
+        self.assertFalse(RefreshToken.objects.exists())
+
+    def test_admin_form_accepts_only_current_hashes(self):
+        data = {"name": "nuevo", "email": "nuevo@example.com", "role": "EDUCATOR"}
+        cases = (
+            ("texto plano", True),
+            (make_password("x"), True),
+            (make_password("x", hasher="pbkdf2_sha1"), False),
+        )
+        for pwd, valid in cases:
+            with self.subTest(pwd[:20]):
+                self.assertEqual(UserAdminForm(data={**data, "password": pwd}).is_valid(), valid)
+        # Sin tocar el campo se conserva el hash guardado aunque sea viejo
+        self._set_hash(make_password("secret", hasher="pbkdf2_sha1"))
+        form = UserAdminForm(
+            data={"name": "me", "email": "me@example.com", "role": "EDUCATOR", "password": self.me.user.password},
+            instance=self.me.user,
+        )
+        self.assertTrue(form.is_valid())
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        throttling.store.clear()
+        self.addCleanup(throttling.store.clear)
+        self.factory = RequestFactory()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate("60/min"), (60, 1.0))
+        self.assertEqual(throttling.parse_rate("10/ S"), (10, 10.0))
+        self.assertIsNone(throttling.parse_rate(""))
+
+    def test_bucket_bursts_then_refills(self):
+        bucket = throttling.MemoryBucketStore(max_keys=10)
+        with mock.patch.object(throttling.time, "monotonic", return_value=100.0) as clock:
+            self.assertEqual([bucket.consume("k", 2, 0.5)[0] for _ in range(3)], [True, True, False])
+            self.assertAlmostEqual(bucket.consume("k", 2, 0.5)[1], 2.0)
+            clock.return_value = 102.0
+            self.assertTrue(bucket.consume("k", 2, 0.5)[0])
+            self.assertFalse(bucket.consume("k", 2, 0.5)[0])
+
+    def test_bucket_evicts_least_recent_keys(self):
+        bucket = throttling.MemoryBucketStore(max_keys=2)
+        for key in ("a", "b", "a", "c"):
+            bucket.consume(key, 1, 1)
+        self.assertEqual(list(bucket._buckets), ["a", "c"])
+
+    def test_login_is_limited_per_ip_with_retry_after(self):
+        scopes = {**settings.RATE_LIMITS["SCOPES"], "login": "2/min"}
+        body = {"email": "nadie@example.com", "password": "x"}
+        with override_settings(RATE_LIMITS={**settings.RATE_LIMITS, "SCOPES": scopes}):
+            codes = [Client(REMOTE_ADDR="10.0.0.1").post("/api/auth/login", body).status_code for _ in range(2)]
+            limited = Client(REMOTE_ADDR="10.0.0.1").post("/api/auth/login", body)
+            other_ip = Client(REMOTE_ADDR="10.0.0.2").post("/api/auth/login", body)
+        self.assertEqual(codes, [401, 401])
+        self.assertEqual(limited.status_code, 429)
+        self.assertEqual(limited["Retry-After"], "30")
+        self.assertEqual(other_ip.status_code, 401)
+
+    def test_ident_ignores_forwarded_for_without_proxies(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="1.2.3.4, 10.0.0.9")
+        throttle = throttling.TokenBucketThrottle()
+        self.assertEqual(throttle.get_ident(request), "10.0.0.1")
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            self.assertEqual(throttle.get_ident(request), "10.0.0.9")
+
+    def test_authenticated_clients_are_keyed_by_user(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        request.user = SimpleNamespace(is_authenticated=True, id=7)
+        self.assertEqual(throttling.TokenBucketThrottle().get_cache_key(request, "search"), "search:user:7")
+
+
+class LoadSheddingTests(SimpleTestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.middleware = throttling.LoadSheddingMiddleware(lambda request: HttpResponse("ok"))
+
+    def _view(self, scope):
+        view = lambda request: None  # noqa: E731
+        view.view_class = type("View", (), {"throttle_scope": scope})
+        return view
+
+    def test_sheds_over_global_limit(self):
+        conf = {**settings.LOAD_SHEDDING, "MAX_IN_FLIGHT": 1}
+        with override_settings(LOAD_SHEDDING=conf):
+            self.assertEqual(self.middleware(self.request).status_code, 200)
+            self.middleware.in_flight = 1
+            response = self.middleware(self.request)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(conf["RETRY_AFTER"]))
+
+    def test_sheds_over_scope_limit_and_releases(self):
+        conf = {**settings.LOAD_SHEDDING, "SCOPES": {"search": 1}}
+        with override_settings(LOAD_SHEDDING=conf):
+            self.assertIsNone(self.middleware.process_view(self.request, self._view("search"), (), {}))
+            other = RequestFactory().get("/")
+            self.assertEqual(self.middleware.process_view(other, self._view("search"), (), {}).status_code, 503)
+            self.assertIsNone(self.middleware.process_view(other, self._view("upload"), (), {}))
+        self.middleware._enter()
+        self.middleware._leave(self.request)
+        self.assertEqual(self.middleware.in_flight_by_scope["search"], 0)
+
+
+@skipUnless(settings.API_DOCS, "API_DOCS=False no monta /api/schema/")
+class OpenAPISchemaCacheTests(SimpleTestCase):
+    SCHEMA = {"openapi": "3.0.3", "info": {"title": "t", "version": "1"}, "paths": {}}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "schema.json"
+        override = override_settings(OPENAPI_SCHEMA={"PATH": str(self.path), "CODE_VERSION": "v1"})
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(openapi, "generate_schema", return_value=self.SCHEMA)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_generates_once_and_reuses_the_file(self):
+        self.assertEqual(openapi.SchemaCache().get(), ("v1", self.SCHEMA))
+        self.assertEqual(openapi.read_schema("v1"), self.SCHEMA)
+        openapi.SchemaCache().get()  # otro proceso: lee el archivo
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_regenerates_when_code_version_changes(self):
+        openapi.write_schema({"viejo": True}, "v0")
+        self.assertIsNone(openapi.read_schema("v1"))
+        self.assertEqual(openapi.SchemaCache().get()[1], self.SCHEMA)
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(json.loads(self.path.read_text())["version"], "v1")
+
+    def test_served_with_etag(self):
+        with mock.patch.object(openapi, "schema_cache", openapi.SchemaCache()):
+            response = Client().get("/api/schema/?format=json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content), self.SCHEMA)
+            self.assertEqual(response["ETag"], '"v1-json"')
+            again = Client().get("/api/schema/?format=json", headers={"If-None-Match": '"v1-json"'})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(self.generate.call_count, 1)
+
+
+class ApiDocsToggleTests(SimpleTestCase):
+    # Cada caso en un intérprete nuevo: API_DOCS se lee al cargar settings y core.docs
+    SCRIPT = (
+        "import sys, django; django.setup()\n"
+        "from django.urls import Resolver404, resolve\n"
+        "import comunidadai_api.urls, core.views\n"
+        "from core import docs\n"
+        "try:\n    resolve('/api/schema/'); routed = True\n"
+        "except Resolver404:\n    routed = False\n"
+        "view = lambda request: None\n"
+        "decorated = docs.extend_schema(parameters=[docs.OpenApiParameter('q', docs.OpenApiTypes.STR)])(view)\n"
+        "shimmed = decorated is view and docs.extend_schema.__module__ == 'core.docs'\n"
+        "loaded = sorted(m for m in sys.modules if m.startswith('drf_spectacular'))\n"
+        "print(routed, shimmed, 'drf_spectacular' in loaded, 'drf_spectacular.views' in loaded)\n"
+    )
+
+    def _run(self, api_docs):
+        proc = subprocess.run(
+            [sys.executable, "-c", self.SCRIPT], env={**os.environ, "API_DOCS": api_docs},
+            cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        return proc.stdout.split()
+
+    def test_disabled_skips_routes_and_drf_spectacular(self):
+        self.assertEqual(self._run("False"), ["False", "True", "False", "False"])
+
+    def test_enabled_routes_schema_lazily(self):
+        # Las vistas de drf_spectacular se importan recién en el primer request al schema
+        self.assertEqual(self._run("True"), ["True", "False", "True", "False"])
+
+
+class ReconcileMediaTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(MEDIA_ROOT=media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.media = Path(media.name)
+        me = make_educator("me")
+        old = timezone.now() - timedelta(hours=2)
+        for rel in ("publications/kept.html", "publications/orphan.html", "images/kept.png", "images/sub/orphan.png"):
+            self._write(rel, age=7200)
+        self._write("publications/fresh.html", age=0)  # escritura en curso: se ignora
+        pubs = [
+            Publication(educator=me, title=name, publication_type="ARTICLE",
+                        content_url=f"{settings.MEDIA_URL}publications/{name}.html")
+            for name in ("kept", "missing")
+        ]
+        pubs.append(Publication(educator=me, title="db", publication_type="ARTICLE", content="<p>x</p>"))
+        Publication.objects.bulk_create(pubs)
+        kept = Publication.objects.get(title="kept")
+        Image.objects.bulk_create([Image(publication=kept, file=f"images/{n}.png") for n in ("kept", "missing")])
+        Publication.objects.update(created_at=old)
+        Image.objects.update(created_at=old)
+
+    def _write(self, rel, age):
+        path = self.media / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * 10)
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+    def _run(self, *args):
+        out = io.StringIO()
+        call_command("reconcile_media", *args, stdout=out)
+        return out.getvalue().splitlines()
+
+    def test_reports_without_touching_anything(self):
+        self.assertEqual(self._run("--batch-size", "1"), [
+            "publications: 3 archivos, 1 huérfanos encontrados (10 bytes), 1 publicaciones sin archivo",
+            "images: 2 archivos, 1 huérfanos encontrados (10 bytes), 1 imágenes sin archivo",
+        ])
+        self.assertTrue((self.media / "publications/orphan.html").exists())
+        self.assertEqual(Image.objects.count(), 2)
+
+    def test_delete_removes_orphans_and_dangling_images_only(self):
+        self._run("--delete")
+        remaining = sorted(p.relative_to(self.media).as_posix() for p in self.media.rglob("*") if p.is_file())
+        self.assertEqual(remaining, ["images/kept.png", "publications/fresh.html", "publications/kept.html"])
+        self.assertEqual(list(Image.objects.values_list("file", flat=True)), ["images/kept.png"])
+        self.assertEqual(Publication.objects.count(), 3)  # las colgantes solo se reportan
+
+
+class PublicationDbContentTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=media.name,
+            PUBLICATION_STORAGE={**settings.PUBLICATION_STORAGE, "BACKEND": "db", "COMPRESSION": "gzip"},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.me = make_educator("me")
+        self.headers = auth_headers(self.me)
+
+    def _create(self, content="<p>hola</p>"):
+        data = {"title": "t", "publication_type": "ARTICLE", "content": content}
+        response = Client().post("/api/publication/me/create", data, content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 201)
+        return Publication.objects.get(id=response.json()["id"])
+
+    def _content(self, pub, **headers):
+        return Client().get(f"/api/publications/{pub.id}/content", headers={**self.headers, **headers})
+
+    def test_new_publications_live_in_the_column_deferred_by_default(self):
+        pub = self._create()
+        self.assertEqual(pub.content_url, "")
+        self.assertIn("content", pub.get_deferred_fields())
+        self.assertEqual(Publication.objects.with_content().get(id=pub.id).content, "<p>hola</p>")
+        self.assertFalse(any(Path(settings.MEDIA_ROOT).rglob("*.html*")))
+
+    def test_etag_changes_on_edit(self):
+        pub = self._create()
+        first = self._content(pub)
+        self.assertEqual((first.status_code, first.content), (200, b"<p>hola</p>"))
+        self.assertEqual(self._content(pub, **{"If-None-Match": first["ETag"]}).status_code, 304)
+
+        response = Client().put(f"/api/publication/me/update/{pub.id}", {"content": "<p>chau</p>"},
+                                content_type="application/json", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        stale = self._content(pub, **{"If-None-Match": first["ETag"]})
+        self.assertEqual((stale.status_code, stale.content), (200, b"<p>chau</p>"))
+        self.assertNotEqual(stale["ETag"], first["ETag"])
+
+    def test_migrate_between_backends(self):
+        pub = self._create("<p>ida y vuelta</p>")
+        out = io.StringIO()
+        call_command("migrate_publication_content", to="file", stdout=out)
+        pub.refresh_from_db()
+        self.assertTrue(pub.content_url.endswith(".html.gz"))
+        self.assertEqual(get_publication_html(pub.content_url), "<p>ida y vuelta</p>")
+        self.assertIsNone(Publication.objects.with_content().get(id=pub.id).content)
+
+        call_command("migrate_publication_content", to="db", stdout=out)
+        pub = Publication.objects.with_content().get(id=pub.id)
+        self.assertEqual((pub.content_url, pub.content), ("", "<p>ida y vuelta</p>"))
+        self.assertFalse(any(Path(settings.MEDIA_ROOT).rglob("*.html*")))
+        self.assertIn("Publicaciones movidas a db: 1", out.getvalue())
+
+
+class NickAutocompleteTests(TestCase):
+    NICKS = ("ana", "Anabel", "anabella", "andres", "Bob", "bruno", "carla")
+
+    def setUp(self):
+        self.educators = {nick: make_educator(nick) for nick in self.NICKS}
+        patcher = mock.patch.object(autocomplete, "nick_index", autocomplete.NickIndex())
+        self.index = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _db(self, prefix, limit):
+        with override_settings(NICK_AUTOCOMPLETE={**settings.NICK_AUTOCOMPLETE, "BACKEND": "db"}):
+            return autocomplete.autocomplete(prefix, limit)
+
+    def test_normalize(self):
+        self.assertEqual(autocomplete.normalize("  Ñandú "), "nandu")
+        self.assertEqual(autocomplete.normalize("STRASSE"), autocomplete.normalize("Straße"))
+
+    def test_memory_matches_db(self):
+        for prefix, limit in (("an", 10), ("AnA", 10), ("an", 2), ("b", 10), ("z", 10), ("", 3)):
+            with self.subTest(prefix=prefix, limit=limit):
+                self.assertEqual(autocomplete.autocomplete(prefix, limit), self._db(prefix, limit))
+        self.assertTrue(self.index.ready)
+
+    def test_ignores_accents_in_memory(self):
+        edu = make_educator("Ánxela")
+        self.index.rebuild()
+        self.assertEqual(self.index.search("anx", 5), [(edu.id, "Ánxela")])
+        self.assertEqual(self.index.search("ÁN", 10)[-1], (edu.id, "Ánxela"))
+
+    def test_signals_keep_index_current(self):
+        self.index.rebuild()
+        bob = self.educators["Bob"]
+        with self.captureOnCommitCallbacks(execute=True):
+            bob.nick_name = "zoe"
+            bob.save()
+            newcomer = make_educator("zara")
+        self.assertEqual(self.index.search("z", 10), [(newcomer.id, "zara"), (bob.id, "zoe")])
+        self.assertEqual(self.index.search("bo", 10), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            newcomer.delete()
+        self.assertEqual(self.index.search("z", 10), [(bob.id, "zoe")])
+
+    def test_stale_index_is_rebuilt(self):
+        self.index.rebuild()
+        Educator.objects.filter(id=self.educators["carla"].id).update(nick_name="camila")  # otro proceso
+        self.assertEqual(self.index.search("cam", 5), [])
+        self.index._built_at -= settings.NICK_AUTOCOMPLETE["REFRESH_SECONDS"] + 1
+        self.assertEqual(autocomplete.autocomplete("cam", 5), [(self.educators["carla"].id, "camila")])
+
+    def test_endpoint(self):
+        headers = auth_headers(self.educators["ana"])
+        self.assertEqual(Client().get("/api/educator/autocomplete", headers=headers).status_code, 400)
+        response = Client().get("/api/educator/autocomplete?q=AN&limit=100", headers=headers)
+        self.assertEqual([item["nick_name"] for item in response.json()], ["ana", "Anabel", "anabella", "andres"])
+        response = Client().get("/api/educator/autocomplete?q=an&limit=0", headers=headers)
+        self.assertEqual(len(response.json()), 1)
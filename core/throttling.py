@@ -0,0 +1,207 @@
+# core/throttling.py
+"""
+Rate limiting por cliente (token bucket) y load shedding por concurrencia.
+
+- TokenBucketThrottle: throttle de DRF; cada vista cara declara
+  `throttle_scope` y su presupuesto sale de RATE_LIMITS["SCOPES"]
+  ("N/periodo": ráfaga de N y recarga de N por periodo). La clave es el
+  user id autenticado o, si no hay, la IP (get_ident de DRF, respeta NUM_PROXIES).
+- Backends: "memory" (un proceso, exacto) o "cache" (cache de Django
+  compartido entre workers; lectura-escritura sin CAS, así que bajo carrera
+  puede dejar pasar algún request de más).
+- LoadSheddingMiddleware: si los requests en curso del proceso (global o del
+  scope de la vista) superan LOAD_SHEDDING, responde 503 con Retry-After.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from rest_framework.throttling import BaseThrottle
+from rest_framework.settings import api_settings
+
+from .metrics import registry
+
+THROTTLED = registry.counter(
+    "throttled_requests_total", "Requests rechazados por rate limit o load shedding.", ["scope", "reason"])
+
+_PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def parse_rate(rate):
+    """'60/min' -> (capacidad 60, 1 token/s). None o '' -> None (sin límite)."""
+    if not rate:
+        return None
+    num, period = rate.split("/")
+    capacity = int(num)
+    return capacity, capacity / _PERIODS[period.strip().lower()]
+
+
+def _refill(tokens, stamp, now, capacity, refill_rate):
+    return min(capacity, tokens + (now - stamp) * refill_rate)
+
+
+class MemoryBucketStore:
+    """Buckets en memoria del proceso; LRU acotado a MAX_KEYS clientes."""
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, timestamp)
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, stamp, now, capacity, refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets en un cache de Django compartido (redis/memcached) entre workers."""
+    def __init__(self, alias):
+        self.alias = alias
+
+    def consume(self, key, capacity, refill_rate):
+        cache = caches[self.alias]
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        tokens, stamp = cache.get(cache_key) or (capacity, now)
+        tokens = _refill(tokens, stamp, now, capacity, refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expira cuando el bucket ya estaría lleno de nuevo
+        cache.set(cache_key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill_rate) + 1)
+        return allowed, 0.0 if allowed else (1 - tokens) / refill_rate
+
+    def clear(self):
+        pass
+
+
+def _make_store():
+    conf = settings.RATE_LIMITS
+    if conf["BACKEND"] == "cache":
+        return CacheBucketStore(conf["CACHE"])
+    return MemoryBucketStore(conf["MAX_KEYS"])
+
+store = _make_store()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    def get_cache_key(self, request, scope):
+        user = getattr(request, "user", None)
+        if user is not None and getattr(user, "is_authenticated", False) and getattr(user, "id", None):
+            return f"{scope}:user:{user.id}"
+        return f"{scope}:ip:{self.get_ident(request)}"
+
+    def get_ident(self, request):
+        # Sin NUM_PROXIES, DRF usaría el X-Forwarded-For que manda el cliente (rotable a voluntad)
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return super().get_ident(request)
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        rate = parse_rate(settings.RATE_LIMITS["SCOPES"].get(scope)) if scope else None
+        if rate is None:
+            return True
+        allowed, self._wait = store.consume(self.get_cache_key(request, scope), *rate)
+        if not allowed:
+            THROTTLED.inc(scope=scope, reason="rate")
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LoadSheddingMiddleware:
+    """
+    Cuenta requests en curso del proceso (todos y por throttle_scope de la
+    vista). Por encima del límite configurado responde 503 sin ejecutar la vista.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.in_flight_by_scope = {}
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django adapta process_view según sea corrutina o no: así no pasa por un hilo
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._enter():
+            return self._shed("*")
+        try:
+            return self.get_response(request)
+        finally:
+            self._leave(request)
+
+    async def __acall__(self, request):
+        if not self._enter():
+            return self._shed("*")
+        try:
+            return await self.get_response(request)
+        finally:
+            self._leave(request)
+
+    def _enter(self):
+        limit = settings.LOAD_SHEDDING["MAX_IN_FLIGHT"]
+        with self._lock:
+            if limit and self.in_flight >= limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _leave(self, request):
+        with self._lock:
+            self.in_flight -= 1
+            scope = getattr(request, "_shedding_scope", None)
+            if scope:
+                self.in_flight_by_scope[scope] -= 1
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self._check_scope(request, view_func)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self._check_scope(request, view_func)
+
+    def _check_scope(self, request, view_func):
+        scope = getattr(getattr(view_func, "view_class", None), "throttle_scope", None)
+        limit = settings.LOAD_SHEDDING["SCOPES"].get(scope) if scope else None
+        if not limit:
+            return None
+        with self._lock:
+            if self.in_flight_by_scope.get(scope, 0) >= limit:
+                shed = True
+            else:
+                shed = False
+                self.in_flight_by_scope[scope] = self.in_flight_by_scope.get(scope, 0) + 1
+                request._shedding_scope = scope
+        return self._shed(scope) if shed else None
+
+    def _shed(self, scope):
+        THROTTLED.inc(scope=scope, reason="shed")
+        response = JsonResponse({"detail": "Servidor ocupado, reintenta en unos segundos."}, status=503)
+        response["Retry-After"] = str(settings.LOAD_SHEDDING["RETRY_AFTER"])
+        return response
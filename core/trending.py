@@ -0,0 +1,106 @@
+# core/trending.py
+"""
+Ranking de publicaciones en tendencia, materializado en TrendingPublication.
+
+Cada comentario suma 0.5 ** (edad / HALF_LIFE_HOURS) al comment_score de su
+publicación. Como el decaimiento es el mismo para todas las filas, en cada
+corrida basta multiplicar el ranking entero por un factor y sumar solo los
+comentarios nuevos (id > TrendingState.last_commentary_id); nunca se vuelve
+a agregar Commentary completo.
+
+Un id se asigna al insertar, no al commitear: un comentario con id menor al
+último procesado puede hacerse visible después de la corrida. Por eso cada
+corrida vuelve a leer también los creados en los últimos OVERLAP_SECONDS
+antes de la anterior y descarta los ya sumados (recent_commentary_ids).
+
+    python manage.py update_trending   # cron, cada pocos minutos
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.utils import timezone
+
+from .models import Commentary, Subscription, TrendingPublication, TrendingState
+
+
+def decay(seconds: float) -> float:
+    return 0.5 ** (max(seconds, 0) / (settings.TRENDING["HALF_LIFE_HOURS"] * 3600))
+
+
+def author_weight(followers: int) -> float:
+    return 1 + settings.TRENDING["FOLLOWER_WEIGHT"] * math.log1p(followers)
+
+
+@transaction.atomic
+def update_trending(now=None) -> dict:
+    conf = settings.TRENDING
+    now = now or timezone.now()
+    TrendingState.objects.get_or_create(id=1)
+    state = TrendingState.objects.select_for_update().get(id=1)  # serializa corridas concurrentes
+
+    # 1. Envejecer lo ya acumulado hasta `now`
+    if state.computed_at:
+        factor = decay((now - state.computed_at).total_seconds())
+        TrendingPublication.objects.update(comment_score=F("comment_score") * factor)
+
+    # 2. Sumar los comentarios nuevos y los que commitearon tarde con id ya pasado
+    overlap = timedelta(seconds=conf["OVERLAP_SECONDS"])
+    last_id = state.last_commentary_id
+    seen = set(state.recent_commentary_ids)
+    if state.computed_at is None:
+        # Primera corrida: los anteriores a la ventana no se suman, pero quedan marcados como vistos
+        new = Commentary.objects.filter(id__gt=last_id)
+        last_id = new.aggregate(m=Max("id"))["m"] or last_id
+        new = new.filter(id__lte=last_id, created_at__gte=now - timedelta(hours=conf["WINDOW_HOURS"]))
+    else:
+        new = Commentary.objects.filter(Q(id__gt=last_id) | Q(created_at__gte=state.computed_at - overlap))
+    increments = defaultdict(float)
+    new_comments = 0
+    recent = []
+    for comment_id, publication_id, created_at in new.order_by("id").values_list("id", "publication_id", "created_at").iterator(chunk_size=2000):
+        if created_at >= now - overlap:
+            recent.append(comment_id)
+        if comment_id in seen:
+            continue
+        increments[publication_id] += decay((now - created_at).total_seconds())
+        last_id = max(last_id, comment_id)
+        new_comments += 1
+
+    existing = TrendingPublication.objects.in_bulk(list(increments))
+    for publication_id, inc in increments.items():
+        if publication_id in existing:
+            existing[publication_id].comment_score += inc
+    TrendingPublication.objects.bulk_update(existing.values(), ["comment_score"], batch_size=500)
+    TrendingPublication.objects.bulk_create(
+        [TrendingPublication(publication_id=pid, comment_score=inc) for pid, inc in increments.items() if pid not in existing],
+        batch_size=500,
+    )
+
+    # 3. Podar: por debajo del mínimo o fuera de las MAX_ROWS mejores
+    pruned = TrendingPublication.objects.filter(comment_score__lt=conf["MIN_COMMENT_SCORE"]).delete()[0]
+    overflow = list(
+        TrendingPublication.objects.order_by("-comment_score").values_list("publication_id", flat=True)[conf["MAX_ROWS"]:]
+    )
+    if overflow:
+        pruned += TrendingPublication.objects.filter(publication_id__in=overflow).delete()[0]
+
+    # 4. Score final con los seguidores actuales del autor (tabla chica: se recalcula entera)
+    rows = list(TrendingPublication.objects.select_related("publication").only("publication_id", "comment_score", "publication__educator_id"))
+    authors = {row.publication.educator_id for row in rows}
+    followers = dict(
+        Subscription.objects.filter(subscribed_id__in=authors)
+        .values("subscribed_id").annotate(n=Count("id")).values_list("subscribed_id", "n")
+    )
+    for row in rows:
+        row.score = row.comment_score * author_weight(followers.get(row.publication.educator_id, 0))
+    TrendingPublication.objects.bulk_update(rows, ["score"], batch_size=500)
+
+    state.last_commentary_id = last_id
+    state.computed_at = now
+    state.recent_commentary_ids = recent
+    state.save(update_fields=["last_commentary_id", "computed_at", "recent_commentary_ids"])
+    return {"new_comments": new_comments, "publications": len(rows), "pruned": pruned}
@@ -0,0 +1,139 @@
+# core/uploads.py
+"""
+Subidas de imágenes por partes, reanudables.
+
+Protocolo: POST crea la sesión -> PUT de bytes en el offset actual (se puede
+repetir desde el último offset confirmado tras un corte) -> POST finalize.
+Los bytes se anexan a un archivo temporal por bloques, sin cargar el
+archivo completo en memoria.
+"""
+import fcntl
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+from .image_validation import ImageValidationError, inspect_image, inspect_image_path
+from .models import Image, UploadSession, image_upload_path
+
+BLOCK_SIZE = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """Offset distinto al confirmado, otra subida en curso o sesión incompleta."""
+    def __init__(self, message, received):
+        super().__init__(message)
+        self.received = received
+
+
+def append_chunk(session: UploadSession, offset: int, stream, length: int) -> int:
+    """
+    Anexa `length` bytes de `stream` en `offset`. Devuelve el nuevo offset
+    confirmado (puede ser menor a offset+length si el cliente cortó la conexión).
+    """
+    conf = settings.UPLOAD_SESSIONS
+    if length > conf["MAX_CHUNK"]:
+        raise ValueError(f"Chunk mayor al máximo ({conf['MAX_CHUNK']} bytes)")
+    if offset + length > session.total_size:
+        raise ValueError("El chunk excede el tamaño declarado")
+
+    os.makedirs(conf["TEMP_DIR"], exist_ok=True)
+    fd = os.open(session.part_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict("Hay otra subida en curso para esta sesión", session.received)
+
+        # Con el lock tomado, el offset de la DB es el autoritativo
+        session.refresh_from_db(fields=["received"])
+        if offset != session.received:
+            raise UploadConflict("Offset inválido", session.received)
+
+        # Descarta bytes de un intento anterior que no llegó a confirmarse
+        os.ftruncate(fd, offset)
+        os.lseek(fd, offset, os.SEEK_SET)
+        written = 0
+        try:
+            while written < length:
+                block = stream.read(min(BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                os.write(fd, block)
+                written += len(block)
+        finally:
+            if written:
+                session.received = offset + written
+                # update() no aplica auto_now: sin esto cleanup_upload_sessions borraría subidas en progreso
+                session.updated_at = timezone.now()
+                UploadSession.objects.filter(id=session.id).update(received=session.received, updated_at=session.updated_at)
+        return session.received
+    finally:
+        os.close(fd)
+
+
+def finalize(session: UploadSession) -> Image:
+    with transaction.atomic():
+        # Lock de la fila: un segundo finalize concurrente espera y luego ve la sesión borrada
+        session = UploadSession.objects.select_for_update().filter(id=session.id).first()
+        if session is None:
+            raise UploadConflict("La sesión ya fue finalizada", None)
+        if session.received != session.total_size:
+            raise UploadConflict("La subida no está completa", session.received)
+        inspect_image_path(session.part_path)  # ImageValidationError es ValueError
+
+        filename = get_valid_filename(os.path.basename(session.filename)) or "upload"
+        with open(session.part_path, "rb") as fh:
+            # El storage copia el temporal por bloques; Image.save renombra a <id>.<ext>
+            image = Image.objects.create(publication_id=session.publication_id, file=File(fh, name=filename))
+        session.delete()  # la señal post_delete borra el .part
+    return image
+
+
+# -------- Subida en lote --------
+_batch_executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_BATCH["WORKERS"], thread_name_prefix="upload-batch")
+
+def _validate_and_store(uploaded):
+    """Valida (cabecera + límites de IMAGE_UPLOAD) y guarda en el storage; corre en el pool de hilos."""
+    try:
+        inspect_image(uploaded)
+    except ImageValidationError as e:
+        return None, str(e)
+    filename = get_valid_filename(os.path.basename(uploaded.name)) or "upload"
+    return default_storage.save(image_upload_path(None, filename), uploaded), None
+
+def batch_create_images(publication, files):
+    """
+    Valida y guarda los archivos en paralelo, inserta las filas con un único
+    bulk_create y renombra a <id>.<ext> con un único bulk_update.
+    Devuelve una lista de (archivo, Image | None, error | None) en el orden recibido.
+    """
+    outcomes = list(_batch_executor.map(_validate_and_store, files))
+    images = [
+        Image(publication=publication, file=name)
+        for name, error in outcomes if error is None
+    ]
+    stored = [img.file.name for img in images]
+    try:
+        with transaction.atomic():
+            Image.objects.bulk_create(images)
+            for img in images:
+                img.rename_to_pk()
+            Image.objects.bulk_update(images, ["file", "url"])
+    except Exception:
+        for name in stored:
+            default_storage.delete(name)
+        for img in images:
+            if img.pk and img.file.name not in stored:
+                default_storage.delete(img.file.name)
+        raise
+
+    created = iter(images)
+    return [
+        (uploaded, next(created) if error is None else None, error)
+        for uploaded, (_, error) in zip(files, outcomes)
+    ]
@@ -3,14 +3,19 @@ from .views import (
     AuthLoginView, AuthSignupView, AuthLogoutView, AuthRefreshView,
     AdminUserListView, AdminUserDetailView, AdminUserUpdateView, AdminUserDeleteView,
     AdminPublicationUpdateView, AdminPublicationDeleteView,
+    AdminProfileListView, AdminProfileDownloadView, AdminProfileSummaryView, MetricsView,
     MeDeleteView, MeEducatorDetailView, MeEducatorUpdateView,
-    EducatorListView, EducatorSearchView, EducatorDetailView,
-    PublicationListView, PublicationByUserView, PublicationMeListView, PublicationDetailView,
+    EducatorListView, EducatorSearchView, EducatorAutocompleteView, EducatorSuggestionsView, EducatorDetailView,
+    PublicationListView, PublicationByUserView, PublicationMeListView, PublicationDetailView, PublicationContentView,
     PublicationMeCreateView, PublicationMeUpdateView, PublicationMeDeleteView,
-    PublicationSearchView,
+    PublicationSearchView, PublicationTrendingView,
     CommentaryMeCreateView, CommentaryMeUpdateView, CommentaryMeDeleteView,
     FollowView, UnfollowView, FollowersMeListView, FollowingMeListView, FollowersByEducatorView, FollowingByEducatorView,
-    ImageUploadView
+    ImageUploadView, ImageBatchUploadView, UploadSessionCreateView, UploadSessionDetailView, UploadSessionFinalizeView,
+    NotificationMeListView, NotificationMeReadView
+)
+from .async_views import (
+    AsyncEducatorListView, AsyncPublicationListView, AsyncPublicationDetailView, AsyncPublicationSearchView
 )
 
 urlpatterns = [
@@ -27,6 +32,12 @@ urlpatterns = [
     path("admin/users/<int:user_id>/delete", AdminUserDeleteView.as_view()),
     path("admin/publications/<int:pub_id>/update", AdminPublicationUpdateView.as_view()),
     path("admin/publications/<int:pub_id>/delete", AdminPublicationDeleteView.as_view()),
+    path("admin/profiles", AdminProfileListView.as_view()),                         # GET ?limit=
+    path("admin/profiles/<str:name>", AdminProfileDownloadView.as_view()),          # GET descarga
+    path("admin/profiles/<str:name>/summary", AdminProfileSummaryView.as_view()),   # GET ?limit=
+
+    # Métricas (Prometheus)
+    path("metrics", MetricsView.as_view()),
 
     # Me (User/Educator)
     path("educator/me", MeEducatorDetailView.as_view()),              # GET datos personales (incluye user/publications)
@@ -36,10 +47,13 @@ urlpatterns = [
     # Educators
     path("educator", EducatorListView.as_view()),                     # GET con offset & limit
     path("educator/search", EducatorSearchView.as_view()),            # GET ?q=nickpart&offset=&limit=
+    path("educator/autocomplete", EducatorAutocompleteView.as_view()),  # GET ?q=prefijo&limit=
+    path("educator/suggestions", EducatorSuggestionsView.as_view()),  # GET ?limit= (a quién seguir)
     path("educators/<int:educator_id>", EducatorDetailView.as_view(), name="educator-detail"),
 
     # Publications
     path("publications/<int:publication_id>", PublicationDetailView.as_view(), name="publication-detail"),
+    path("publications/<int:publication_id>/content", PublicationContentView.as_view(), name="publication-content"),
     path("publication", PublicationListView.as_view()),               # GET todas (offset/limit)
     path("publication/by-user/<int:user_id>", PublicationByUserView.as_view()),
     path("publication/me", PublicationMeListView.as_view()),          # GET
@@ -47,12 +61,23 @@ urlpatterns = [
     path("publication/me/update/<int:publication_id>", PublicationMeUpdateView.as_view()), # PUT
     path("publication/me/<int:publication_id>", PublicationMeDeleteView.as_view()),        # DELETE
     path("publication/search", PublicationSearchView.as_view()),      # GET ?nickname_part=&title=&offset=&limit=
+    path("publication/trending", PublicationTrendingView.as_view()),  # GET ?offset=&limit= (ver update_trending)
+
+    # Async (mismo contrato; servir con asgi.py)
+    path("async/educator", AsyncEducatorListView.as_view()),
+    path("async/publication", AsyncPublicationListView.as_view()),
+    path("async/publications/<int:publication_id>", AsyncPublicationDetailView.as_view()),
+    path("async/publication/search", AsyncPublicationSearchView.as_view()),
 
     # Commentary (me)
     path("commentary/me/<int:publication_id>", CommentaryMeCreateView.as_view()),         # POST
     path("commentary/me/update/<int:commentary_id>", CommentaryMeUpdateView.as_view()),   # PUT
     path("commentary/me/delete/<int:commentary_id>", CommentaryMeDeleteView.as_view()),          # DELETE
 
+    # Notifications (me)
+    path("notification/me", NotificationMeListView.as_view()),          # GET ?cursor=&limit=&unread=
+    path("notification/me/read", NotificationMeReadView.as_view()),     # POST {ids: [...]} | {up_to: id}
+
     # Subscription
     path("subscription/follow/<int:subscribed_id>", FollowView.as_view()),
     path("subscription/unfollow/<int:subscribed_id>", UnfollowView.as_view()),
@@ -63,4 +88,8 @@ urlpatterns = [
     
     #Image
     path("upload/", ImageUploadView.as_view(), name="image-upload"),
+    path("upload/batch", ImageBatchUploadView.as_view(), name="image-batch-upload"),             # POST multipart (files[])
+    path("upload/sessions", UploadSessionCreateView.as_view()),                                  # POST
+    path("upload/sessions/<uuid:session_id>", UploadSessionDetailView.as_view()),                # GET / PUT ?offset= / DELETE
+    path("upload/sessions/<uuid:session_id>/finalize", UploadSessionFinalizeView.as_view()),     # POST
 ]
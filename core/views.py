@@ -1,15 +1,15 @@
+from django.db import transaction
 from django.db.models import Q, F
-from django.contrib.auth.hashers import check_password
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample, OpenApiRequest
-from .models import User, Educator, Publication, Commentary, Subscription, Role, PublicationType, RefreshToken, Image
+from .docs import extend_schema, OpenApiParameter, OpenApiTypes, OpenApiExample, OpenApiRequest
+from .models import User, Educator, Publication, Commentary, Subscription, Role, PublicationType, RefreshToken, Image, UploadSession, Notification
 # Arriba en views.py (importa los nuevos serializers)
 from .serializers import (
-    UserSerializer, UserCreateSerializer, EducatorSerializer, MeEducatorDetailSerializer, EducatorWithFollowSerializer, EducatorDetailWithPublicationsSerializer,
-    PublicationSerializer, PublicationCreateSerializer,
+    UserSerializer, UserCreateSerializer, EducatorSerializer, MeEducatorDetailSerializer, EducatorWithFollowSerializer, EducatorDetailWithPublicationsSerializer, EducatorSuggestionSerializer, EducatorAutocompleteSerializer,
+    PublicationSerializer, PublicationCreateSerializer, TrendingPublicationSerializer,
     CommentarySerializer, CommentaryCreateSerializer,
     SubscriptionSerializer,
     LoginSerializer, RefreshTokenSerializer, DeleteMeSerializer,
@@ -19,19 +19,40 @@ from .serializers import (
     TokenPairSerializer,
     RefreshResponseSerializer,
     EducatorUserUpdateSerializer,
-    ImageUploadRequestSerializer, ImageSerializer
+    ImageUploadRequestSerializer, ImageSerializer,
+    ProfileSerializer, ProfileSummarySerializer,
+    UploadSessionCreateSerializer, UploadSessionSerializer,
+    NotificationSerializer, NotificationPageSerializer, NotificationReadSerializer, NotificationReadResponseSerializer
 )
-from .permissions import IsAdmin, IsOwnerEducatorObject
-from .jwt_utils import generate_access_token, generate_and_store_refresh, decode_any_token, invalidate_refresh, new_access_from_access
-from .storage import save_publication_html, update_publication_html, get_publication_html
+from .passwords import PasswordVerifierBusy, verify_user_password
+from .idempotency import idempotent
+from .permissions import IsAdmin, IsAdminOrInternal, IsOwnerEducatorObject
+from .jwt_utils import generate_access_token, generate_and_store_refresh, decode_any_token, invalidate_refresh, rotate_refresh, revoke_refresh, verified_tokens
+from .storage import (
+    save_publication_html, update_publication_html, get_publication_html,
+    new_publication_content, read_publication_content,
+    read_publication_bytes, decode_content, publication_path, stored_encoding,
+)
+from .profiling import list_profiles, profile_path, summarize_profile
+from .metrics import registry as metrics_registry
+from .follow_graph import follow_graph
+from .autocomplete import autocomplete
+from .notifications import mark_read, notify_commentary, notify_publication, unread_count
+from .uploads import UploadConflict, append_chunk, finalize as finalize_upload, batch_create_images
+from django.http import FileResponse, HttpResponse
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
 
 # -------- Helpers --------
 def require_offset_limit(request):
+    # DRF Request (query_params) o HttpRequest de Django (vistas async)
+    params = getattr(request, "query_params", request.GET)
     try:
-        offset = int(request.query_params.get("offset", ""))
-        limit = int(request.query_params.get("limit", ""))
+        offset = int(params.get("offset", ""))
+        limit = int(params.get("limit", ""))
         return offset, limit
     except Exception:
         raise ValueError("Los parámetros offset y limit son obligatorios y deben ser enteros.")
@@ -39,6 +60,21 @@ def require_offset_limit(request):
 def paginated(qs, offset, limit):
     return qs[offset: offset + limit]
 
+def accepts_encoding(request, encoding):
+    # Accept-Encoding: gzip, br;q=0.5, zstd;q=0 -> respeta q=0 y el comodín *
+    accepted = {}
+    for part in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
 def get_me_educator(request):
     user = getattr(request, "user", None)
     if not user or not getattr(user, "is_authenticated", False):
@@ -46,6 +82,17 @@ def get_me_educator(request):
     return getattr(user, "educator", None)
 
 # -------- Auth --------
+def _signup_replay_tokens(request, data):
+    """Replay de signup: se guardó sin tokens; con el mismo password se emite una sesión nueva."""
+    user = User.objects.filter(id=data["user"]["id"]).first()
+    try:
+        if not user or not verify_user_password(user, request.data.get("password")):
+            return Response({"detail": "Idempotency-Key reutilizada con otro payload."}, status=422)
+    except PasswordVerifierBusy:
+        return _verifier_busy()
+    refresh, _ = generate_and_store_refresh(user)
+    return {"access_token": generate_access_token(user), "refresh_token": refresh}
+
 class AuthSignupView(APIView):
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
@@ -60,6 +107,7 @@ class AuthSignupView(APIView):
         ],
         description="Crea usuario (solo role EDUCATOR permitido aquí)."
     )
+    @idempotent(reissue=_signup_replay_tokens)
     def post(self, request):
         data = request.data.copy()
         if data.get("role") == "ADMIN":
@@ -73,7 +121,14 @@ class AuthSignupView(APIView):
             return Response({"user": UserSerializer(user).data, "access_token": access, "refresh_token": refresh}, status=201)
         return Response(ser.errors, status=400)
 
+def _verifier_busy():
+    return Response(
+        {"detail": "Demasiados inicios de sesión simultáneos, reintenta en unos segundos."},
+        status=503, headers={"Retry-After": str(settings.PASSWORD_VERIFY["RETRY_AFTER"])},
+    )
+
 class AuthLoginView(APIView):
+    throttle_scope = "login"
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
 
@@ -87,8 +142,11 @@ class AuthLoginView(APIView):
         email = request.data.get("email")
         pwd = request.data.get("password")
         user = User.objects.filter(email=email).first()
-        if not user or not check_password(pwd, user.password):
-            return Response({"detail":"Credenciales inválidas"}, status=401)
+        try:
+            if not user or not verify_user_password(user, pwd):
+                return Response({"detail":"Credenciales inválidas"}, status=401)
+        except PasswordVerifierBusy:
+            return _verifier_busy()
         access = generate_access_token(user)
         refresh, _ = generate_and_store_refresh(user)
         return Response({"access_token": access, "refresh_token": refresh}, status=200)
@@ -101,16 +159,16 @@ class AuthLogoutView(APIView):
         tags=["Auth"],
         request=RefreshTokenSerializer,
         responses={200: MessageSerializer},
-        description="Elimina el refresh token en DB para invalidar sesiones."
+        description="Elimina el refresh token en DB para invalidar esa sesión."
     )
     def post(self, request):
         token = request.data.get("refresh_token")
         if not token:
             return Response({"detail": "refresh_token requerido"}, status=400)
 
-        ref = RefreshToken.objects.filter(token=token).first()
-        if ref:
-            ref.delete()
+        user_id = revoke_refresh(token)
+        if user_id:
+            verified_tokens.revoke_user(user_id)
         return Response({"detail": "OK"}, status=200)
 
 class AuthRefreshView(APIView):
@@ -121,22 +179,20 @@ class AuthRefreshView(APIView):
         tags=["Auth"],
         request=RefreshTokenSerializer,
         responses={200: RefreshResponseSerializer},
-        description="Recibe access_token y retorna uno nuevo (usa refresh guardado en DB)."
+        description="Recibe refresh_token y retorna un access token nuevo más un refresh_token rotado (el anterior deja de valer)."
     )
     def post(self, request):
         refresh_token = request.data.get("refresh_token")
         if not refresh_token:
             return Response({"detail": "refresh_token requerido"}, status=400)
 
-        ref = RefreshToken.objects.filter(token=refresh_token).first()
-        if not ref:
-            return Response({"detail": "Refresh token inválido"}, status=401)
-        if ref.expiry_date < timezone.now():
-            return Response({"detail": "Refresh token expirado"}, status=401)
+        try:
+            user, new_refresh, _ = rotate_refresh(refresh_token)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=401)
 
-        user = ref.user
         new_access = generate_access_token(user)
-        return Response({"new_access_token": new_access}, status=200)
+        return Response({"new_access_token": new_access, "refresh_token": new_refresh}, status=200)
 
 # -------- Admin --------
 class AdminUserListView(APIView):
@@ -196,24 +252,15 @@ class AdminUserDeleteView(APIView):
 
 class AdminPublicationUpdateView(APIView):
     permission_classes = [IsAdmin]
-    @extend_schema(tags=["Admin"], request=PublicationUpdateSerializer, responses={200: PublicationSerializer})
+    @extend_schema(tags=["Admin"], request=PublicationUpdateSerializer, responses={200: PublicationSerializer, 409: MessageSerializer})
     def put(self, request, pub_id):
         ser = PublicationUpdateSerializer(data=request.data)
-        ser.is_valid()
         if not ser.is_valid():
             return Response(ser.errors, status=400)
         pub = Publication.objects.filter(id=pub_id).first()
         if not pub:
             return Response({"detail":"No existe"}, status=404)
-        if "title" in request.data: pub.title = request.data["title"]
-        if "publication_type" in request.data: pub.publication_type = request.data["publication_type"]
-        if "content" in request.data:
-            content_url = pub.content_url
-            updated = update_publication_html(content_url, request.data["content"])
-            if updated != "ok":
-                return Response({"detail": updated }, status=500)
-        pub.save()
-        return Response(PublicationSerializer(pub).data)
+        return update_publication_versioned(request, pub, ser.validated_data)
 
 class AdminPublicationDeleteView(APIView):
     permission_classes = [IsAdmin]
@@ -225,6 +272,62 @@ class AdminPublicationDeleteView(APIView):
         pub.delete()  # cascada a comentarios
         return Response(status=204)
 
+class AdminProfileListView(APIView):
+    permission_classes = [IsAdmin]
+    @extend_schema(
+        tags=["Admin"],
+        parameters=[OpenApiParameter("limit", int, required=False)],
+        responses={200: ProfileSerializer(many=True)},
+        description="Perfiles recientes (header X-Profile: 1 con token ADMIN o muestreo)."
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 50))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"detail": "limit debe ser un entero positivo."}, status=400)
+        return Response(list_profiles(limit))
+
+class AdminProfileDownloadView(APIView):
+    permission_classes = [IsAdmin]
+    @extend_schema(tags=["Admin"], responses={(200, "application/octet-stream"): OpenApiTypes.BINARY, 404: MessageSerializer},
+                   description="Descarga el perfil (.prof para pstats/snakeviz, .collapsed para flamegraph).")
+    def get(self, request, name):
+        try:
+            path = profile_path(name)
+        except FileNotFoundError as e:
+            return Response({"detail": str(e)}, status=404)
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
+
+class AdminProfileSummaryView(APIView):
+    permission_classes = [IsAdmin]
+    @extend_schema(
+        tags=["Admin"],
+        parameters=[OpenApiParameter("limit", int, required=False)],
+        responses={200: ProfileSummarySerializer, 404: MessageSerializer},
+        description="Top de funciones por tiempo acumulado."
+    )
+    def get(self, request, name):
+        try:
+            limit = int(request.query_params.get("limit", 30))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response({"detail": "limit debe ser un entero positivo."}, status=400)
+        try:
+            return Response(summarize_profile(name, limit))
+        except FileNotFoundError as e:
+            return Response({"detail": str(e)}, status=404)
+
+class MetricsView(APIView):
+    permission_classes = [IsAdminOrInternal]
+
+    @extend_schema(tags=["Admin"], responses={(200, "text/plain"): OpenApiTypes.STR},
+                   description="Métricas en formato de exposición Prometheus (ADMIN o IP interna).")
+    def get(self, request):
+        return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 # -------- Me (Educator/User) --------
 class MeEducatorDetailView(APIView):
 
@@ -276,8 +379,11 @@ class MeDeleteView(APIView):
     )
     def put(self, request):
         pwd = request.data.get("password")
-        if not pwd or not check_password(pwd, request.user.password):
-            return Response({"detail":"Password inválido"}, status=401)
+        try:
+            if not verify_user_password(request.user, pwd):
+                return Response({"detail":"Password inválido"}, status=401)
+        except PasswordVerifierBusy:
+            return _verifier_busy()
         request.user.delete()
         return Response(status=204)
 
@@ -332,7 +438,68 @@ class EducatorListView(APIView):
 
         return Response(results, status=200)
 
+class EducatorAutocompleteView(APIView):
+
+    @extend_schema(
+        tags=["Educators"],
+        parameters=[
+            OpenApiParameter("q", str, required=True, default="nick"),
+            OpenApiParameter("limit", int, required=False, default=10),
+        ],
+        responses={200: EducatorAutocompleteSerializer(many=True)},
+        description=(
+            "Nicks que empiezan con q (sin distinguir mayúsculas ni acentos), en orden alfabético. "
+            "Pensado para cada tecla del buscador; para búsqueda por parecido usar educator/search."
+        )
+    )
+    def get(self, request):
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response({"detail": "Parámetro q requerido"}, status=400)
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response({"detail": "limit debe ser entero."}, status=400)
+        limit = max(1, min(limit, settings.NICK_AUTOCOMPLETE["MAX_LIMIT"]))
+        results = [{"id": pk, "nick_name": nick} for pk, nick in autocomplete(q, limit)]
+        return Response(EducatorAutocompleteSerializer(results, many=True).data)
+
+class EducatorSuggestionsView(APIView):
+
+    @extend_schema(
+        tags=["Educators"],
+        parameters=[OpenApiParameter("limit", int, required=False, default=10)],
+        responses={200: EducatorSuggestionSerializer(many=True)},
+        description=(
+            "A quién seguir: educators seguidos por quienes sigo y por mis seguidores, sin los que ya sigo. "
+            "Sin relaciones suficientes se completa con los más seguidos."
+        )
+    )
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response({"detail": "limit debe ser entero."}, status=400)
+        limit = max(1, min(limit, settings.FOLLOW_SUGGESTIONS["MAX_LIMIT"]))
+
+        me = request.user.educator
+        ranked = follow_graph.suggestions(me.id, limit)
+        educators = Educator.objects.select_related("user").in_bulk([node for node, _, _ in ranked])
+        results = [
+            {
+                "id": edu.id,
+                "nick_name": edu.nick_name,
+                "user": edu.user,
+                "score": score,
+                "mutual_follows": mutuals,
+            }
+            for node, score, mutuals in ranked
+            if (edu := educators.get(node)) is not None  # borrado desde la última reconstrucción
+        ]
+        return Response(EducatorSuggestionSerializer(results, many=True).data)
+
 class EducatorSearchView(APIView):
+    throttle_scope = "search"
 
     @extend_schema(
         tags=["Educators"],
@@ -460,6 +627,7 @@ class PublicationDetailView(APIView):
     def get(self, request, publication_id: int):
         pub = (
             Publication.objects
+            .with_content()
             .select_related("educator", "educator__user")
             .filter(id=publication_id)
             .first()
@@ -479,7 +647,7 @@ class PublicationDetailView(APIView):
         data["comments"] = CommentarySerializer(comments, many=True).data
         
         try:
-            content_html = get_publication_html(pub.content_url)
+            content_html = read_publication_content(pub)
         except Exception as e:
             return Response({"detail": f"Error al leer el contenido."}, status=400)
 
@@ -487,6 +655,144 @@ class PublicationDetailView(APIView):
 
         return Response(data, status=200)
 
+class _FileRange:
+    """
+    Lector acotado a un rango del archivo. Expone fileno() para que el
+    wsgi.file_wrapper (p. ej. gunicorn) pueda usar sendfile desde el offset
+    actual con el Content-Length del rango.
+    """
+    def __init__(self, fh, length):
+        self._fh = fh
+        self._remaining = length
+        self.name = fh.name
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self._fh.fileno()
+
+    def close(self):
+        self._fh.close()
+
+def parse_byte_range(header, size):
+    """
+    Un único rango "bytes=a-b" / "bytes=a-" / "bytes=-n" -> (start, end) inclusivo.
+    None si no hay rango utilizable; ValueError si no es satisfacible.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Rango vacío")
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        raise ValueError("Rango inválido")
+    if start >= size or end < start:
+        raise ValueError("Rango no satisfacible")
+    return start, min(end, size - 1)
+
+class PublicationContentView(APIView):
+
+    @extend_schema(
+        tags=["Publications"],
+        responses={(200, "text/html"): OpenApiTypes.STR, 206: OpenApiTypes.STR, 304: None, 404: MessageSerializer},
+        description=(
+            "HTML de la publicación (sin JSON), servido como archivo: soporta Range, "
+            "ETag/Last-Modified y, según PUBLICATION_SERVE, X-Accel-Redirect/X-Sendfile. "
+            "Si está comprimido en disco y el cliente acepta ese Content-Encoding se envía tal cual."
+        )
+    )
+    def get(self, request, publication_id: int):
+        pub = Publication.objects.filter(id=publication_id).only("content_url", "version", "updated_at").first()
+        if not pub:
+            return Response({"detail": "Publicación no encontrada."}, status=404)
+        if pub.content_in_db:
+            return self._db_response(request, pub)
+        path = publication_path(pub.content_url)
+        try:
+            st = path.stat()
+        except OSError:
+            return Response({"detail": "Contenido no encontrado."}, status=404)
+
+        conf = settings.PUBLICATION_STORAGE
+        encoding = stored_encoding(path)
+        decode = bool(encoding) and not accepts_encoding(request, encoding)
+        etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}{"-d" if decode else ""}"'
+        last_modified = int(st.st_mtime)
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            if decode:
+                # El cliente no acepta el encoding guardado: único caso con trabajo por byte
+                data, _ = read_publication_bytes(pub.content_url)
+                response = HttpResponse(decode_content(data, encoding), content_type="text/html; charset=utf-8")
+            elif conf["SERVE"] in ("x-accel", "x-sendfile"):
+                # El proxy (nginx/apache) envía el archivo, Range incluido
+                response = HttpResponse(content_type="text/html; charset=utf-8")
+                if conf["SERVE"] == "x-accel":
+                    relative = path.relative_to(settings.MEDIA_ROOT).as_posix()
+                    response["X-Accel-Redirect"] = conf["ACCEL_PREFIX"].rstrip("/") + "/" + relative
+                else:
+                    response["X-Sendfile"] = str(path)
+            else:
+                response = self._file_response(request, path, st.st_size, etag)
+        if encoding and not decode:
+            response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = f"private, max-age={conf['CACHE_MAX_AGE']}"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+    def _db_response(self, request, pub):
+        # Contenido en Publication.content: validadores por versión + updated_at (cualquier escritura
+        # que no pase por el compare-and-swap igual cambia el ETag), sin Range (lo comprime GZipMiddleware)
+        etag = f'"v{pub.version}-{int(pub.updated_at.timestamp() * 1_000_000):x}"'
+        last_modified = int(pub.updated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            content = Publication.objects.filter(id=pub.id).values_list("content", flat=True).first()
+            response = HttpResponse(content or "", content_type="text/html; charset=utf-8")
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        response["Cache-Control"] = f"private, max-age={settings.PUBLICATION_STORAGE['CACHE_MAX_AGE']}"
+        return response
+
+    def _file_response(self, request, path, size, etag):
+        byte_range = None
+        if_range = request.META.get("HTTP_IF_RANGE")
+        if not if_range or if_range == etag:
+            try:
+                byte_range = parse_byte_range(request.META.get("HTTP_RANGE"), size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{size}"
+                return response
+
+        fh = open(path, "rb")
+        if byte_range is None:
+            response = FileResponse(fh, content_type="text/html; charset=utf-8")
+        else:
+            start, end = byte_range
+            fh.seek(start)
+            response = FileResponse(_FileRange(fh, end - start + 1), status=206, content_type="text/html; charset=utf-8")
+            response["Content-Length"] = str(end - start + 1)
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Accept-Ranges"] = "bytes"
+        return response
+
 class PublicationByUserView(APIView):
     @extend_schema(
         tags=["Publications"],
@@ -524,41 +830,84 @@ class PublicationMeCreateView(APIView):
         responses={201: PublicationSerializer},
         description="Tipo de contenido son ARTICLE/FORUM. Crea publicación del educator autenticado. Guarda content como .html en /media."
     )
+    @idempotent
     def post(self, request):
         edu = request.user.educator
         ser = PublicationCreateSerializer(data=request.data)
         if not ser.is_valid():
             return Response(ser.errors, status=400)
-        content_url = save_publication_html(ser.validated_data["content"])
         pub = Publication.objects.create(
             title=ser.validated_data["title"],
             publication_type=ser.validated_data["publication_type"],
-            content_url=content_url,
-            educator=edu
+            educator=edu,
+            **new_publication_content(ser.validated_data["content"]),
         )
+        notify_publication(pub)
         return Response(PublicationSerializer(pub).data, status=201)
 
+def _if_match_version(request):
+    """Header If-Match: "3" / W/"3" / 3 -> 3; None si no viene."""
+    value = request.headers.get("If-Match", "").strip()
+    if not value or value == "*":
+        return None
+    return int(value.removeprefix("W/").strip('"'))
+
+def update_publication_versioned(request, pub, data):
+    """
+    Aplica title/publication_type/content con compare-and-swap sobre version
+    (la del body, If-Match o la leída). Lo usan el autor y el admin: toda
+    edición sube version, que también es el ETag del contenido en DB.
+    """
+    try:
+        expected = data.get("version") or _if_match_version(request) or pub.version
+    except ValueError:
+        return Response({"detail": "If-Match debe ser la versión (entero)."}, status=400)
+    changes = {f: data[f] for f in ("title", "publication_type") if f in data}
+    if "content" in data and pub.content_in_db:
+        changes["content"] = data["content"]
+
+    with transaction.atomic():
+        # Compare-and-swap: el UPDATE bloquea la fila hasta el commit, así que el
+        # archivo lo escribe un solo editor a la vez y el perdedor ve otra versión
+        swapped = Publication.objects.filter(id=pub.id, version=expected).update(
+            version=F("version") + 1, updated_at=timezone.now(), **changes,
+        )
+        if not swapped:
+            current = Publication.objects.filter(id=pub.id).values_list("version", flat=True).first()
+            return Response(
+                {"detail": "La publicación fue modificada por otro request.", "version": current},
+                status=409,
+            )
+        if "content" in data and not pub.content_in_db:
+            updated = update_publication_html(pub.content_url, data["content"])
+            if updated != "ok":
+                transaction.set_rollback(True)
+                return Response({"detail": updated}, status=500)
+    pub.refresh_from_db()
+    return Response(PublicationSerializer(pub).data)
+
 class PublicationMeUpdateView(APIView):
 
-    @extend_schema(tags=["Publications (Me)"], request=PublicationUpdateSerializer, responses={200: PublicationSerializer})
+    @extend_schema(
+        tags=["Publications (Me)"],
+        request=PublicationUpdateSerializer,
+        parameters=[OpenApiParameter("If-Match", str, OpenApiParameter.HEADER, required=False,
+                                     description="Versión esperada (alternativa al campo version).")],
+        responses={200: PublicationSerializer, 409: MessageSerializer},
+        description=(
+            "Edita la publicación. Si la versión esperada (campo version, header If-Match o la leída "
+            "al iniciar el request) ya no es la actual, responde 409 con la versión vigente."
+        ),
+    )
     def put(self, request, publication_id):
         ser = PublicationUpdateSerializer(data=request.data)
-        ser.is_valid()
         if not ser.is_valid():
             return Response(ser.errors, status=400)
         edu = request.user.educator
         pub = Publication.objects.filter(id=publication_id, educator=edu).first()
         if not pub:
             return Response({"detail":"No existe o no es tuya"}, status=404)
-        if "title" in request.data: pub.title = request.data["title"]
-        if "publication_type" in request.data: pub.publication_type = request.data["publication_type"]
-        if "content" in request.data:
-            content_url = pub.content_url
-            updated = update_publication_html(content_url, request.data["content"])
-            if updated != "ok":
-                return Response({"detail": updated }, status=500)
-        pub.save()
-        return Response(PublicationSerializer(pub).data)
+        return update_publication_versioned(request, pub, ser.validated_data)
 
 class PublicationMeDeleteView(APIView):
 
@@ -572,6 +921,7 @@ class PublicationMeDeleteView(APIView):
         return Response(status=204)
 
 class PublicationSearchView(APIView):
+    throttle_scope = "search"
 
     @extend_schema(
         tags=["Publications"],
@@ -601,10 +951,87 @@ class PublicationSearchView(APIView):
         qs = qs.order_by("-created_at")
         return Response(PublicationSerializer(paginated(qs, offset, limit), many=True).data)
 
+class PublicationTrendingView(APIView):
+
+    @extend_schema(
+        tags=["Publications"],
+        parameters=[OpenApiParameter("offset", int, required=True), OpenApiParameter("limit", int, required=True)],
+        responses={200: TrendingPublicationSerializer(many=True)},
+        description="Publicaciones en tendencia (comentarios recientes con decaimiento y seguidores del autor). Lo actualiza update_trending."
+    )
+    def get(self, request):
+        try:
+            offset, limit = require_offset_limit(request)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        # Una consulta: recorre el índice de score de TrendingPublication y une publicación y autor
+        qs = (
+            Publication.objects
+            .filter(trending__isnull=False)
+            .select_related("educator", "educator__user")
+            .annotate(score=F("trending__score"))
+            .order_by("-trending__score", "-id")
+        )
+        return Response(TrendingPublicationSerializer(paginated(qs, offset, limit), many=True).data)
+
+# -------- Notifications (me) --------
+class NotificationMeListView(APIView):
+
+    @extend_schema(
+        tags=["Notifications (Me)"],
+        parameters=[
+            OpenApiParameter("cursor", int, required=False, description="next_cursor de la página anterior."),
+            OpenApiParameter("limit", int, required=False, default=20),
+            OpenApiParameter("unread", bool, required=False, description="Solo no leídas."),
+        ],
+        responses={200: NotificationPageSerializer},
+        description="Notificaciones del usuario autenticado, de la más nueva a la más vieja, paginadas por cursor."
+    )
+    def get(self, request):
+        try:
+            cursor = request.query_params.get("cursor")
+            cursor = int(cursor) if cursor else None
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            return Response({"detail": "cursor y limit deben ser enteros."}, status=400)
+        limit = max(1, min(limit, settings.NOTIFICATIONS["MAX_LIMIT"]))
+
+        edu = request.user.educator
+        # Recorre el índice (recipient, -id): sin OFFSET, cada página cuesta lo mismo
+        qs = Notification.objects.filter(recipient=edu).select_related("actor").order_by("-id")
+        if cursor is not None:
+            qs = qs.filter(id__lt=cursor)
+        if request.query_params.get("unread") in ("1", "true"):
+            qs = qs.filter(is_read=False)
+        page = list(qs[: limit + 1])
+        next_cursor = page[limit - 1].id if len(page) > limit else None
+        return Response({
+            "results": NotificationSerializer(page[:limit], many=True).data,
+            "next_cursor": next_cursor,
+            "unread": unread_count(edu.id),
+        })
+
+class NotificationMeReadView(APIView):
+
+    @extend_schema(
+        tags=["Notifications (Me)"],
+        request=NotificationReadSerializer,
+        responses={200: NotificationReadResponseSerializer, 400: MessageSerializer},
+        description="Marca como leídas las notificaciones indicadas (ids) o todas hasta up_to inclusive."
+    )
+    def post(self, request):
+        ser = NotificationReadSerializer(data=request.data)
+        if not ser.is_valid():
+            return Response(ser.errors, status=400)
+        edu = request.user.educator
+        updated, unread = mark_read(edu.id, ids=ser.validated_data.get("ids"), up_to=ser.validated_data.get("up_to"))
+        return Response({"updated": updated, "unread": unread})
+
 # -------- Commentary (me) --------
 class CommentaryMeCreateView(APIView):
 
     @extend_schema(tags=["Commentary (Me)"], request=CommentaryCreateSerializer, responses={201: CommentarySerializer})
+    @idempotent
     def post(self, request, publication_id):
         edu = request.user.educator
         pub = Publication.objects.filter(id=publication_id).first()
@@ -612,6 +1039,7 @@ class CommentaryMeCreateView(APIView):
         ser = CommentaryCreateSerializer(data=request.data)
         if not ser.is_valid(): return Response(ser.errors, status=400)
         com = Commentary.objects.create(content=ser.validated_data["content"], educator=edu, publication=pub)
+        notify_commentary(com, pub)
         return Response(CommentarySerializer(com).data, status=201)
 
 class CommentaryMeUpdateView(APIView):
@@ -793,6 +1221,7 @@ class FollowingByEducatorView(APIView):
 
 
 class ImageUploadView(APIView):
+    throttle_scope = "upload"
     parser_classes = [MultiPartParser, FormParser]
 
     @extend_schema(
@@ -812,6 +1241,7 @@ class ImageUploadView(APIView):
         },
         responses=ImageSerializer,
     )
+    @idempotent
     def post(self, request):
         serializer = ImageUploadRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -823,4 +1253,155 @@ class ImageUploadView(APIView):
 
         image = Image.objects.create(publication=publication, file=file)
 
-        return Response(ImageSerializer(image).data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(ImageSerializer(image).data, status=status.HTTP_201_CREATED)
+
+class ImageBatchUploadView(APIView):
+    throttle_scope = "upload"
+    parser_classes = [MultiPartParser, FormParser]
+
+    @extend_schema(
+        tags=["Image"],
+        description=(
+            "Sube varias imágenes a una publicación en un solo request (campo 'files' repetido). "
+            "Devuelve el resultado por archivo: 201 si todas se guardaron, 207 si algunas fallaron, 400 si ninguna."
+        ),
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "publication_id": {"type": "integer"},
+                    "files": {"type": "array", "items": {"type": "string", "format": "binary"}},
+                },
+                "required": ["publication_id", "files"],
+            }
+        },
+        responses={201: OpenApiTypes.OBJECT, 207: OpenApiTypes.OBJECT, 404: MessageSerializer},
+    )
+    def post(self, request):
+        try:
+            publication_id = int(request.data.get("publication_id", ""))
+        except ValueError:
+            return Response({"detail": "publication_id debe ser entero."}, status=400)
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"detail": "Se requiere al menos un archivo en 'files'."}, status=400)
+        max_files = settings.UPLOAD_BATCH["MAX_FILES"]
+        if len(files) > max_files:
+            return Response({"detail": f"Máximo {max_files} archivos por request."}, status=400)
+
+        publication = Publication.objects.filter(pk=publication_id).first()
+        if not publication:
+            return Response({"detail": "Publicación no existe"}, status=404)
+
+        results = []
+        for index, (file, image, error) in enumerate(batch_create_images(publication, files)):
+            item = {"index": index, "name": file.name, "ok": image is not None}
+            if image is not None:
+                item["image"] = ImageSerializer(image).data
+            else:
+                item["error"] = error
+            results.append(item)
+
+        created = sum(1 for item in results if item["ok"])
+        if created == len(results):
+            code = status.HTTP_201_CREATED
+        elif created:
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "results": results}, status=code)
+
+# -------- Subida por partes (reanudable) --------
+def _upload_conflict(e):
+    return Response({"detail": str(e), "received": e.received}, status=409)
+
+class UploadSessionCreateView(APIView):
+
+    @extend_schema(
+        tags=["Image"],
+        request=UploadSessionCreateSerializer,
+        responses={201: UploadSessionSerializer, 404: MessageSerializer},
+        description=(
+            "Crea una sesión de subida por partes. Luego: PUT upload/sessions/<id>?offset=N "
+            "con los bytes crudos (application/octet-stream) y POST upload/sessions/<id>/finalize."
+        )
+    )
+    def post(self, request):
+        ser = UploadSessionCreateSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        max_size = min(settings.UPLOAD_SESSIONS["MAX_SIZE"], settings.IMAGE_UPLOAD["MAX_BYTES"])
+        if ser.validated_data["size"] > max_size:
+            return Response({"detail": "Archivo demasiado grande."}, status=413)
+        pub = Publication.objects.filter(id=ser.validated_data["publication_id"]).first()
+        if not pub:
+            return Response({"detail": "Publicación no existe"}, status=404)
+        session = UploadSession.objects.create(
+            user=request.user,
+            publication=pub,
+            filename=ser.validated_data["filename"],
+            total_size=ser.validated_data["size"],
+        )
+        return Response(UploadSessionSerializer(session).data, status=201)
+
+class UploadSessionDetailView(APIView):
+
+    def get_session(self, request, session_id):
+        return UploadSession.objects.filter(id=session_id, user=request.user).first()
+
+    @extend_schema(tags=["Image"], responses={200: UploadSessionSerializer, 404: MessageSerializer},
+                   description="Estado de la sesión: 'received' es el offset desde donde reanudar.")
+    def get(self, request, session_id):
+        session = self.get_session(request, session_id)
+        if not session:
+            return Response({"detail": "Sesión no existe"}, status=404)
+        return Response(UploadSessionSerializer(session).data)
+
+    @extend_schema(
+        tags=["Image"],
+        parameters=[OpenApiParameter("offset", int, required=True)],
+        request={"application/octet-stream": {"type": "string", "format": "binary"}},
+        responses={200: UploadSessionSerializer, 409: MessageSerializer, 404: MessageSerializer},
+        description="Anexa bytes en 'offset' (debe coincidir con 'received'; si no, 409 con el offset correcto)."
+    )
+    def put(self, request, session_id):
+        session = self.get_session(request, session_id)
+        if not session:
+            return Response({"detail": "Sesión no existe"}, status=404)
+        try:
+            offset = int(request.query_params.get("offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"detail": "offset y Content-Length deben ser enteros."}, status=400)
+        if length <= 0:
+            return Response({"detail": "Chunk vacío."}, status=400)
+        try:
+            append_chunk(session, offset, request.stream, length)
+        except UploadConflict as e:
+            return _upload_conflict(e)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(UploadSessionSerializer(session).data)
+
+    @extend_schema(tags=["Image"], request=None, responses={204: None})
+    def delete(self, request, session_id):
+        session = self.get_session(request, session_id)
+        if not session:
+            return Response({"detail": "Sesión no existe"}, status=404)
+        session.delete()
+        return Response(status=204)
+
+class UploadSessionFinalizeView(APIView):
+
+    @extend_schema(tags=["Image"], request=None, responses={201: ImageSerializer, 409: MessageSerializer},
+                   description="Valida la imagen completa y crea el Image de la publicación.")
+    def post(self, request, session_id):
+        session = UploadSession.objects.filter(id=session_id, user=request.user).first()
+        if not session:
+            return Response({"detail": "Sesión no existe"}, status=404)
+        try:
+            image = finalize_upload(session)
+        except UploadConflict as e:
+            return _upload_conflict(e)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        return Response(ImageSerializer(image).data, status=status.HTTP_201_CREATED)